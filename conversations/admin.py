@@ -1,5 +1,12 @@
 from django.contrib import admin
-from .models import Conversation, TranscriptSegment, ImprovementNote
+from .models import (
+    Conversation,
+    ImprovementNote,
+    KnownSpeaker,
+    TranscriptionJob,
+    TranscriptSegment,
+    UserProfile,
+)
 
 
 class TranscriptSegmentInline(admin.TabularInline):
@@ -43,3 +50,26 @@ class ImprovementNoteAdmin(admin.ModelAdmin):
     @admin.display(description="Feedback")
     def feedback_text_preview(self, obj):
         return obj.feedback_text[:50] + "..." if len(obj.feedback_text) > 50 else obj.feedback_text
+
+
+@admin.register(TranscriptionJob)
+class TranscriptionJobAdmin(admin.ModelAdmin):
+    list_display = ["title", "user", "status", "attempts", "created_at", "finished_at"]
+    list_filter = ["status"]
+    search_fields = ["title", "user__username"]
+    readonly_fields = ["conversation", "started_at", "finished_at"]
+
+
+@admin.register(UserProfile)
+class UserProfileAdmin(admin.ModelAdmin):
+    list_display = ["user", "preferred_language", "detected_language", "detected_streak", "updated_at"]
+    search_fields = ["user__username"]
+    readonly_fields = ["detected_language", "detected_streak"]
+
+
+@admin.register(KnownSpeaker)
+class KnownSpeakerAdmin(admin.ModelAdmin):
+    list_display = ["name", "user", "observations", "last_seen_at"]
+    search_fields = ["name", "user__username"]
+    readonly_fields = ["dim", "observations", "created_at", "last_seen_at"]
+    exclude = ["embedding"]
@@ -0,0 +1,236 @@
+"""
+Admission control for the heavy ML endpoints (upload, summarize, action items).
+
+Two checks run before the view body, so a saturated host answers in
+microseconds instead of queueing requests behind model work:
+
+* Per-host concurrency budget: ADMISSION_MAX_CONCURRENT lock files in
+  ADMISSION_LOCK_DIR, shared by every web worker (fcntl.flock, released when
+  the process dies). All taken -> 503 with Retry-After. Uploads skip it:
+  they only spool the file for the transcribe worker.
+* Per-user token bucket per endpoint ("scope"), stored in the default Django
+  cache so all workers see the same bucket. Empty -> 429 with Retry-After
+  set to when the next token arrives. Each bucket's read-modify-write runs
+  under a host-wide file lock, so workers of one host never spend the same
+  token; with one Redis shared by several hosts the limit is approximate
+  (concurrent requests on different hosts can each spend the last token).
+
+Admitted / rate_limited / busy counters per scope live in the same cache
+(admission_status(), shown on /api/models/). Use a shared cache backend
+(REDIS_URL or DJANGO_CACHE_DIR, see settings) for the limits to be host-wide.
+"""
+from __future__ import annotations
+
+import functools
+import logging
+import math
+import os
+import threading
+import time
+import zlib
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+
+from django.core.cache import cache
+from django.http import JsonResponse
+
+from .inference_slots import INFERENCE_LOCK_DIR
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+ADMISSION_ENABLED = os.environ.get("ADMISSION_CONTROL", "1").lower() not in ("0", "false", "no")
+ADMISSION_MAX_CONCURRENT = max(1, int(os.environ.get("ADMISSION_MAX_CONCURRENT", "4")))
+ADMISSION_LOCK_DIR = Path(os.environ.get("ADMISSION_LOCK_DIR") or INFERENCE_LOCK_DIR / "admission")
+BUSY_RETRY_AFTER_SEC = 10
+# (requests per minute, burst) per scope; ADMISSION_RATE_<SCOPE>="rate/burst" overrides.
+DEFAULT_RATES = {
+    "transcribe": (6, 3),
+    "summarize": (10, 5),
+    "action_items": (10, 5),
+}
+SCOPES = tuple(DEFAULT_RATES)
+OUTCOMES = ("admitted", "rate_limited", "busy")
+_BUCKET_TTL_SEC = 3600
+
+
+def _rate_from_env(scope: str) -> tuple[float, int]:
+    raw = os.environ.get(f"ADMISSION_RATE_{scope.upper()}", "").strip()
+    if not raw:
+        return DEFAULT_RATES[scope]
+    rate, _, burst = raw.partition("/")
+    return float(rate), max(1, int(burst or 1))
+
+
+RATES = {scope: _rate_from_env(scope) for scope in SCOPES}
+
+_fallback = threading.BoundedSemaphore(ADMISSION_MAX_CONCURRENT)
+_BUCKET_LOCK_STRIPES = 64
+_bucket_thread_lock = threading.Lock()
+
+
+class AdmissionRejected(Exception):
+    """A heavy request was turned away; status is 429 (rate limit) or 503 (host busy)."""
+
+    def __init__(self, status: int, retry_after: int, message: str):
+        self.status = status
+        self.retry_after = max(1, int(retry_after))
+        super().__init__(message)
+
+
+def _count(scope: str, outcome: str) -> None:
+    key = f"admission:count:{scope}:{outcome}"
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:  # evicted between add and incr
+        cache.set(key, 1, timeout=None)
+
+
+@contextmanager
+def _bucket_lock(key: str):
+    """Serialize the get/set of one bucket across this host's workers (striped lock files)."""
+    with _bucket_thread_lock:
+        if fcntl is None:
+            yield
+            return
+        ADMISSION_LOCK_DIR.mkdir(parents=True, exist_ok=True)
+        stripe = zlib.crc32(key.encode()) % _BUCKET_LOCK_STRIPES
+        with open(ADMISSION_LOCK_DIR / f"bucket-{stripe}.lock", "a+") as fh:
+            fcntl.flock(fh, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+def take_token(scope: str, user_id) -> float:
+    """
+    Spend one token from the user's bucket for scope. Returns 0 when admitted,
+    otherwise the seconds until a token is available (nothing is spent).
+    """
+    per_min, burst = RATES[scope]
+    if per_min <= 0:
+        return 0.0
+    per_sec = per_min / 60.0
+    key = f"admission:bucket:{scope}:{user_id}"
+    with _bucket_lock(key):
+        now = time.time()
+        tokens, stamp = cache.get(key) or (float(burst), now)
+        tokens = min(float(burst), tokens + (now - stamp) * per_sec)
+        if tokens < 1.0:
+            cache.set(key, (tokens, now), timeout=_BUCKET_TTL_SEC)
+            return (1.0 - tokens) / per_sec
+        cache.set(key, (tokens - 1.0, now), timeout=_BUCKET_TTL_SEC)
+    return 0.0
+
+
+def _try_lock_any():
+    ADMISSION_LOCK_DIR.mkdir(parents=True, exist_ok=True)
+    for i in range(ADMISSION_MAX_CONCURRENT):
+        fh = open(ADMISSION_LOCK_DIR / f"request-{i}.lock", "a+")
+        try:
+            fcntl.flock(fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            fh.close()
+            continue
+        return fh
+    return None
+
+
+@contextmanager
+def concurrency_slot():
+    """Hold one of the host's ADMISSION_MAX_CONCURRENT request slots, or raise (no waiting)."""
+    busy = AdmissionRejected(
+        503,
+        BUSY_RETRY_AFTER_SEC,
+        "The server is busy with other transcriptions or summaries. Please try again shortly.",
+    )
+    if fcntl is None:
+        if not _fallback.acquire(blocking=False):
+            raise busy
+        try:
+            yield
+        finally:
+            _fallback.release()
+        return
+    fh = _try_lock_any()
+    if fh is None:
+        raise busy
+    try:
+        yield
+    finally:
+        fcntl.flock(fh, fcntl.LOCK_UN)
+        fh.close()
+
+
+def _json_rejection(request, exc: AdmissionRejected):
+    error = "Too many requests" if exc.status == 429 else "Server busy"
+    return JsonResponse({"error": error, "detail": str(exc)}, status=exc.status)
+
+
+def admission_controlled(
+    scope: str, methods=("GET", "POST"), reject=_json_rejection, concurrency: bool = True
+):
+    """
+    View decorator: hold a host concurrency slot while the view runs and spend a
+    token from the user's bucket; both checks fail fast instead of queueing.
+    concurrency=False only spends the token, for views that do no model work
+    themselves (a slot held while a large request body streams in would lock
+    the heavy endpoints out). reject(request, AdmissionRejected) builds the
+    error response (JSON by default) and gets Retry-After added. Other methods
+    pass through.
+    """
+    if scope not in RATES:
+        raise ValueError(f"Unknown admission scope {scope!r}.")
+
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if not ADMISSION_ENABLED or request.method not in methods:
+                return view(request, *args, **kwargs)
+            try:
+                # Slot first: a request turned away as busy does not spend a token.
+                with concurrency_slot() if concurrency else nullcontext():
+                    wait = take_token(scope, request.user.pk)
+                    if wait:
+                        raise AdmissionRejected(
+                            429,
+                            math.ceil(wait),
+                            f"Too many requests; try again in {math.ceil(wait)} seconds.",
+                        )
+                    _count(scope, "admitted")
+                    return view(request, *args, **kwargs)
+            except AdmissionRejected as exc:
+                outcome = "rate_limited" if exc.status == 429 else "busy"
+                _count(scope, outcome)
+                logger.info("Admission %s for %s (user %s)", outcome, scope, request.user.pk)
+                response = reject(request, exc)
+                response["Retry-After"] = str(exc.retry_after)
+                return response
+
+        return wrapper
+
+    return decorator
+
+
+def admission_status() -> dict:
+    """Diagnostics: configured limits and admitted / rejected counters per scope."""
+    keys = [f"admission:count:{s}:{o}" for s in SCOPES for o in OUTCOMES]
+    counts = cache.get_many(keys)
+    return {
+        "enabled": ADMISSION_ENABLED,
+        "max_concurrent": ADMISSION_MAX_CONCURRENT,
+        "scopes": {
+            scope: {
+                "rate_per_min": RATES[scope][0],
+                "burst": RATES[scope][1],
+                **{o: counts.get(f"admission:count:{scope}:{o}", 0) for o in OUTCOMES},
+            }
+            for scope in SCOPES
+        },
+    }
@@ -12,6 +12,9 @@ from typing import List, Tuple
 import numpy as np
 from sklearn.metrics.pairwise import cosine_similarity
 
+from .inference_slots import INFERENCE_REQUEST_MAX_WAIT_SEC, inference_slot
+from .model_registry import SingleFlight, registry
+
 KB_PATH = Path(__file__).resolve().parent / "data" / "coach_knowledge.md"
 # Medium embedding model used in A8 RAG notebook experiments
 EMBED_MODEL_NAME = "sentence-transformers/multi-qa-mpnet-base-cos-v1"
@@ -19,9 +22,9 @@ TOP_K = 5
 MIN_SCORE = 0.28
 MAX_QUERY_LEN = 500
 
-_model = None
 _chunk_texts: List[str] | None = None
 _chunk_embeddings: np.ndarray | None = None
+_index_flight = SingleFlight()
 
 
 def _split_long_paragraph(text: str, max_words: int = 220) -> List[str]:
@@ -67,28 +70,41 @@ def _load_chunk_texts() -> List[str]:
     return paragraphs
 
 
-def _get_model():
-    global _model
-    if _model is None:
-        from sentence_transformers import SentenceTransformer
+def _load_model():
+    from sentence_transformers import SentenceTransformer
 
-        _model = SentenceTransformer(EMBED_MODEL_NAME)
-    return _model
+    return SentenceTransformer(EMBED_MODEL_NAME)
 
 
-def _ensure_index() -> None:
+def _get_model():
+    return registry.get(("embedder", EMBED_MODEL_NAME), _load_model)
+
+
+def _build_index(max_wait: float | None = None) -> None:
     global _chunk_texts, _chunk_embeddings
     if _chunk_embeddings is not None and _chunk_texts is not None:
         return
-    _chunk_texts = _load_chunk_texts()
+    texts = _load_chunk_texts()
     model = _get_model()
-    emb = model.encode(
-        _chunk_texts,
-        normalize_embeddings=True,
-        show_progress_bar=False,
-        convert_to_numpy=True,
-    )
-    _chunk_embeddings = np.asarray(emb, dtype=np.float32)
+    with inference_slot("embed_kb", max_wait=max_wait):
+        emb = model.encode(
+            texts,
+            normalize_embeddings=True,
+            show_progress_bar=False,
+            convert_to_numpy=True,
+        )
+    # Publish texts and embeddings together so readers never see half an index.
+    _chunk_texts, _chunk_embeddings = texts, np.asarray(emb, dtype=np.float32)
+
+
+def _ensure_index(max_wait: float | None = None) -> None:
+    """
+    Embed the knowledge base once; concurrent first callers wait for one build.
+    max_wait bounds the wait for an inference slot (request-path callers).
+    """
+    if _chunk_embeddings is not None and _chunk_texts is not None:
+        return
+    _index_flight.do("kb_index", lambda: _build_index(max_wait))
 
 
 def search(query: str) -> Tuple[List[dict], str | None]:
@@ -103,16 +119,17 @@ def search(query: str) -> Tuple[List[dict], str | None]:
     if len(q) > MAX_QUERY_LEN:
         raise ValueError(f"Query must be at most {MAX_QUERY_LEN} characters.")
 
-    _ensure_index()
+    _ensure_index(max_wait=INFERENCE_REQUEST_MAX_WAIT_SEC)
     assert _chunk_texts is not None and _chunk_embeddings is not None
 
     model = _get_model()
-    q_emb = model.encode(
-        [q],
-        normalize_embeddings=True,
-        show_progress_bar=False,
-        convert_to_numpy=True,
-    )
+    with inference_slot("embed_query", max_wait=INFERENCE_REQUEST_MAX_WAIT_SEC):
+        q_emb = model.encode(
+            [q],
+            normalize_embeddings=True,
+            show_progress_bar=False,
+            convert_to_numpy=True,
+        )
     sims = cosine_similarity(q_emb, _chunk_embeddings)[0]
     order = np.argsort(-sims)[:TOP_K]
     results: List[dict] = []
@@ -3,7 +3,8 @@ from pathlib import Path
 from django import forms
 from django.core.exceptions import ValidationError
 
-from .transcribe import MAX_FILE_BYTES
+from .models import TranscriptionJob
+from .transcribe import DEFAULT_QUALITY, MAX_FILE_BYTES
 
 ALLOWED_AUDIO_EXTENSIONS = frozenset(
     {".wav", ".mp3", ".m4a", ".webm", ".ogg", ".flac", ".mp4", ".mpeg", ".mpga"}
@@ -34,7 +35,7 @@ class CoachSearchForm(forms.Form):
 
 
 class AudioTranscribeForm(forms.Form):
-    """Upload audio for local Whisper transcription (sync, size/duration capped)."""
+    """Upload audio for local Whisper transcription (queued, size/duration capped)."""
 
     title = forms.CharField(
         max_length=200,
@@ -46,6 +47,17 @@ class AudioTranscribeForm(forms.Form):
             }
         ),
     )
+    quality = forms.ChoiceField(
+        label="Quality",
+        choices=TranscriptionJob.Quality.choices,
+        initial=DEFAULT_QUALITY,
+        help_text="Fast skips alignment and speaker diarization and finishes several times sooner.",
+        widget=forms.Select(
+            attrs={
+                "class": "w-full rounded-lg border border-border bg-background px-3 py-2 text-sm text-foreground",
+            }
+        ),
+    )
     audio = forms.FileField(
         label="Audio file",
         widget=forms.ClearableFileInput(
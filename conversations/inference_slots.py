@@ -0,0 +1,152 @@
+"""
+Host-wide cap on concurrent model executions (WhisperX, BART, sentence-transformers).
+
+Every gunicorn worker, the transcribe worker and long-audio pool processes share
+INFERENCE_SLOTS lock files in INFERENCE_LOCK_DIR; `with inference_slot("asr"):`
+blocks until one is free (fcntl.flock, so a crashed process releases its slot).
+Inside a slot torch runs INFERENCE_THREADS_PER_SLOT intra-op threads, so
+slots x threads roughly equals the core count instead of every process
+grabbing all cores. Waits are logged and, when a StageTimer is passed, recorded
+as its "slot_wait" stage. Without fcntl (Windows) slots are per process.
+
+Background work (the transcribe worker, summarize_all) waits up to
+INFERENCE_MAX_WAIT_SEC for a slot. Callers serving a web request or a live
+socket pass max_wait=INFERENCE_REQUEST_MAX_WAIT_SEC instead, which must stay
+below gunicorn's --timeout so the caller can still answer 503 itself.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+INFERENCE_SLOTS = max(1, int(os.environ.get("INFERENCE_SLOTS", "2")))
+INFERENCE_THREADS_PER_SLOT = int(
+    os.environ.get("INFERENCE_THREADS_PER_SLOT")
+    or max(1, (os.cpu_count() or 1) // INFERENCE_SLOTS)
+)
+INFERENCE_MAX_WAIT_SEC = float(os.environ.get("INFERENCE_MAX_WAIT_SEC", "300"))
+INFERENCE_REQUEST_MAX_WAIT_SEC = float(os.environ.get("INFERENCE_REQUEST_MAX_WAIT_SEC", "20"))
+INFERENCE_LOCK_DIR = Path(
+    os.environ.get("INFERENCE_LOCK_DIR") or Path(tempfile.gettempdir()) / "echolabs-inference"
+)
+# Waits shorter than this are not logged.
+_LOG_WAIT_AFTER_SEC = 0.5
+
+_local = threading.local()
+_fallback = threading.BoundedSemaphore(INFERENCE_SLOTS)
+
+
+class InferenceBusyError(RuntimeError):
+    """No inference slot became free within max_wait (INFERENCE_MAX_WAIT_SEC by default)."""
+
+    def __init__(self, waited: float):
+        self.waited = waited
+        super().__init__(
+            f"The server is busy with other transcriptions or summaries (waited {waited:.0f}s). "
+            "Please try again in a minute."
+        )
+
+
+def _slot_path(i: int) -> Path:
+    return INFERENCE_LOCK_DIR / f"slot-{i}.lock"
+
+
+def _try_lock_any():
+    """Open file handle holding an exclusive lock on a free slot, or None."""
+    INFERENCE_LOCK_DIR.mkdir(parents=True, exist_ok=True)
+    for i in range(INFERENCE_SLOTS):
+        fh = open(_slot_path(i), "a+")
+        try:
+            fcntl.flock(fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            fh.close()
+            continue
+        return fh
+    return None
+
+
+def _set_threads() -> None:
+    torch = sys.modules.get("torch")
+    if torch is not None and torch.get_num_threads() != INFERENCE_THREADS_PER_SLOT:
+        torch.set_num_threads(INFERENCE_THREADS_PER_SLOT)
+
+
+@contextmanager
+def inference_slot(kind: str, timer=None, max_wait: float | None = None):
+    """
+    Hold one host-wide inference slot for the duration of the block.
+    Re-entrant per thread (a nested call does not take a second slot).
+    """
+    if getattr(_local, "depth", 0):
+        _local.depth += 1
+        try:
+            yield
+        finally:
+            _local.depth -= 1
+        return
+
+    max_wait = INFERENCE_MAX_WAIT_SEC if max_wait is None else max_wait
+    t0 = time.perf_counter()
+    fh = None
+    if fcntl is not None:
+        delay = 0.02
+        while (fh := _try_lock_any()) is None:
+            waited = time.perf_counter() - t0
+            if waited >= max_wait:
+                raise InferenceBusyError(waited)
+            time.sleep(min(delay, max_wait - waited))
+            delay = min(delay * 2, 0.5)
+    elif not _fallback.acquire(timeout=max_wait):
+        raise InferenceBusyError(time.perf_counter() - t0)
+    waited = time.perf_counter() - t0
+    if timer is not None:
+        entry = timer.stages.setdefault("slot_wait", {"seconds": 0.0})
+        entry["seconds"] = round(entry["seconds"] + waited, 4)
+    if waited >= _LOG_WAIT_AFTER_SEC:
+        logger.info("Inference slot for %s acquired after %.2fs wait", kind, waited)
+
+    _local.depth = 1
+    try:
+        _set_threads()
+        yield
+    finally:
+        _local.depth = 0
+        if fh is not None:
+            fcntl.flock(fh, fcntl.LOCK_UN)
+            fh.close()
+        else:
+            _fallback.release()
+
+
+def slot_status() -> dict:
+    """Diagnostics: configured slots/threads and how many slots are busy right now."""
+    busy = None
+    if fcntl is not None:
+        busy = 0
+        INFERENCE_LOCK_DIR.mkdir(parents=True, exist_ok=True)
+        for i in range(INFERENCE_SLOTS):
+            with open(_slot_path(i), "a+") as fh:
+                try:
+                    fcntl.flock(fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    busy += 1
+                else:
+                    fcntl.flock(fh, fcntl.LOCK_UN)
+    return {
+        "slots": INFERENCE_SLOTS,
+        "threads_per_slot": INFERENCE_THREADS_PER_SLOT,
+        "busy": busy,
+    }
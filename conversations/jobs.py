@@ -0,0 +1,380 @@
+"""
+Background transcription queue backed by the TranscriptionJob table.
+
+The upload view calls `enqueue_upload` (spool file + pending row) and returns
+right away; `manage.py transcribe_worker` loops over `claim_next_job` /
+`process_job`, so WhisperX never runs inside a gunicorn request.
+
+Progressive mode (WHISPER_DRAFT_MODEL set, e.g. "tiny"): process_job first saves
+a fast-tier draft from the small model, so the conversation page has text within
+seconds, then re-transcribes with WHISPER_MODEL and the job's tier and replaces
+the segments in place (Conversation.transcript_version goes draft -> final).
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import threading
+import uuid
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import speaker_bank, transcribe
+from .inference_slots import InferenceBusyError
+from .models import Conversation, TranscriptionJob, TranscriptSegment, UserProfile
+from .stage_timing import StageTimer
+
+logger = logging.getLogger(__name__)
+
+# A running job's worker renews its lease every JOB_LEASE / 4; a job whose lease
+# has expired belongs to a dead worker and is requeued by any polling worker.
+JOB_LEASE = timedelta(seconds=int(os.environ.get("TRANSCRIBE_LEASE_SEC", "120")))
+MAX_ATTEMPTS = 3
+# Consecutive uploads detected as the same language before it becomes the user's default.
+LANGUAGE_LEARN_AFTER = int(os.environ.get("WHISPER_LANGUAGE_LEARN_AFTER", "2"))
+# Every Nth upload of a user with a learned language still runs detection, so a
+# wrong (or outdated) preference is revised; 0 never re-checks.
+LANGUAGE_RECHECK_EVERY = int(os.environ.get("WHISPER_LANGUAGE_RECHECK_EVERY", "10"))
+DRAFT_MODEL = os.environ.get("WHISPER_DRAFT_MODEL", "").strip()
+
+
+def _spool_dir() -> Path:
+    spool = Path(settings.TRANSCRIBE_SPOOL_DIR)
+    spool.mkdir(parents=True, exist_ok=True)
+    return spool
+
+
+def enqueue_upload(
+    user, title: str, upload, quality: str = TranscriptionJob.Quality.FULL
+) -> TranscriptionJob:
+    """
+    Write the uploaded file to the spool directory and create a pending job.
+    The SHA-256 is computed in the same pass so the worker can hit the transcript
+    cache without re-reading the file. Uploads received by SpoolUploadHandler are
+    already on the spool disk and hashed, so they are just renamed into place.
+    """
+    suffix = Path(upload.name).suffix.lower() or ".wav"
+    dest = _spool_dir() / f"{uuid.uuid4().hex}{suffix}"
+    sha256 = getattr(upload, "sha256", None)
+    if sha256:
+        upload.file.flush()
+        os.replace(upload.temporary_file_path(), dest)
+    else:
+        digest = hashlib.sha256()
+        with open(dest, "wb") as fh:
+            for chunk in upload.chunks():
+                digest.update(chunk)
+                fh.write(chunk)
+        sha256 = digest.hexdigest()
+    return TranscriptionJob.objects.create(
+        user=user,
+        title=title[:200],
+        quality=quality,
+        audio_path=str(dest),
+        audio_sha256=sha256,
+    )
+
+
+def claim_next_job() -> TranscriptionJob | None:
+    """
+    Atomically move the oldest pending job to RUNNING and return it.
+    The conditional UPDATE makes this safe with several workers on one database.
+    """
+    while True:
+        job = (
+            TranscriptionJob.objects.filter(status=TranscriptionJob.Status.PENDING)
+            .order_by("created_at")
+            .first()
+        )
+        if job is None:
+            return None
+        now = timezone.now()
+        claimed = TranscriptionJob.objects.filter(
+            pk=job.pk, status=TranscriptionJob.Status.PENDING
+        ).update(
+            status=TranscriptionJob.Status.RUNNING,
+            started_at=now,
+            heartbeat_at=now,
+            attempts=job.attempts + 1,
+        )
+        if claimed:
+            job.refresh_from_db()
+            return job
+
+
+def renew_lease(job_id: int) -> bool:
+    """Mark a running job as alive; False once it is no longer RUNNING."""
+    return bool(
+        TranscriptionJob.objects.filter(pk=job_id, status=TranscriptionJob.Status.RUNNING).update(
+            heartbeat_at=timezone.now()
+        )
+    )
+
+
+class JobLease:
+    """Context manager: renew a job's lease from a background thread while it runs."""
+
+    def __init__(self, job_id: int, interval: float | None = None):
+        self.job_id = job_id
+        self.interval = interval if interval is not None else JOB_LEASE.total_seconds() / 4
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"job-lease-{job_id}", daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        try:
+            while not self._stop.wait(self.interval):
+                try:
+                    if not renew_lease(self.job_id):
+                        return
+                except Exception as e:  # e.g. SQLite busy; the next beat retries
+                    logger.warning("Could not renew lease of job %s: %s", self.job_id, e)
+        finally:
+            connection.close()
+
+
+def requeue_stale_jobs() -> int:
+    """Return RUNNING jobs whose lease expired (worker killed mid-run) to the queue."""
+    cutoff = timezone.now() - JOB_LEASE
+    stale = TranscriptionJob.objects.filter(status=TranscriptionJob.Status.RUNNING).filter(
+        Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, started_at__lt=cutoff)
+    )
+    requeued = stale.filter(attempts__lt=MAX_ATTEMPTS).update(
+        status=TranscriptionJob.Status.PENDING
+    )
+    stale.update(
+        status=TranscriptionJob.Status.FAILED,
+        error="Transcription worker stopped responding.",
+        finished_at=timezone.now(),
+    )
+    return requeued
+
+
+def preferred_language(user) -> str | None:
+    """The user's learned (or admin-set) transcription language, if any."""
+    lang = (
+        UserProfile.objects.filter(user=user).values_list("preferred_language", flat=True).first()
+    )
+    return lang or None
+
+
+def job_language(job: TranscriptionJob) -> str | None:
+    """
+    Language to pass to ASR for this job, or None to let WhisperX detect it.
+    The preference is used except on every LANGUAGE_RECHECK_EVERY-th upload of
+    the user, and while a re-check has detected a different language that is not
+    yet confirmed (or refuted) by the following uploads.
+    """
+    profile = UserProfile.objects.filter(user_id=job.user_id).first()
+    if profile is None or not profile.preferred_language:
+        return None
+    if profile.detected_language and profile.detected_language != profile.preferred_language:
+        return None
+    if LANGUAGE_RECHECK_EVERY > 0:
+        uploads = TranscriptionJob.objects.filter(user_id=job.user_id, pk__lte=job.pk).count()
+        if uploads % LANGUAGE_RECHECK_EVERY == 0:
+            return None
+    return profile.preferred_language
+
+
+def learn_language(user, timer_meta: dict) -> None:
+    """
+    Record the language WhisperX detected for this user. After LANGUAGE_LEARN_AFTER
+    consecutive uploads in the same language it becomes preferred_language,
+    replacing an earlier preference that re-checks (job_language) contradict.
+    Runs only when detection actually happened.
+    """
+    language = timer_meta.get("language")
+    if not language or not timer_meta.get("language_detected") or LANGUAGE_LEARN_AFTER <= 0:
+        return
+    profile, _ = UserProfile.objects.get_or_create(user=user)
+    if profile.detected_language == language:
+        profile.detected_streak += 1
+    else:
+        profile.detected_language = language
+        profile.detected_streak = 1
+    if profile.preferred_language != language and profile.detected_streak >= LANGUAGE_LEARN_AFTER:
+        if profile.preferred_language:
+            logger.info(
+                "Revised transcription language of user %s: %s -> %s",
+                user.pk,
+                profile.preferred_language,
+                language,
+            )
+        else:
+            logger.info("Learned transcription language %s for user %s", language, user.pk)
+        profile.preferred_language = language
+    profile.save()
+
+
+def segment_objects(conv: Conversation, segment_rows) -> list[TranscriptSegment]:
+    """Unsaved TranscriptSegments for transcribe.TranscriptRow (or (label, text)) rows."""
+    segments = []
+    for i, row in enumerate(segment_rows, start=1):
+        row = transcribe.TranscriptRow(*row)
+        segments.append(
+            TranscriptSegment(
+                conversation=conv,
+                text=row.text,
+                speaker_label=(row.speaker_label or "")[:64],
+                segment_order=i,
+                start_sec=row.start,
+                end_sec=row.end,
+                word_timings=row.word_timings,
+            )
+        )
+    return segments
+
+
+def _write_segments(conv: Conversation, segment_rows) -> None:
+    TranscriptSegment.objects.bulk_create(segment_objects(conv, segment_rows))
+
+
+def _save_conversation(
+    job: TranscriptionJob,
+    segment_rows,
+    duration_sec,
+    version: str = Conversation.TranscriptVersion.FINAL,
+) -> Conversation:
+    """
+    Create the job's conversation, or replace the segments of its draft in place
+    (notes attached to draft segments go with them). A draft leaves the job running.
+    """
+    duration = max(1, int(round(duration_sec))) if duration_sec else None
+    with transaction.atomic():
+        conv = job.conversation
+        if conv is None:
+            conv = Conversation.objects.create(
+                user=job.user,
+                title=job.title[:200],
+                recorded_at=job.created_at,
+                duration_seconds=duration,
+                transcript_version=version,
+            )
+        else:
+            conv.segments.all().delete()
+            conv.duration_seconds = duration
+            conv.transcript_version = version
+            conv.save(update_fields=["duration_seconds", "transcript_version"])
+        _write_segments(conv, segment_rows)
+        job.conversation = conv
+        if version == Conversation.TranscriptVersion.DRAFT:
+            job.save(update_fields=["conversation"])
+            return conv
+        job.status = TranscriptionJob.Status.DONE
+        job.error = ""
+        job.finished_at = timezone.now()
+        job.save(update_fields=["conversation", "status", "error", "finished_at"])
+    return conv
+
+
+def _draft_pass(job: TranscriptionJob, language: str | None) -> dict:
+    """Save a quick draft transcript; returns the draft StageTimer dict."""
+    timer = StageTimer()
+    try:
+        rows, duration = transcribe.transcribe_audio_file(
+            job.audio_path,
+            audio_sha256=job.audio_sha256 or None,
+            timer=timer,
+            quality=transcribe.QUALITY_FAST,
+            language=language,
+            model_name=DRAFT_MODEL,
+        )
+    except Exception as e:
+        # The full pass still runs (and reports its own error if the file is bad).
+        logger.warning("Draft pass for job %s failed: %s", job.pk, e)
+    else:
+        _save_conversation(job, rows, duration, version=Conversation.TranscriptVersion.DRAFT)
+    return timer.as_dict()
+
+
+def _fail(job: TranscriptionJob, message: str) -> None:
+    job.status = TranscriptionJob.Status.FAILED
+    job.error = message
+    job.finished_at = timezone.now()
+    job.save(update_fields=["status", "error", "finished_at"])
+
+
+def _requeue_busy(job: TranscriptionJob, error: InferenceBusyError) -> bool:
+    """
+    Put a job that found no free inference slot back in the queue (its spooled
+    audio stays); after MAX_ATTEMPTS tries it fails with the busy message.
+    """
+    if job.attempts >= MAX_ATTEMPTS:
+        _fail(job, str(error))
+        return False
+    logger.warning("Transcription job %s requeued: %s", job.pk, error)
+    job.status = TranscriptionJob.Status.PENDING
+    job.started_at = job.heartbeat_at = None
+    job.save(update_fields=["status", "started_at", "heartbeat_at"])
+    return True
+
+
+def process_job(job: TranscriptionJob) -> None:
+    """
+    Run WhisperX on a claimed job and store the result (or the error) on it,
+    renewing the job's lease meanwhile so other workers leave it alone.
+    """
+    with JobLease(job.pk):
+        _run_job(job)
+
+
+def _run_job(job: TranscriptionJob) -> None:
+    timer = StageTimer()
+    draft_timings = None
+    language = job_language(job)
+    requeued = False
+    try:
+        if DRAFT_MODEL and job.conversation_id is None:
+            draft_timings = _draft_pass(job, language)
+            # Reuse the draft's detected language so the large model skips detection.
+            language = language or draft_timings["meta"].get("language")
+        segment_rows, duration_sec = transcribe.transcribe_audio_file(
+            job.audio_path,
+            audio_sha256=job.audio_sha256 or None,
+            timer=timer,
+            quality=job.quality,
+            language=language,
+            speaker_bank=(
+                speaker_bank.SpeakerBank(job.user) if speaker_bank.SPEAKER_ID_ENABLED else None
+            ),
+        )
+    except ValueError as e:
+        _fail(job, str(e))
+    except InferenceBusyError as e:
+        requeued = _requeue_busy(job, e)
+    except Exception as e:
+        logger.exception("Transcription job %s failed", job.pk)
+        _fail(
+            job,
+            "Transcription failed. Check the file format, HF_TOKEN, and pyannote "
+            f"model access on Hugging Face. ({e})",
+        )
+    else:
+        _save_conversation(job, segment_rows, duration_sec)
+        if draft_timings is not None and "language_detected" in draft_timings["meta"]:
+            timer.meta["language_detected"] = draft_timings["meta"]["language_detected"]
+        learn_language(job.user, timer.meta)
+    finally:
+        job.stage_timings = timer.as_dict()
+        if draft_timings is not None:
+            job.stage_timings["draft"] = draft_timings
+        job.save(update_fields=["stage_timings"])
+        if not requeued:
+            try:
+                os.unlink(job.audio_path)
+            except OSError:
+                pass
@@ -0,0 +1,323 @@
+"""
+Long-recording mode for transcribe.py (WHISPER_LONG_AUDIO=1).
+
+Wearable sessions run 30–90 minutes, far past MAX_AUDIO_DURATION_SEC. Instead of
+loading the whole waveform, we:
+  1. stream the file once through ffmpeg to build a coarse energy profile,
+  2. cut it into ~WINDOW_SEC windows at the quietest point near each boundary,
+  3. transcribe windows in a process pool (each worker decodes only its window),
+  4. stitch segments back together and map each window's pyannote speakers onto
+     one set of labels by comparing speaker embeddings.
+Peak memory is one window per worker, independent of recording length.
+"""
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import os
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+import numpy as np
+
+from . import transcribe
+from .inference_slots import INFERENCE_SLOTS
+from .stage_timing import StageTimer
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = transcribe.SAMPLE_RATE
+FRAME_SEC = 0.1
+WINDOW_SEC = int(os.environ.get("WHISPER_LONG_WINDOW_SEC", "120"))
+# Cut points are searched within ±SEARCH_SEC/2 of each nominal window boundary.
+SEARCH_SEC = 10.0
+MAX_LONG_DURATION_SEC = int(os.environ.get("WHISPER_LONG_MAX_DURATION_SEC", str(3 * 3600)))
+SPEAKER_MATCH_THRESHOLD = float(os.environ.get("WHISPERX_SPEAKER_MATCH_THRESHOLD", "0.6"))
+
+
+def _worker_count() -> int:
+    """
+    Pool size, at most INFERENCE_SLOTS: every worker loads its own models, and
+    one without a slot would only wait (and fail the recording after
+    INFERENCE_MAX_WAIT_SEC).
+    """
+    configured = transcribe._env_int("WHISPER_LONG_WORKERS")
+    if not configured:
+        configured = max(1, min(4, (os.cpu_count() or 2) // 2))
+    return max(1, min(configured, INFERENCE_SLOTS))
+
+
+def energy_profile(path: str, frame_sec: float = FRAME_SEC) -> np.ndarray:
+    """RMS energy per frame, decoded in a single streaming pass (constant memory)."""
+    frame_bytes = int(SAMPLE_RATE * frame_sec) * 2
+    read_size = frame_bytes * 100
+    energies: list[float] = []
+    proc = subprocess.Popen(
+        transcribe._ffmpeg_pcm_cmd(path),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        pending = b""
+        while True:
+            chunk = proc.stdout.read(read_size)
+            if not chunk:
+                break
+            pending += chunk
+            usable = len(pending) - len(pending) % frame_bytes
+            if usable:
+                frames = np.frombuffer(pending[:usable], dtype=np.int16).reshape(-1, frame_bytes // 2)
+                rms = np.sqrt(np.mean((frames.astype(np.float32) / 32768.0) ** 2, axis=1))
+                energies.extend(rms.tolist())
+                pending = pending[usable:]
+    finally:
+        proc.stdout.close()
+        proc.wait()
+    if proc.returncode != 0:
+        raise ValueError("Could not decode the audio file. Try a different format.")
+    return np.asarray(energies, dtype=np.float32)
+
+
+def plan_windows(
+    energy: np.ndarray,
+    frame_sec: float = FRAME_SEC,
+    window_sec: float = WINDOW_SEC,
+    search_sec: float = SEARCH_SEC,
+) -> list[tuple[float, float]]:
+    """
+    Split [0, len(energy) * frame_sec) into consecutive windows of roughly window_sec,
+    moving each cut to the quietest frame within search_sec of the nominal boundary
+    so we do not slice through a word.
+    """
+    n = len(energy)
+    total = n * frame_sec
+    windows: list[tuple[float, float]] = []
+    start = 0.0
+    while total - start > window_sec + search_sec / 2:
+        nominal = start + window_sec
+        lo = max(int((nominal - search_sec / 2) / frame_sec), int(start / frame_sec) + 1)
+        hi = min(int((nominal + search_sec / 2) / frame_sec) + 1, n)
+        quietest = lo + int(np.argmin(energy[lo:hi]))
+        cut = round(quietest * frame_sec, 3)
+        windows.append((start, cut))
+        start = cut
+    windows.append((start, round(total, 3)))
+    return windows
+
+
+def _load_audio_window(path: str, start: float, end: float) -> np.ndarray:
+    """Decode only [start, end) of the file to 16 kHz mono float32 (like whisperx.load_audio)."""
+    out = subprocess.run(
+        transcribe._ffmpeg_pcm_cmd(path, start=start, duration=end - start),
+        capture_output=True,
+        check=True,
+    ).stdout
+    return np.frombuffer(out, dtype=np.int16).astype(np.float32) / 32768.0
+
+
+def _init_worker(threads: int) -> None:
+    try:
+        import torch
+
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+
+
+def _transcribe_window(
+    path: str,
+    start: float,
+    end: float,
+    hf_token: str | None,
+    quality: str,
+    language: str | None = None,
+    model_name: str | None = None,
+) -> dict:
+    """Process-pool task: run the full WhisperX pipeline on one window."""
+    timer = StageTimer()
+    with timer.stage("decode"):
+        audio = _load_audio_window(path, start, end)
+    segments, embeddings = transcribe._run_pipeline(
+        audio,
+        hf_token,
+        quality=quality,
+        return_embeddings=True,
+        timer=timer,
+        language=language,
+        model_name=model_name,
+    )
+    shifted = []
+    for seg in transcribe._compact_segments(segments):
+        seg["start"] = (seg["start"] or 0.0) + start
+        seg["end"] = (seg["end"] or 0.0) + start
+        for pair in seg["words"] or []:
+            pair[:] = [None if t is None else round(t + start, 3) for t in pair]
+        shifted.append(seg)
+    return {
+        "start": start,
+        "end": end,
+        "segments": shifted,
+        "embeddings": {k: np.asarray(v, dtype=np.float32) for k, v in embeddings.items()},
+        "stages": timer.stages,
+        "language": timer.meta.get("language"),
+        "language_detected": timer.meta.get("language_detected", False),
+    }
+
+
+def _unit(vec) -> np.ndarray:
+    v = np.asarray(vec, dtype=np.float32).ravel()
+    norm = float(np.linalg.norm(v))
+    return v / norm if norm else v
+
+
+def reconcile_speakers(
+    window_embeddings: list[dict[str, np.ndarray]],
+    threshold: float = SPEAKER_MATCH_THRESHOLD,
+) -> list[dict[str, int]]:
+    """
+    Map each window's local speaker ids to global speaker indexes.
+
+    Greedy cosine matching against running centroids of the speakers seen so far;
+    a local speaker below `threshold` for every centroid becomes a new global speaker.
+    Within one window two local speakers never map to the same global speaker.
+    """
+    sums: list[np.ndarray] = []
+    mappings: list[dict[str, int]] = []
+    for embeddings in window_embeddings:
+        local_vecs = {local: _unit(vec) for local, vec in sorted(embeddings.items())}
+        centroids = [_unit(s) for s in sums]
+        candidates = sorted(
+            (
+                (float(np.dot(vec, c)), local, g)
+                for local, vec in local_vecs.items()
+                for g, c in enumerate(centroids)
+            ),
+            key=lambda item: -item[0],
+        )
+        mapping: dict[str, int] = {}
+        taken: set[int] = set()
+        for score, local, g in candidates:
+            if score < threshold:
+                break
+            if local in mapping or g in taken:
+                continue
+            mapping[local] = g
+            taken.add(g)
+        for local, vec in local_vecs.items():
+            if local not in mapping:
+                sums.append(np.zeros_like(vec))
+                mapping[local] = len(sums) - 1
+            sums[mapping[local]] = sums[mapping[local]] + vec
+        mappings.append(mapping)
+    return mappings
+
+
+def global_speaker_embeddings(
+    window_results: list[dict], mappings: list[dict[str, int]]
+) -> dict[str, np.ndarray]:
+    """Mean unit embedding per global speaker id (SPEAKER_00, …) across windows."""
+    sums: dict[int, np.ndarray] = {}
+    for result, mapping in zip(window_results, mappings):
+        for local, vec in result["embeddings"].items():
+            if local in mapping:
+                g = mapping[local]
+                sums[g] = sums.get(g, 0) + _unit(vec)
+    return {f"SPEAKER_{g:02d}": _unit(total) for g, total in sums.items()}
+
+
+def stitch_windows(window_results: list[dict], mappings: list[dict[str, int]]) -> list[dict]:
+    """
+    Concatenate window segments in time order, relabelling speakers globally.
+    Speakers without an embedding (older WhisperX, very short turns) cannot be
+    matched across windows; each gets a new global id per window, so it is never
+    merged with a different window's speaker of the same local id.
+    """
+    next_id = max((g for mapping in mappings for g in mapping.values()), default=-1) + 1
+    unmatched: dict[tuple[int, str], int] = {}
+    stitched: list[dict] = []
+    for i, (result, mapping) in enumerate(zip(window_results, mappings)):
+        for seg in result["segments"]:
+            raw = seg.get("speaker")
+            if raw is not None:
+                g = mapping.get(raw)
+                if g is None:
+                    g = unmatched.setdefault((i, raw), next_id + len(unmatched))
+                seg = {**seg, "speaker": f"SPEAKER_{g:02d}"}
+            stitched.append(seg)
+    stitched.sort(key=lambda s: s["start"])
+    return stitched
+
+
+def transcribe_long_audio_file(
+    path: str,
+    timer: StageTimer | None = None,
+    quality: str = transcribe.QUALITY_FULL,
+    language: str | None = None,
+    model_name: str | None = None,
+) -> tuple[list[dict], float, dict[str, np.ndarray]]:
+    """
+    Chunked, parallel counterpart of the single-file pipeline.
+    Returns (stitched segment dicts with global speaker ids, decoded duration_seconds,
+    {global speaker id: mean embedding} for speaker identification).
+    Worker stage times are summed into `timer` (CPU-seconds across the pool).
+    """
+    timer = timer or StageTimer()
+    if quality == transcribe.QUALITY_FULL:
+        hf_token = transcribe._get_hf_token()
+    else:
+        hf_token = transcribe._optional_hf_token()
+    transcribe._require_ffmpeg()
+
+    with timer.stage("energy_profile"):
+        energy = energy_profile(path)
+    duration = len(energy) * FRAME_SEC
+    if duration > MAX_LONG_DURATION_SEC:
+        raise ValueError(
+            f"Audio is too long ({int(duration)}s). "
+            f"Maximum is {MAX_LONG_DURATION_SEC} seconds (~{MAX_LONG_DURATION_SEC // 60} minutes)."
+        )
+
+    windows = plan_windows(energy)
+    workers = min(_worker_count(), len(windows))
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    logger.info(
+        "Long-audio transcription: %.0fs in %d windows, %d workers x %d threads",
+        duration,
+        len(windows),
+        workers,
+        threads,
+    )
+    # spawn, not fork: torch/CTranslate2 thread pools do not survive fork reliably.
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=ctx,
+        initializer=_init_worker,
+        initargs=(threads,),
+    ) as pool, timer.stage("windows"):
+        results = list(
+            pool.map(
+                _transcribe_window,
+                repeat(path),
+                [w[0] for w in windows],
+                [w[1] for w in windows],
+                repeat(hf_token),
+                repeat(quality),
+                repeat(language),
+                repeat(model_name),
+            )
+        )
+
+    for r in results:
+        timer.merge(r["stages"])
+    timer.meta.update({"windows": len(windows), "workers": workers})
+    languages = [r["language"] for r in results if r.get("language")]
+    if languages:
+        # Windows detect independently when no language was given; report the majority.
+        timer.meta["language"] = max(set(languages), key=languages.count)
+        timer.meta["language_detected"] = any(r.get("language_detected") for r in results)
+    with timer.stage("reconcile_speakers"):
+        mappings = reconcile_speakers([r["embeddings"] for r in results])
+        segments = stitch_windows(results, mappings)
+    return segments, duration, global_speaker_embeddings(results, mappings)
@@ -0,0 +1,256 @@
+"""
+Load-test the summarizer: summaries per second at several client concurrencies,
+or a comparison of inference backends.
+
+    python manage.py benchmark_summarize --clients 1,4,16 --requests 32
+    python manage.py benchmark_summarize --backends eager,int8,onnx --transcripts calls.txt
+
+Each level runs N client threads calling summarize.summarize_transcript on a
+fixed set of transcripts until --requests summaries are done, and reports
+throughput, p50/p95 latency and the mean coalesced batch size. --compare runs
+every level with the request coalescer (summarize_batcher.py) off and on. The
+model is loaded by an untimed warm-up call first; the summary cache is not
+involved.
+
+--backends instead compares SUMMARIZER_BACKEND choices on the same transcripts:
+load time, p50/p95 latency one transcript at a time, summaries per second in one
+batched generate, and ROUGE-1/2/L F1 of each backend's summaries against the
+eager (fp32 PyTorch) summaries of the same inputs; eager always runs first as
+the reference, and each backend is evicted from the model registry before the
+next one loads. Use a representative set for the quality numbers: the
+transcripts are the longest stored conversations (--limit), a --transcripts
+file with one transcript per line, or the built-in samples (--samples).
+"""
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+
+from conversations import summarize
+from conversations.model_registry import registry
+from conversations.models import Conversation
+from conversations.stage_timing import percentile
+
+SAMPLE_TRANSCRIPTS = [
+    "Speaker A: Thanks for joining. I wanted to walk through the launch plan for next week. "
+    "Speaker B: Sure. Marketing has the announcement ready, but the pricing page still needs legal review. "
+    "Speaker A: Can you ping legal today so we have it signed off by Thursday? "
+    "Speaker B: Yes, I'll send it after this call and copy you.",
+    "Speaker A: How did the customer interviews go? Speaker B: Mostly positive. Three of five asked for "
+    "an export to spreadsheets and two complained the onboarding emails were too frequent. "
+    "Speaker A: Let's add export to the next sprint and cut the onboarding emails to two.",
+    "I practiced my presentation again today. I kept saying um when switching slides and I rushed "
+    "the conclusion. Next time I will pause after each section, slow down at the end, and rehearse "
+    "the opening twice before the meeting on Monday.",
+    "Speaker A: The build has been failing since yesterday. Speaker B: It's the new integration test, "
+    "it depends on a service that was rate limiting us. Speaker A: Can we mock it for now and open a "
+    "ticket to fix it properly? Speaker B: I'll do both before lunch.",
+]
+
+
+def _ngrams(tokens, n):
+    counts = {}
+    for i in range(len(tokens) - n + 1):
+        gram = tuple(tokens[i : i + n])
+        counts[gram] = counts.get(gram, 0) + 1
+    return counts
+
+
+def _f1(overlap, candidate_total, reference_total):
+    if not overlap or not candidate_total or not reference_total:
+        return 0.0
+    precision = overlap / candidate_total
+    recall = overlap / reference_total
+    return 2 * precision * recall / (precision + recall)
+
+
+def _lcs_length(a, b):
+    previous = [0] * (len(b) + 1)
+    for x in a:
+        current = [0]
+        for j, y in enumerate(b):
+            current.append(previous[j] + 1 if x == y else max(previous[j + 1], current[j]))
+        previous = current
+    return previous[-1]
+
+
+def rouge(candidate: str, reference: str) -> dict[str, float]:
+    """ROUGE-1, ROUGE-2 and ROUGE-L F1 on lowercased word tokens."""
+    cand = candidate.lower().split()
+    ref = reference.lower().split()
+    scores = {}
+    for n in (1, 2):
+        c, r = _ngrams(cand, n), _ngrams(ref, n)
+        overlap = sum(min(count, r.get(gram, 0)) for gram, count in c.items())
+        scores[f"rouge{n}"] = _f1(overlap, sum(c.values()), sum(r.values()))
+    scores["rougeL"] = _f1(_lcs_length(cand, ref), len(cand), len(ref))
+    return scores
+
+
+class Command(BaseCommand):
+    help = "Benchmark summarize throughput (summaries/s) at 1, 4 and 16 concurrent clients."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clients", default="1,4,16", help="Comma-separated concurrency levels.")
+        parser.add_argument("--requests", type=int, default=32, help="Summaries per level.")
+        parser.add_argument(
+            "--samples", action="store_true", help="Use built-in sample transcripts, not the database."
+        )
+        parser.add_argument(
+            "--transcripts", help="Text file with one transcript per line (instead of the database)."
+        )
+        parser.add_argument(
+            "--limit", type=int, default=16, help="Stored conversations to use (default: 16 longest)."
+        )
+        parser.add_argument(
+            "--compare",
+            action="store_true",
+            help="Run each level with request coalescing off and on.",
+        )
+        parser.add_argument(
+            "--backends",
+            help="Compare these summarizer backends (e.g. eager,int8,onnx) instead of load-testing.",
+        )
+        parser.add_argument(
+            "--repeat", type=int, default=3, help="Timed passes per backend with --backends (default: 3)."
+        )
+
+    def _transcripts(self, options):
+        if options["transcripts"]:
+            try:
+                with open(options["transcripts"], encoding="utf-8") as fh:
+                    texts = [line.strip() for line in fh if line.strip()]
+            except OSError as e:
+                raise CommandError(f"Cannot read {options['transcripts']}: {e}")
+            if not texts:
+                raise CommandError(f"{options['transcripts']} contains no transcripts.")
+            return texts
+        if not options["samples"]:
+            convs = (
+                Conversation.objects.annotate(n=Count("segments"))
+                .filter(n__gt=0)
+                .order_by("-n")[: options["limit"]]
+            )
+            texts = [t for t in (" ".join(c.transcript_parts()) for c in convs) if t.strip()]
+            if texts:
+                return texts
+            self.stdout.write("No stored transcripts; using built-in samples.")
+        return SAMPLE_TRANSCRIPTS
+
+    def _run_level(self, clients, total, texts):
+        latencies = []
+        batches_before = len(summarize._batcher.batch_sizes)
+
+        def one(i):
+            t0 = time.perf_counter()
+            summarize.summarize_transcript(texts[i % len(texts)])
+            latencies.append(time.perf_counter() - t0)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=clients) as pool:
+            list(pool.map(one, range(total)))
+        wall = time.perf_counter() - start
+        batches = summarize._batcher.batch_sizes[batches_before:]
+        return {
+            "wall": wall,
+            "rate": total / wall if wall else float("nan"),
+            "p50": statistics.median(latencies),
+            "p95": percentile(latencies, 95),
+            "batch": statistics.mean(batches) if batches else 1.0,
+        }
+
+    def _run_backend(self, backend, texts, repeat):
+        t0 = time.perf_counter()
+        summarize._get_model(backend)
+        load = time.perf_counter() - t0
+        summarize._generate(texts[:1], backend=backend)  # untimed warm-up
+
+        latencies = []
+        for _ in range(repeat):
+            for text in texts:
+                t0 = time.perf_counter()
+                summarize._generate([text], backend=backend)
+                latencies.append(time.perf_counter() - t0)
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            summaries = summarize._generate(texts, backend=backend)
+        batched = time.perf_counter() - t0
+        return {
+            "load": load,
+            "p50": statistics.median(latencies),
+            "p95": percentile(latencies, 95),
+            "rate": repeat * len(texts) / batched if batched else float("nan"),
+            "summaries": summaries,
+        }
+
+    def _compare_backends(self, names, texts, repeat):
+        backends = [b.strip().lower() for b in names.split(",") if b.strip()]
+        unknown = sorted(set(backends) - set(summarize.BACKENDS))
+        if unknown:
+            raise CommandError(
+                f"Unknown backend(s) {', '.join(unknown)}; choose from {', '.join(summarize.BACKENDS)}."
+            )
+        if repeat < 1:
+            raise CommandError("--repeat must be at least 1.")
+        backends = ["eager"] + [b for b in dict.fromkeys(backends) if b != "eager"]
+        self.stdout.write(
+            f"{'backend':>8}{'load s':>8}{'p50 s':>8}{'p95 s':>8}{'summaries/s':>13}"
+            f"{'ROUGE-1':>9}{'ROUGE-2':>9}{'ROUGE-L':>9}"
+        )
+        reference = None
+        for backend in backends:
+            try:
+                r = self._run_backend(backend, texts, repeat)
+            except ValueError as e:
+                if reference is None:
+                    raise CommandError(f"Reference backend failed: {e}")
+                self.stdout.write(self.style.WARNING(f"{backend:>8}  skipped: {e}"))
+                continue
+            finally:
+                registry.evict(("summarizer", summarize.MODEL_NAME, backend))
+            if reference is None:
+                reference = r["summaries"]
+            scores = [rouge(c, ref) for c, ref in zip(r["summaries"], reference)]
+            mean = {k: statistics.mean(s[k] for s in scores) for k in ("rouge1", "rouge2", "rougeL")}
+            self.stdout.write(
+                f"{backend:>8}{r['load']:>8.1f}{r['p50']:>8.2f}{r['p95']:>8.2f}{r['rate']:>13.2f}"
+                f"{mean['rouge1']:>9.3f}{mean['rouge2']:>9.3f}{mean['rougeL']:>9.3f}"
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Compared {len(texts)} transcripts x {repeat} passes; "
+                f"current SUMMARIZER_BACKEND={summarize.SUMMARIZER_BACKEND}."
+            )
+        )
+
+    def handle(self, *args, **options):
+        if options["backends"]:
+            self._compare_backends(options["backends"], self._transcripts(options), options["repeat"])
+            return
+        try:
+            levels = [int(c) for c in options["clients"].split(",") if c.strip()]
+        except ValueError:
+            raise CommandError("--clients must be comma-separated integers.")
+        if not levels or min(levels) < 1 or options["requests"] < 1:
+            raise CommandError("Need at least one client level >= 1 and --requests >= 1.")
+        texts = self._transcripts(options)
+        summarize.summarize_transcript(texts[0])  # warm-up: load the model
+
+        modes = (False, True) if options["compare"] else (summarize.COALESCE_ENABLED,)
+        default = summarize.COALESCE_ENABLED
+        self.stdout.write(
+            f"{'clients':>8}{'coalesce':>10}{'summaries/s':>13}{'p50 s':>8}{'p95 s':>8}{'avg batch':>11}"
+        )
+        try:
+            for clients in levels:
+                for coalesce in modes:
+                    summarize.COALESCE_ENABLED = coalesce
+                    r = self._run_level(clients, options["requests"], texts)
+                    self.stdout.write(
+                        f"{clients:>8}{'on' if coalesce else 'off':>10}{r['rate']:>13.2f}"
+                        f"{r['p50']:>8.2f}{r['p95']:>8.2f}{r['batch'] if coalesce else 1.0:>11.1f}"
+                    )
+        finally:
+            summarize.COALESCE_ENABLED = default
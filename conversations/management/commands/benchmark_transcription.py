@@ -0,0 +1,100 @@
+"""
+Compare WhisperX quality tiers on local recordings (transcript cache bypassed).
+
+    python manage.py benchmark_transcription clip1.m4a clip2.wav --tiers fast,aligned,full
+
+Reports wall seconds per audio-minute for each tier and the slowest stages.
+Models are loaded by an untimed warm-up run first, so numbers reflect steady
+state rather than first-request load time.
+
+    python manage.py benchmark_transcription clip.m4a --compare-trim
+
+runs every tier with and without silence trimming (WHISPER_TRIM_SILENCE) and
+reports the fraction of audio skipped and the speedup it bought.
+"""
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+
+from conversations import transcribe
+from conversations.stage_timing import StageTimer
+
+
+class Command(BaseCommand):
+    help = "Benchmark transcription tiers: wall time per audio-minute."
+
+    def add_arguments(self, parser):
+        parser.add_argument("files", nargs="+", help="Audio files to transcribe.")
+        parser.add_argument(
+            "--tiers",
+            default=",".join(transcribe.QUALITY_TIERS),
+            help="Comma-separated tiers to compare (default: all).",
+        )
+        parser.add_argument("--repeat", type=int, default=1, help="Timed runs per file and tier.")
+        parser.add_argument("--no-warmup", action="store_true", help="Include model load time.")
+        parser.add_argument(
+            "--compare-trim",
+            action="store_true",
+            help="Run each tier with silence trimming off and on and report the speedup.",
+        )
+
+    def handle(self, *args, **options):
+        tiers = [t.strip() for t in options["tiers"].split(",") if t.strip()]
+        unknown = set(tiers) - set(transcribe.QUALITY_TIERS)
+        if unknown:
+            raise CommandError(f"Unknown tier(s): {', '.join(sorted(unknown))}")
+
+        if not options["no_warmup"]:
+            for tier in tiers:
+                transcribe.transcribe_audio_file(options["files"][0], quality=tier, use_cache=False)
+
+        trims = (False, True) if options["compare_trim"] else (transcribe.TRIM_SILENCE,)
+        configs = [(tier, trim) for tier in tiers for trim in trims]
+        totals = {c: {"wall": 0.0, "audio": 0.0, "skipped": []} for c in configs}
+        stages = {c: defaultdict(float) for c in configs}
+        default_trim = transcribe.TRIM_SILENCE
+        try:
+            for tier, trim in configs:
+                transcribe.TRIM_SILENCE = trim
+                for path in options["files"]:
+                    for _ in range(options["repeat"]):
+                        timer = StageTimer()
+                        try:
+                            transcribe.transcribe_audio_file(
+                                path, timer=timer, quality=tier, use_cache=False
+                            )
+                        except ValueError as e:
+                            self.stderr.write(f"{path} [{tier}]: {e}")
+                            continue
+                        data = timer.as_dict()
+                        totals[(tier, trim)]["wall"] += data["total_seconds"]
+                        totals[(tier, trim)]["audio"] += data["meta"].get("audio_seconds") or 0.0
+                        if "vad_skipped_fraction" in data["meta"]:
+                            totals[(tier, trim)]["skipped"].append(data["meta"]["vad_skipped_fraction"])
+                        for name, stage in data["stages"].items():
+                            stages[(tier, trim)][name] += stage["seconds"]
+        finally:
+            transcribe.TRIM_SILENCE = default_trim
+
+        self.stdout.write(
+            f"{'tier':<10}{'trim':>6}{'audio min':>10}{'wall s':>10}{'s / audio min':>15}"
+            f"{'skipped':>9}  top stages"
+        )
+        for tier, trim in configs:
+            t = totals[(tier, trim)]
+            audio_min = t["audio"] / 60
+            per_min = t["wall"] / audio_min if audio_min else float("nan")
+            skipped = (
+                f"{100 * sum(t['skipped']) / len(t['skipped']):.0f}%" if t["skipped"] else "-"
+            )
+            top = sorted(stages[(tier, trim)].items(), key=lambda kv: -kv[1])[:3]
+            top_text = ", ".join(f"{name} {sec:.1f}s" for name, sec in top)
+            self.stdout.write(
+                f"{tier:<10}{'on' if trim else 'off':>6}{audio_min:>10.2f}{t['wall']:>10.1f}"
+                f"{per_min:>15.2f}{skipped:>9}  {top_text}"
+            )
+        if options["compare_trim"]:
+            for tier in tiers:
+                off, on = totals[(tier, False)]["wall"], totals[(tier, True)]["wall"]
+                if on:
+                    self.stdout.write(f"{tier}: silence trimming speedup {off / on:.2f}x")
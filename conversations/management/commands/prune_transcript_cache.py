@@ -0,0 +1,34 @@
+"""
+Evict old / excess rows from the WhisperX transcript cache (TranscriptCacheEntry).
+
+Defaults come from TRANSCRIPT_CACHE_MAX_AGE_DAYS and TRANSCRIPT_CACHE_MAX_MB; run
+nightly or after large batch imports.
+"""
+from django.core.management.base import BaseCommand
+
+from conversations import transcript_cache
+
+
+class Command(BaseCommand):
+    help = "Delete transcript cache entries by age and total size (least recently used first)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--max-age-days",
+            type=int,
+            default=transcript_cache.MAX_AGE_DAYS,
+            help=f"Drop entries unused for this many days (default: {transcript_cache.MAX_AGE_DAYS}).",
+        )
+        parser.add_argument(
+            "--max-mb",
+            type=int,
+            default=transcript_cache.MAX_MB,
+            help=f"Then trim to this total size in MB (default: {transcript_cache.MAX_MB}).",
+        )
+
+    def handle(self, *args, **options):
+        deleted = transcript_cache.prune(
+            max_age_days=options["max_age_days"],
+            max_mb=options["max_mb"],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Pruned {deleted} transcript cache entr{'y' if deleted == 1 else 'ies'}."))
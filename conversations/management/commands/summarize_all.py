@@ -0,0 +1,156 @@
+"""
+Precompute summaries for every conversation that lacks a current one.
+
+    python manage.py summarize_all
+    python manage.py summarize_all --user alice --since 2025-01-01 --batch-size 32
+
+"Current" means a ConversationSummary generated with today's summarizer
+configuration for the conversation's current segments (summary_cache.py);
+segment edits delete summaries, so those conversations are picked up again.
+Conversations whose segments change while their batch is generating are not
+written (the next run picks them up), and transcripts too short to summarize
+are reported but not stored. Each batch loads its transcripts with one
+prefetched segment query, is sorted by transcript length so padded inputs are
+similar in size, runs through summarize.summarize_many (batched generate) and
+is bulk-written before the next batch starts. Stopping the command loses at
+most one batch; rerunning it resumes with whatever is still missing. Suitable
+for a nightly cron job. Prints conversations and transcript words per second.
+"""
+import time
+from datetime import datetime, time as dt_time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Exists, F, OuterRef, Prefetch, Q
+from django.utils import timezone
+
+from conversations import summarize, summary_cache
+from conversations.models import Conversation, ConversationSummary, TranscriptSegment
+
+
+class Command(BaseCommand):
+    help = "Generate missing or stale conversation summaries in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", help="Only this user's conversations (username).")
+        parser.add_argument(
+            "--since",
+            help="Only conversations recorded on or after this date (YYYY-MM-DD).",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=32,
+            help="Conversations per generate-and-write batch (default: 32).",
+        )
+        parser.add_argument("--limit", type=int, help="Stop after this many conversations.")
+        parser.add_argument(
+            "--dry-run", action="store_true", help="Only report how many conversations need a summary."
+        )
+
+    def _pending(self, options):
+        has_text = TranscriptSegment.objects.filter(conversation=OuterRef("pk")).exclude(text="")
+        qs = Conversation.objects.filter(
+            Q(summary__isnull=True)
+            | ~Q(summary__config_key=summary_cache.config_key())
+            | ~Q(summary__segments_version=F("segments_version"))
+        ).filter(Exists(has_text))
+        if options["user"]:
+            try:
+                user = get_user_model().objects.get(username=options["user"])
+            except get_user_model().DoesNotExist:
+                raise CommandError(f"No user named {options['user']!r}.")
+            qs = qs.filter(user=user)
+        if options["since"]:
+            try:
+                day = datetime.strptime(options["since"], "%Y-%m-%d").date()
+            except ValueError:
+                raise CommandError("--since must be a date like 2025-01-31.")
+            qs = qs.filter(recorded_at__gte=timezone.make_aware(datetime.combine(day, dt_time.min)))
+        return qs.distinct().order_by("pk")
+
+    def handle(self, *args, **options):
+        if not summary_cache.ENABLED:
+            raise CommandError("SUMMARY_CACHE is disabled; summaries would not be stored.")
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+        ids = list(self._pending(options).values_list("pk", flat=True))
+        if options["limit"]:
+            ids = ids[: options["limit"]]
+        self.stdout.write(f"{len(ids)} conversation(s) need a summary.")
+        if options["dry_run"] or not ids:
+            return
+
+        segments = TranscriptSegment.objects.only(
+            "conversation_id", "text", "speaker_label", "segment_order"
+        ).order_by("segment_order")
+        config = summarize.model_config()
+        key = summary_cache.config_key(config)
+        done = words = skipped = changed = 0
+        start = time.perf_counter()
+        for i in range(0, len(ids), options["batch_size"]):
+            batch = list(
+                Conversation.objects.filter(pk__in=ids[i : i + options["batch_size"]]).prefetch_related(
+                    Prefetch("segments", queryset=segments)
+                )
+            )
+            items = [(c, c.transcript_parts()) for c in batch]
+            items = [(c, parts) for c, parts in items if parts]
+            items.sort(key=lambda item: sum(len(p) for p in item[1]))
+            t0 = time.perf_counter()
+            summaries = summarize.summarize_many([(" ".join(parts), parts) for _, parts in items])
+            per_item = (time.perf_counter() - t0) / max(1, len(items))
+            # Segments edited while this batch was generating: leave those for the next run.
+            versions = dict(
+                Conversation.objects.filter(pk__in=[c.pk for c, _ in items]).values_list(
+                    "pk", "segments_version"
+                )
+            )
+            results = []
+            for (conv, parts), summary in zip(items, summaries):
+                if summarize.is_placeholder(summary):
+                    skipped += 1
+                elif versions.get(conv.pk) != conv.segments_version:
+                    changed += 1
+                else:
+                    results.append((conv, parts, summary))
+            ConversationSummary.objects.bulk_create(
+                [
+                    ConversationSummary(
+                        conversation=conv,
+                        summary=summary,
+                        transcript_sha256=summary_cache.transcript_sha256(" ".join(parts)),
+                        config_key=key,
+                        model_config=config,
+                        segments_version=conv.segments_version,
+                        generation_seconds=round(per_item, 3),
+                    )
+                    for conv, parts, summary in results
+                ],
+                update_conflicts=True,
+                unique_fields=["conversation"],
+                update_fields=[
+                    "summary",
+                    "transcript_sha256",
+                    "config_key",
+                    "model_config",
+                    "segments_version",
+                    "generation_seconds",
+                ],
+            )
+            done += len(results)
+            words += sum(len(" ".join(parts).split()) for _, parts, _ in results)
+            elapsed = max(time.perf_counter() - start, 1e-6)
+            self.stdout.write(f"  {done}/{len(ids)} summarized ({done / elapsed:.2f} conversations/s)")
+
+        elapsed = max(time.perf_counter() - start, 1e-6)
+        if skipped:
+            self.stdout.write(f"Skipped {skipped} conversation(s) too short to summarize.")
+        if changed:
+            self.stdout.write(f"Skipped {changed} conversation(s) edited during the run; rerun to pick them up.")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Summarized {done} conversation(s) in {elapsed:.1f}s: "
+                f"{done / elapsed:.2f} conversations/s, {words / elapsed:.0f} transcript words/s."
+            )
+        )
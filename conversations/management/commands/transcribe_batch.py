@@ -0,0 +1,238 @@
+"""
+Transcribe a directory (or manifest) of recordings into conversations for one user.
+
+    python manage.py transcribe_batch /data/device-sync --user alice
+    python manage.py transcribe_batch files.csv --user alice --quality fast --workers 4
+
+A manifest is a text file with one audio path per line, or a CSV with a `path`
+column and optional `title` column (relative paths resolve against the manifest).
+
+Files run on a thread pool inside this one process, so every worker shares the
+models in conversations/model_registry.py (loaded once up front). The shared
+WhisperX pipelines are not thread-safe, so ASR and diarization calls take the
+model's instance lock before an inference slot (a thread queued behind the
+model holds no slot, so web requests and the transcribe worker keep theirs):
+threads overlap decoding, silence trimming and alignment, while WhisperX batches each file's speech chunks (WHISPERX_BATCH_SIZE). Finished
+transcripts are bulk-inserted every --commit-every files with their source path
+on the conversation, and the checkpoint file is updated after each insert;
+rerunning the same command after a crash skips files already stored, even if
+the checkpoint write was lost. At the end it prints audio minutes processed per
+wall minute.
+"""
+import csv
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone as dt_timezone
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from conversations import jobs, speaker_bank, transcribe, warmup
+from conversations.forms import ALLOWED_AUDIO_EXTENSIONS
+from conversations.models import Conversation, TranscriptSegment
+
+
+def _discover(source: Path) -> list[tuple[str, str]]:
+    """(absolute path, title) pairs from a directory tree or a manifest file."""
+    if source.is_dir():
+        return [
+            (str(p.resolve()), p.stem)
+            for p in sorted(source.rglob("*"))
+            if p.is_file() and p.suffix.lower() in ALLOWED_AUDIO_EXTENSIONS
+        ]
+    base = source.parent
+    items = []
+    with open(source, newline="", encoding="utf-8") as fh:
+        if source.suffix.lower() == ".csv":
+            rows = ((r.get("path") or "", r.get("title") or "") for r in csv.DictReader(fh))
+        else:
+            rows = ((line.strip(), "") for line in fh if not line.lstrip().startswith("#"))
+        for path, title in rows:
+            if not path.strip():
+                continue
+            p = Path(path.strip())
+            p = p if p.is_absolute() else base / p
+            items.append((str(p.resolve()), title.strip() or p.stem))
+    return items
+
+
+def _load_checkpoint(path: Path) -> dict:
+    if path.is_file():
+        with open(path, encoding="utf-8") as fh:
+            data = json.load(fh)
+        data.setdefault("done", {})
+        data.setdefault("failed", {})
+        return data
+    return {"done": {}, "failed": {}}
+
+
+def _save_checkpoint(path: Path, data: dict) -> None:
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(data, fh, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+
+class Command(BaseCommand):
+    help = "Transcribe every recording in a directory or manifest (resumable)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("source", help="Directory to walk, or a .txt/.csv manifest.")
+        parser.add_argument("--user", required=True, help="Username that will own the conversations.")
+        parser.add_argument(
+            "--quality",
+            default=transcribe.DEFAULT_QUALITY,
+            choices=transcribe.QUALITY_TIERS,
+            help=f"Transcription tier (default: {transcribe.DEFAULT_QUALITY}).",
+        )
+        parser.add_argument("--workers", type=int, default=2, help="Files transcribed concurrently (default: 2).")
+        parser.add_argument(
+            "--commit-every",
+            type=int,
+            default=10,
+            help="Bulk-insert and checkpoint after this many finished files (default: 10).",
+        )
+        parser.add_argument(
+            "--checkpoint",
+            help="Progress file (default: .transcribe_batch.json next to the source).",
+        )
+        parser.add_argument(
+            "--retry-failed",
+            action="store_true",
+            help="Retry files that failed in an earlier run instead of skipping them.",
+        )
+
+    def handle(self, *args, **options):
+        source = Path(options["source"]).expanduser()
+        if not source.exists():
+            raise CommandError(f"{source} does not exist.")
+        try:
+            user = get_user_model().objects.get(username=options["user"])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"No user named {options['user']!r}.")
+        if options["workers"] < 1 or options["commit_every"] < 1:
+            raise CommandError("--workers and --commit-every must be at least 1.")
+
+        checkpoint_path = Path(
+            options["checkpoint"]
+            or (
+                source / ".transcribe_batch.json"
+                if source.is_dir()
+                else source.with_suffix(".transcribe_batch.json")
+            )
+        )
+        checkpoint = _load_checkpoint(checkpoint_path)
+        items = _discover(source)
+        # Conversations inserted by a run that died before saving its checkpoint.
+        stored = dict(
+            Conversation.objects.filter(user=user)
+            .exclude(source_path="")
+            .values_list("source_path", "pk")
+        )
+        recovered = {
+            p: stored[p[:500]] for p, _ in items if p[:500] in stored and p not in checkpoint["done"]
+        }
+        if recovered:
+            checkpoint["done"].update(recovered)
+            for path in recovered:
+                checkpoint["failed"].pop(path, None)
+            _save_checkpoint(checkpoint_path, checkpoint)
+        skip = set(checkpoint["done"])
+        if not options["retry_failed"]:
+            skip |= set(checkpoint["failed"])
+        todo = [(p, t) for p, t in items if p not in skip]
+        self.stdout.write(
+            f"{len(items)} file(s) found, {len(items) - len(todo)} already handled, {len(todo)} to transcribe."
+        )
+        if not todo:
+            return
+
+        quality = options["quality"]
+        language = jobs.preferred_language(user)
+        # One bank shared by all threads so new speakers are not added twice.
+        bank = speaker_bank.SpeakerBank(user) if speaker_bank.SPEAKER_ID_ENABLED else None
+        # Load models once before the pool starts so threads share them.
+        targets = {"fast": ["asr"], "aligned": ["asr", "align"]}.get(quality, list(warmup.WORKER_TARGETS))
+        warmup.warm_up(targets)
+
+        started = time.perf_counter()
+        audio_seconds = 0.0
+        pending: list[tuple[str, str, list, float]] = []
+        n_done = n_failed = 0
+
+        def flush():
+            nonlocal pending
+            if not pending:
+                return
+            created = self._bulk_insert(user, pending)
+            for (path, *_), conv in zip(pending, created):
+                checkpoint["done"][path] = conv.pk
+                checkpoint["failed"].pop(path, None)
+            _save_checkpoint(checkpoint_path, checkpoint)
+            pending = []
+
+        def transcribe_one(path):
+            try:
+                return transcribe.transcribe_audio_file(
+                    path, quality=quality, language=language, speaker_bank=bank
+                )
+            finally:
+                # Transcript cache and speaker bank queries open a connection per thread.
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=options["workers"]) as pool:
+            futures = {pool.submit(transcribe_one, path): (path, title) for path, title in todo}
+            for future in as_completed(futures):
+                path, title = futures[future]
+                try:
+                    rows, duration = future.result()
+                except Exception as e:
+                    n_failed += 1
+                    checkpoint["failed"][path] = str(e)
+                    _save_checkpoint(checkpoint_path, checkpoint)
+                    self.stderr.write(f"FAILED {path}: {e}")
+                    continue
+                n_done += 1
+                audio_seconds += duration or 0.0
+                pending.append((path, title, rows, duration))
+                self.stdout.write(f"[{n_done + n_failed}/{len(todo)}] {path} ({duration:.0f}s audio)")
+                if len(pending) >= options["commit_every"]:
+                    flush()
+        flush()
+
+        wall_min = (time.perf_counter() - started) / 60
+        audio_min = audio_seconds / 60
+        rate = audio_min / wall_min if wall_min else 0.0
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Transcribed {n_done} file(s), {n_failed} failed: {audio_min:.1f} audio min in "
+                f"{wall_min:.1f} wall min ({rate:.2f} audio min / wall min)."
+            )
+        )
+
+    @staticmethod
+    def _bulk_insert(user, finished) -> list[Conversation]:
+        conversations = [
+            Conversation(
+                user=user,
+                title=title[:200],
+                recorded_at=datetime.fromtimestamp(os.path.getmtime(path), tz=dt_timezone.utc),
+                duration_seconds=max(1, int(round(duration))) if duration else None,
+                source_path=path[:500],
+            )
+            for path, title, _, duration in finished
+        ]
+        with transaction.atomic():
+            created = Conversation.objects.bulk_create(conversations)
+            TranscriptSegment.objects.bulk_create(
+                [
+                    segment
+                    for conv, (_, _, rows, _) in zip(created, finished)
+                    for segment in jobs.segment_objects(conv, rows)
+                ]
+            )
+        return created
@@ -0,0 +1,59 @@
+"""
+Aggregate stored WhisperX stage timings (TranscriptionJob.stage_timings).
+
+Prints p50 / p95 seconds per stage for each (model, device) pair, plus the
+real-time factor (wall seconds per audio second), e.g.:
+    python manage.py transcribe_stats --days 7
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from conversations.models import TranscriptionJob
+from conversations.stage_timing import percentile
+
+
+class Command(BaseCommand):
+    help = "Report p50/p95 transcription stage timings per model and device."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=30,
+            help="Only include jobs finished in the last N days (default: 30).",
+        )
+
+    def handle(self, *args, **options):
+        since = timezone.now() - timedelta(days=options["days"])
+        jobs = TranscriptionJob.objects.filter(
+            status=TranscriptionJob.Status.DONE, finished_at__gte=since
+        ).values_list("stage_timings", flat=True)
+
+        by_group: dict = defaultdict(lambda: defaultdict(list))
+        for timings in jobs:
+            meta = (timings or {}).get("meta") or {}
+            if meta.get("cache_hit"):
+                continue
+            group = (meta.get("model", "?"), meta.get("device", "?"))
+            for stage, data in ((timings or {}).get("stages") or {}).items():
+                by_group[group][stage].append(data.get("seconds", 0.0))
+            audio = meta.get("audio_seconds")
+            total = timings.get("total_seconds")
+            if audio and total:
+                by_group[group]["(total / audio s)"].append(total / audio)
+
+        if not by_group:
+            self.stdout.write("No timed transcription jobs in that window.")
+            return
+        for (model, device), stages in sorted(by_group.items()):
+            runs = max(len(v) for v in stages.values())
+            self.stdout.write(self.style.MIGRATE_HEADING(f"{model} on {device} ({runs} runs)"))
+            self.stdout.write(f"  {'stage':<22}{'n':>5}{'p50':>10}{'p95':>10}")
+            for stage, values in sorted(stages.items()):
+                self.stdout.write(
+                    f"  {stage:<22}{len(values):>5}"
+                    f"{percentile(values, 50):>10.2f}{percentile(values, 95):>10.2f}"
+                )
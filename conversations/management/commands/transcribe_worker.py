@@ -0,0 +1,57 @@
+"""
+Process queued audio uploads (TranscriptionJob rows) outside the web workers.
+
+Run alongside gunicorn, e.g. the `worker:` line in the Procfile:
+    python manage.py transcribe_worker
+Use --once to drain the queue and exit (handy for cron or local testing).
+While polling, jobs whose worker stopped renewing their lease (jobs.JOB_LEASE)
+are put back in the queue, so several workers can share one database.
+With ECHOLABS_WARMUP set, WhisperX models are loaded before the first job.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from conversations import jobs, warmup
+
+
+class Command(BaseCommand):
+    help = "Run queued WhisperX transcription jobs (loops until interrupted)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Process every pending job, then exit instead of polling.",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=2.0,
+            help="Seconds to sleep when the queue is empty (default: 2).",
+        )
+
+    def handle(self, *args, **options):
+        warmup.warm_up_from_env(default=warmup.WORKER_TARGETS, only=warmup.WORKER_TARGETS)
+        processed = 0
+        next_requeue = 0.0
+        try:
+            while True:
+                if time.monotonic() >= next_requeue:
+                    requeued = jobs.requeue_stale_jobs()
+                    if requeued:
+                        self.stdout.write(f"Requeued {requeued} job(s) with an expired lease.")
+                    next_requeue = time.monotonic() + jobs.JOB_LEASE.total_seconds() / 2
+                job = jobs.claim_next_job()
+                if job is None:
+                    if options["once"]:
+                        break
+                    time.sleep(options["poll_interval"])
+                    continue
+                self.stdout.write(f"Job {job.pk}: transcribing “{job.title}”…")
+                jobs.process_job(job)
+                processed += 1
+                self.stdout.write(f"Job {job.pk}: {job.status}")
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} job(s)."))
@@ -0,0 +1,49 @@
+"""
+Load ML models (and the coach knowledge-base index) ahead of traffic.
+
+    python manage.py warmup                       # coach,summarizer
+    python manage.py warmup --targets asr,align   # WhisperX models
+    python manage.py warmup --targets all
+
+Useful as a release-phase smoke test that weights download and load; the
+models themselves live in this process only. To keep them loaded for the web
+workers set ECHOLABS_WARMUP and start gunicorn with --preload (see
+conversations/warmup.py).
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from conversations import warmup
+
+
+class Command(BaseCommand):
+    help = "Load configured ML models and report how long each took."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--targets",
+            default="1",
+            help=f"Comma list of {', '.join(warmup.ALL_TARGETS)}, or 'all' (default: coach,summarizer).",
+        )
+        parser.add_argument(
+            "--strict",
+            action="store_true",
+            help="Exit with an error if any target fails to load.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            targets = warmup.parse_targets(options["targets"])
+        except ValueError as e:
+            raise CommandError(str(e))
+        report = warmup.warm_up(targets)
+        failed = []
+        for name, result in report.items():
+            line = f"{name:<11} {result['status']:<8} {result['seconds']:>7.2f}s"
+            if result["status"] == "error":
+                failed.append(name)
+                self.stdout.write(self.style.WARNING(f"{line}  {result['error']}"))
+            else:
+                self.stdout.write(line)
+        if failed and options["strict"]:
+            raise CommandError(f"Warm-up failed for: {', '.join(failed)}")
+        self.stdout.write(self.style.SUCCESS(f"Warmed {len(report) - len(failed)}/{len(report)} target(s)."))
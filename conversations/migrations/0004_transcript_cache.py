@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('conversations', '0003_transcriptionjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TranscriptCacheEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cache_key', models.CharField(max_length=64, unique=True)),
+                ('audio_sha256', models.CharField(db_index=True, max_length=64)),
+                ('model_config', models.JSONField(default=dict)),
+                ('segments', models.JSONField(default=list, help_text='List of {speaker, text, start, end} dicts as returned by the pipeline.')),
+                ('duration_seconds', models.FloatField(default=0.0)),
+                ('size_bytes', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_used_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'ordering': ['-last_used_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='transcriptionjob',
+            name='audio_sha256',
+            field=models.CharField(blank=True, default='', help_text='Hash computed while spooling; key into the transcript cache.', max_length=64),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('conversations', '0004_transcript_cache'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transcriptionjob',
+            name='stage_timings',
+            field=models.JSONField(blank=True, default=dict, help_text='StageTimer output: per-stage seconds / peak memory plus model + device.'),
+        ),
+    ]
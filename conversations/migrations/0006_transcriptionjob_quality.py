@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('conversations', '0005_transcriptionjob_stage_timings'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transcriptionjob',
+            name='quality',
+            field=models.CharField(choices=[('fast', 'Fast — text only'), ('aligned', 'Aligned — word timings, no speakers'), ('full', 'Full — speaker labels (needs HF_TOKEN)')], default='full', max_length=16),
+        ),
+    ]
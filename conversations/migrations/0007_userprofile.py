@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:13
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('conversations', '0006_transcriptionjob_quality'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('preferred_language', models.CharField(blank=True, default='', help_text='ISO code passed to WhisperX (e.g. en). Clear it to re-learn from the next uploads.', max_length=16)),
+                ('detected_language', models.CharField(blank=True, default='', help_text='Language WhisperX detected on the most recent uploads.', max_length=16)),
+                ('detected_streak', models.PositiveSmallIntegerField(default=0, help_text='Consecutive uploads detected as detected_language.')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='profile', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('conversations', '0007_userprofile'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversation',
+            name='transcript_version',
+            field=models.CharField(choices=[('draft', 'Draft'), ('final', 'Final')], default='final', help_text='Draft = quick pass from WHISPER_DRAFT_MODEL; replaced in place by the full pass.', max_length=16),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:18
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('conversations', '0008_conversation_transcript_version'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='KnownSpeaker',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=64)),
+                ('embedding', models.BinaryField()),
+                ('dim', models.PositiveIntegerField()),
+                ('observations', models.PositiveIntegerField(default=1)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_seen_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='known_speakers', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['user', 'name'],
+                'constraints': [models.UniqueConstraint(fields=('user', 'name'), name='unique_known_speaker_name_per_user')],
+            },
+        ),
+    ]
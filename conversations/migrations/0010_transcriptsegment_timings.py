@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('conversations', '0009_knownspeaker'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transcriptsegment',
+            name='end_sec',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='transcriptsegment',
+            name='start_sec',
+            field=models.FloatField(blank=True, help_text='Segment start in the recording (seconds); empty for typed transcripts.', null=True),
+        ),
+        migrations.AddField(
+            model_name='transcriptsegment',
+            name='word_timings',
+            field=models.BinaryField(blank=True, help_text='Packed per-word (start_ms, end_ms) pairs from alignment; see word_timings.py.', null=True),
+        ),
+    ]
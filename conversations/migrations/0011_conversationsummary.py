@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('conversations', '0010_transcriptsegment_timings'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConversationSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('summary', models.TextField()),
+                ('transcript_sha256', models.CharField(max_length=64)),
+                ('config_key', models.CharField(help_text='SHA-256 of the summarizer configuration (model, lengths, beams).', max_length=64)),
+                ('model_config', models.JSONField(default=dict)),
+                ('generation_seconds', models.FloatField(default=0.0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('conversation', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='summary', to='conversations.conversation')),
+            ],
+            options={
+                'verbose_name_plural': 'conversation summaries',
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('conversations', '0011_conversationsummary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transcriptionjob',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, help_text='Refreshed by the worker running the job; an expired lease means it died.', null=True),
+        ),
+    ]
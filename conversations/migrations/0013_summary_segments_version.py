@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('conversations', '0012_transcriptionjob_heartbeat_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversation',
+            name='segments_version',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Bumped whenever a segment is saved or deleted; stored summaries must match it.'),
+        ),
+        migrations.AddField(
+            model_name='conversationsummary',
+            name='segments_version',
+            field=models.PositiveIntegerField(default=0, help_text='Conversation.segments_version read before the transcript was built.'),
+        ),
+    ]
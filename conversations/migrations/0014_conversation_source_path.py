@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('conversations', '0013_summary_segments_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversation',
+            name='source_path',
+            field=models.CharField(blank=True, default='', help_text='Original file of a batch-imported recording (transcribe_batch); used to resume.', max_length=500),
+        ),
+    ]
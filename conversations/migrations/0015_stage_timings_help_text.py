@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('conversations', '0014_conversation_source_path'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='transcriptionjob',
+            name='stage_timings',
+            field=models.JSONField(blank=True, default=dict, help_text='StageTimer output: per-stage seconds / resident memory plus model + device.'),
+        ),
+    ]
@@ -0,0 +1,267 @@
+"""
+Process-wide registry for the ML models this app loads lazily.
+
+WhisperX ASR / alignment / diarization (transcribe.py), the BART summarizer
+(summarize.py) and the sentence-transformers embedder (coach_search.py) all go
+through `registry.get(key, loader)`. The registry remembers an approximate
+resident size per model and evicts least recently used models once the total
+exceeds MODEL_MEMORY_BUDGET_MB, so a 2-worker host does not keep every model
+loaded forever. `registry.residency()` backs the /api/models/ diagnostics view.
+
+Loads are single-flight: when several threads miss on the same key at once
+(first requests after a deploy), one runs the loader and the rest wait for its
+result instead of each loading another copy. `SingleFlight` is also used for
+other expensive one-time builds such as the coach-search index.
+
+Cached models are shared by every thread of the process. Objects that keep
+per-call state (WhisperX's FasterWhisperPipeline swaps its tokenizer on every
+transcribe) must be called under `instance_lock(model)`.
+"""
+from __future__ import annotations
+
+import gc
+import logging
+import os
+import sys
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+logger = logging.getLogger(__name__)
+
+# 0 = no budget (never evict for size).
+MODEL_MEMORY_BUDGET_MB = int(os.environ.get("MODEL_MEMORY_BUDGET_MB", "4096"))
+
+
+@dataclass
+class _Entry:
+    value: object
+    size_mb: float
+    group: str
+    load_seconds: float
+    loaded_at: float = field(default_factory=time.time)
+    last_used: float = field(default_factory=time.time)
+    hits: int = 0
+
+
+def _torch_module_bytes(obj) -> int:
+    torch = sys.modules.get("torch")
+    if torch is None or not isinstance(obj, torch.nn.Module):
+        return 0
+    total = sum(p.numel() * p.element_size() for p in obj.parameters())
+    total += sum(b.numel() * b.element_size() for b in obj.buffers())
+    return total
+
+
+def estimate_size_mb(value, _depth: int = 0) -> float:
+    """
+    Best-effort resident size: torch parameters/buffers and numpy arrays found in
+    the value, its tuple/list/dict members and (one level down) its attributes.
+    Returns 0 when nothing measurable is found; callers pass a size hint instead.
+    """
+    if _depth > 2 or value is None:
+        return 0.0
+    nbytes = _torch_module_bytes(value)
+    if nbytes:
+        return nbytes / (1024 * 1024)
+    if hasattr(value, "nbytes") and isinstance(getattr(value, "nbytes"), int):
+        return value.nbytes / (1024 * 1024)
+    if isinstance(value, (tuple, list)):
+        return sum(estimate_size_mb(v, _depth + 1) for v in value)
+    if isinstance(value, dict):
+        return sum(estimate_size_mb(v, _depth + 1) for v in value.values())
+    if _depth < 2 and hasattr(value, "__dict__"):
+        return sum(estimate_size_mb(v, _depth + 1) for v in vars(value).values())
+    return 0.0
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    """
+    At most one in-flight call per key: concurrent `do(key, fn)` callers wait for
+    the leader's result (or exception) instead of running fn again.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: dict = {}
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+
+_instance_locks: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+_instance_locks_guard = threading.Lock()
+
+
+def instance_lock(model) -> threading.Lock:
+    """The lock serializing calls into one shared, non-thread-safe model object."""
+    with _instance_locks_guard:
+        lock = _instance_locks.get(model)
+        if lock is None:
+            lock = _instance_locks[model] = threading.Lock()
+        return lock
+
+
+def _release_memory() -> None:
+    gc.collect()
+    torch = sys.modules.get("torch")
+    if torch is not None and torch.cuda.is_available():
+        torch.cuda.empty_cache()
+
+
+class ModelRegistry:
+    def __init__(self, budget_mb: float = MODEL_MEMORY_BUDGET_MB):
+        self.budget_mb = budget_mb
+        self._entries: OrderedDict[tuple, _Entry] = OrderedDict()
+        self._lock = threading.RLock()
+        self._flight = SingleFlight()
+
+    def get(
+        self,
+        key: tuple,
+        loader,
+        *,
+        size_mb: float | None = None,
+        group: str | None = None,
+        group_limit: int | None = None,
+    ):
+        """
+        Return the cached model for `key`, calling `loader()` on a miss.
+
+        size_mb overrides the estimate (needed for non-torch models such as
+        CTranslate2). group/group_limit cap how many entries of one kind stay
+        resident (e.g. alignment models per language) on top of the global budget.
+        Concurrent misses on the same key share one loader() call.
+        """
+        hit = self._hit(key)
+        if hit is not None:
+            return hit.value
+        return self._flight.do(key, lambda: self._load(key, loader, size_mb, group, group_limit))
+
+    def _hit(self, key: tuple) -> _Entry | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                entry.last_used = time.time()
+                entry.hits += 1
+                logger.info("Model cache hit %s: saved ~%.2fs load", key, entry.load_seconds)
+            return entry
+
+    def _load(self, key, loader, size_mb, group, group_limit):
+        # Another thread may have finished loading between our miss and taking the flight.
+        hit = self._hit(key)
+        if hit is not None:
+            return hit.value
+        t0 = time.perf_counter()
+        value = loader()
+        load_seconds = time.perf_counter() - t0
+        size = size_mb if size_mb is not None else estimate_size_mb(value)
+        logger.info("Loaded model %s in %.2fs (~%.0f MB)", key, load_seconds, size)
+        with self._lock:
+            self._entries[key] = _Entry(
+                value=value,
+                size_mb=size,
+                group=group or key[0],
+                load_seconds=load_seconds,
+            )
+            self._entries.move_to_end(key)
+            self._enforce_limits(key, group_limit)
+        return value
+
+    def _enforce_limits(self, keep: tuple, group_limit: int | None) -> None:
+        evicted = []
+        group = self._entries[keep].group
+        if group_limit is not None:
+            same_group = [k for k, e in self._entries.items() if e.group == group]
+            for k in same_group[: max(0, len(same_group) - group_limit)]:
+                if k != keep:
+                    evicted.append(k)
+                    del self._entries[k]
+        if self.budget_mb > 0:
+            for k in list(self._entries):
+                if self.total_mb() <= self.budget_mb:
+                    break
+                if k != keep:
+                    evicted.append(k)
+                    del self._entries[k]
+        for k in evicted:
+            logger.info("Evicted model %s (budget %.0f MB)", k, self.budget_mb)
+        if evicted:
+            _release_memory()
+
+    def evict(self, key: tuple) -> bool:
+        with self._lock:
+            removed = self._entries.pop(key, None) is not None
+        if removed:
+            _release_memory()
+        return removed
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+        _release_memory()
+
+    def total_mb(self) -> float:
+        return sum(e.size_mb for e in self._entries.values())
+
+    def __contains__(self, key: tuple) -> bool:
+        return key in self._entries
+
+    def keys(self, group: str | None = None) -> list[tuple]:
+        with self._lock:
+            return [k for k, e in self._entries.items() if group is None or e.group == group]
+
+    def residency(self) -> dict:
+        """Snapshot for diagnostics: models in LRU order (oldest first) and totals."""
+        with self._lock:
+            models = [
+                {
+                    "key": [str(part) for part in k],
+                    "group": e.group,
+                    "size_mb": round(e.size_mb, 1),
+                    "load_seconds": round(e.load_seconds, 2),
+                    "hits": e.hits,
+                    "idle_seconds": round(time.time() - e.last_used, 1),
+                }
+                for k, e in self._entries.items()
+            ]
+            return {
+                "pid": os.getpid(),
+                "budget_mb": self.budget_mb,
+                "resident_mb": round(self.total_mb(), 1),
+                "models": models,
+            }
+
+
+registry = ModelRegistry()
@@ -15,9 +15,30 @@ class Conversation(models.Model):
         on_delete=models.CASCADE,
         related_name="conversations",
     )
+    class TranscriptVersion(models.TextChoices):
+        DRAFT = "draft", "Draft"
+        FINAL = "final", "Final"
+
     title = models.CharField(max_length=200)
     recorded_at = models.DateTimeField()
     duration_seconds = models.PositiveIntegerField(null=True, blank=True)
+    transcript_version = models.CharField(
+        max_length=16,
+        choices=TranscriptVersion.choices,
+        default=TranscriptVersion.FINAL,
+        help_text="Draft = quick pass from WHISPER_DRAFT_MODEL; replaced in place by the full pass.",
+    )
+    source_path = models.CharField(
+        max_length=500,
+        blank=True,
+        default="",
+        help_text="Original file of a batch-imported recording (transcribe_batch); used to resume.",
+    )
+    segments_version = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text="Bumped whenever a segment is saved or deleted; stored summaries must match it.",
+    )
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -29,6 +50,21 @@ class Conversation(models.Model):
     def get_absolute_url(self):
         return reverse("conversation_detail", kwargs={"pk": self.pk})
 
+    def transcript_parts(self) -> list[str]:
+        """
+        One "Speaker: text" (or bare text) entry per non-empty segment, in order.
+        Uses prefetched segments when the queryset has prefetch_related("segments").
+        """
+        parts = []
+        for s in self.segments.all():
+            if not s.text:
+                continue
+            if s.speaker_label:
+                parts.append(f"{s.speaker_label}: {s.text}")
+            else:
+                parts.append(s.text)
+        return parts
+
 
 class TranscriptSegment(models.Model):
     """
@@ -50,6 +86,17 @@ class TranscriptSegment(models.Model):
         help_text="From diarization (e.g. Speaker A); empty for non-WhisperX segments.",
     )
     segment_order = models.PositiveIntegerField()
+    start_sec = models.FloatField(
+        null=True,
+        blank=True,
+        help_text="Segment start in the recording (seconds); empty for typed transcripts.",
+    )
+    end_sec = models.FloatField(null=True, blank=True)
+    word_timings = models.BinaryField(
+        null=True,
+        blank=True,
+        help_text="Packed per-word (start_ms, end_ms) pairs from alignment; see word_timings.py.",
+    )
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -65,6 +112,27 @@ class TranscriptSegment(models.Model):
         preview = self.text[:50] + "..." if len(self.text) > 50 else self.text
         return f"Segment {self.segment_order}: {preview}"
 
+    def timed_words(self) -> list[tuple[str, float | None, float | None]]:
+        """(word, start_sec, end_sec) per word from the stored alignment, or []."""
+        from .word_timings import timed_words
+
+        return timed_words(self.text, self.word_timings)
+
+    @property
+    def start_clock(self) -> str:
+        """Start offset as m:ss (h:mm:ss past an hour) for display; "" if untimed."""
+        if self.start_sec is None:
+            return ""
+        minutes, seconds = divmod(int(self.start_sec), 60)
+        hours, minutes = divmod(minutes, 60)
+        return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+
+    @property
+    def words_per_minute(self) -> float | None:
+        if self.start_sec is None or self.end_sec is None or self.end_sec <= self.start_sec:
+            return None
+        return round(len(self.text.split()) * 60 / (self.end_sec - self.start_sec), 1)
+
 
 class ImprovementNote(models.Model):
     """
@@ -99,3 +167,210 @@ class ImprovementNote(models.Model):
 
     def __str__(self):
         return f"{self.get_note_type_display()}: {self.feedback_text[:40]}..."
+
+
+class TranscriptionJob(models.Model):
+    """
+    Queued audio upload waiting for (or finished with) WhisperX transcription.
+    The upload view only spools the file and creates a job; the `transcribe_worker`
+    management command picks up pending jobs and writes the Conversation + segments.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending"
+        RUNNING = "running", "Running"
+        DONE = "done", "Done"
+        FAILED = "failed", "Failed"
+
+    class Quality(models.TextChoices):
+        # Values match transcribe.QUALITY_TIERS.
+        FAST = "fast", "Fast — text only"
+        ALIGNED = "aligned", "Aligned — word timings, no speakers"
+        FULL = "full", "Full — speaker labels (needs HF_TOKEN)"
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="transcription_jobs",
+    )
+    title = models.CharField(max_length=200)
+    quality = models.CharField(
+        max_length=16,
+        choices=Quality.choices,
+        default=Quality.FULL,
+    )
+    audio_path = models.CharField(
+        max_length=500,
+        help_text="Spooled upload on local disk; removed once the job finishes.",
+    )
+    audio_sha256 = models.CharField(
+        max_length=64,
+        blank=True,
+        default="",
+        help_text="Hash computed while spooling; key into the transcript cache.",
+    )
+    status = models.CharField(
+        max_length=16,
+        choices=Status.choices,
+        default=Status.PENDING,
+    )
+    error = models.TextField(blank=True, default="")
+    stage_timings = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="StageTimer output: per-stage seconds / resident memory plus model + device.",
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    conversation = models.ForeignKey(
+        Conversation,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="transcription_jobs",
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Refreshed by the worker running the job; an expired lease means it died.",
+    )
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["status", "created_at"], name="transcription_job_queue_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.title} [{self.get_status_display()}]"
+
+    @property
+    def is_finished(self):
+        return self.status in (self.Status.DONE, self.Status.FAILED)
+
+
+class TranscriptCacheEntry(models.Model):
+    """
+    Finished WhisperX output keyed by audio content hash + model configuration.
+    Lets re-uploads of the same recording skip ASR/alignment/diarization entirely.
+    See conversations/transcript_cache.py.
+    """
+
+    cache_key = models.CharField(max_length=64, unique=True)
+    audio_sha256 = models.CharField(max_length=64, db_index=True)
+    model_config = models.JSONField(default=dict)
+    segments = models.JSONField(
+        default=list,
+        help_text="List of {speaker, text, start, end} dicts as returned by the pipeline.",
+    )
+    duration_seconds = models.FloatField(default=0.0)
+    size_bytes = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        ordering = ["-last_used_at"]
+
+    def __str__(self):
+        return f"{self.audio_sha256[:12]}… ({len(self.segments)} segments)"
+
+
+class ConversationSummary(models.Model):
+    """
+    Last generated summary of a conversation, with the hash of the transcript text
+    and summarizer configuration it was generated from (conversations/summary_cache.py).
+    Deleted by signals whenever the conversation's segments change, and only served
+    while segments_version still equals the conversation's.
+    """
+
+    conversation = models.OneToOneField(
+        Conversation,
+        on_delete=models.CASCADE,
+        related_name="summary",
+    )
+    summary = models.TextField()
+    transcript_sha256 = models.CharField(max_length=64)
+    config_key = models.CharField(
+        max_length=64,
+        help_text="SHA-256 of the summarizer configuration (model, lengths, beams).",
+    )
+    model_config = models.JSONField(default=dict)
+    segments_version = models.PositiveIntegerField(
+        default=0,
+        help_text="Conversation.segments_version read before the transcript was built.",
+    )
+    generation_seconds = models.FloatField(default=0.0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name_plural = "conversation summaries"
+
+    def __str__(self):
+        return f"Summary of {self.conversation}"
+
+
+class UserProfile(models.Model):
+    """
+    Per-user transcription preferences. preferred_language is learned from the
+    languages WhisperX detects on a user's uploads (see jobs.learn_language) and
+    passed back to ASR/alignment so later uploads skip language detection; a
+    sample of uploads still runs detection so the preference can be revised.
+    """
+
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="profile",
+    )
+    preferred_language = models.CharField(
+        max_length=16,
+        blank=True,
+        default="",
+        help_text="ISO code passed to WhisperX (e.g. en). Clear it to re-learn from the next uploads.",
+    )
+    detected_language = models.CharField(
+        max_length=16,
+        blank=True,
+        default="",
+        help_text="Language WhisperX detected on the most recent uploads.",
+    )
+    detected_streak = models.PositiveSmallIntegerField(
+        default=0,
+        help_text="Consecutive uploads detected as detected_language.",
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Profile for {self.user} ({self.preferred_language or 'auto'})"
+
+
+class KnownSpeaker(models.Model):
+    """
+    A voice seen in a user's earlier diarized recordings. `embedding` is the running
+    mean of pyannote speaker embeddings (float32 bytes); new diarization clusters are
+    matched against these (conversations/speaker_bank.py) so the same person keeps
+    the same label across conversations. Rename a speaker to label future segments.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="known_speakers",
+    )
+    name = models.CharField(max_length=64)
+    embedding = models.BinaryField()
+    dim = models.PositiveIntegerField()
+    observations = models.PositiveIntegerField(default=1)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_seen_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["user", "name"]
+        constraints = [
+            models.UniqueConstraint(fields=["user", "name"], name="unique_known_speaker_name_per_user"),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.user})"
@@ -0,0 +1,20 @@
+"""
+Model signal handlers, connected in ConversationsConfig.ready().
+
+Any change to a conversation's segments bumps its segments_version and
+invalidates its stored summary (summary_cache.py). bulk_create and
+QuerySet.update do not send signals; code that rewrites segments that way must
+call summary_cache.invalidate() itself (jobs._save_conversation deletes the old
+segments first, which does signal).
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import summary_cache
+from .models import TranscriptSegment
+
+
+@receiver(post_save, sender=TranscriptSegment, dispatch_uid="segment_saved_invalidates_summary")
+@receiver(post_delete, sender=TranscriptSegment, dispatch_uid="segment_deleted_invalidates_summary")
+def invalidate_conversation_summary(sender, instance, **kwargs):
+    summary_cache.invalidate(instance.conversation_id)
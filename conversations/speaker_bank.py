@@ -0,0 +1,150 @@
+"""
+Per-user bank of known speaker voices (KnownSpeaker rows) for stable speaker names.
+
+After diarization, each pyannote cluster embedding is matched against the user's
+bank by cosine similarity (one float32 matrix, one matmul). A match above
+SPEAKER_ID_THRESHOLD reuses that speaker's name and folds the new embedding into
+its running mean; an unmatched cluster is added as "Speaker <n>". A cluster
+without an embedding still gets the next "Speaker <n>" (stored without a voice,
+so it is never matched), so one conversation never mixes these names with the
+pipeline's "Speaker A/B" labels. Users rename speakers in the admin and later
+conversations pick up the new name; renamed speakers are never pruned.
+
+Voice embeddings are biometric data: identification is off unless SPEAKER_ID=1.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import re
+import threading
+
+import numpy as np
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import KnownSpeaker
+
+logger = logging.getLogger(__name__)
+
+SPEAKER_ID_ENABLED = os.environ.get("SPEAKER_ID", "0").lower() in ("1", "true", "yes")
+SPEAKER_ID_THRESHOLD = float(os.environ.get("SPEAKER_ID_THRESHOLD", "0.65"))
+MAX_KNOWN_SPEAKERS = int(os.environ.get("SPEAKER_ID_MAX_PER_USER", "200"))
+_AUTO_NAME_RE = re.compile(r"Speaker (\d+)$")
+
+
+def _unit(vec) -> np.ndarray:
+    v = np.asarray(vec, dtype=np.float32).ravel()
+    norm = float(np.linalg.norm(v))
+    return v / norm if norm else v
+
+
+class SpeakerBank:
+    """Loaded once per job (or shared by batch threads); identify() is thread-safe."""
+
+    def __init__(self, user, threshold: float = SPEAKER_ID_THRESHOLD):
+        self.user = user
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._speakers = list(KnownSpeaker.objects.filter(user=user).order_by("pk"))
+
+    def _matrix(self, dim: int) -> np.ndarray:
+        """Unit embeddings, one row per known speaker (zeros if from another embedding model)."""
+        rows = [
+            _unit(np.frombuffer(bytes(s.embedding), dtype=np.float32))
+            if s.dim == dim
+            else np.zeros(dim, dtype=np.float32)
+            for s in self._speakers
+        ]
+        return np.stack(rows) if rows else np.zeros((0, dim), dtype=np.float32)
+
+    def _next_name(self) -> str:
+        numbers = [
+            int(m.group(1)) for s in self._speakers if (m := _AUTO_NAME_RE.match(s.name))
+        ]
+        # Count renamed speakers too, so a new voice never inherits a number that
+        # earlier conversations used for someone who has since been renamed.
+        return f"Speaker {max(max(numbers, default=0), len(self._speakers)) + 1}"
+
+    def identify(self, embeddings: dict, other_ids=()) -> dict[str, str]:
+        """
+        Map raw diarization ids (SPEAKER_00, …) to known speaker names, adding new
+        speakers to the bank. Two clusters from one recording never share a name.
+        other_ids are ids of the same recording without an embedding; they get new
+        voiceless "Speaker <n>" entries.
+        """
+        vecs = {raw: _unit(vec) for raw, vec in sorted(embeddings.items()) if vec is not None}
+        if not vecs:
+            return {}
+        others = sorted(set(other_ids) - set(vecs))
+        with self._lock, transaction.atomic():
+            names: dict[str, str] = {}
+            matched: dict[str, int] = {}
+            dim = len(next(iter(vecs.values())))
+            bank = self._matrix(dim)
+            if len(bank):
+                raws = list(vecs)
+                scores = np.stack([vecs[r] for r in raws]) @ bank.T
+                taken: set[int] = set()
+                for flat in np.argsort(-scores, axis=None):
+                    i, j = np.unravel_index(flat, scores.shape)
+                    if scores[i, j] < self.threshold:
+                        break
+                    if raws[i] in matched or j in taken:
+                        continue
+                    matched[raws[i]] = int(j)
+                    taken.add(int(j))
+
+            now = timezone.now()
+            for raw, vec in vecs.items():
+                if raw in matched:
+                    speaker = self._speakers[matched[raw]]
+                    old = np.frombuffer(bytes(speaker.embedding), dtype=np.float32)
+                    mean = (old * speaker.observations + vec) / (speaker.observations + 1)
+                    speaker.embedding = mean.astype(np.float32).tobytes()
+                    speaker.observations += 1
+                    speaker.last_seen_at = now
+                    speaker.save(update_fields=["embedding", "observations", "last_seen_at"])
+                else:
+                    speaker = self._create(vec, now)
+                names[raw] = speaker.name
+            for raw in others:
+                names[raw] = self._create(np.zeros(0, dtype=np.float32), now).name
+            self._prune()
+        logger.info("Speaker identification: %d matched, %d new", len(matched), len(vecs) - len(matched))
+        return names
+
+    def _create(self, vec: np.ndarray, now) -> KnownSpeaker:
+        for _ in range(3):
+            try:
+                with transaction.atomic():
+                    speaker = KnownSpeaker.objects.create(
+                        user=self.user,
+                        name=self._next_name(),
+                        embedding=vec.astype(np.float32).tobytes(),
+                        dim=len(vec),
+                        last_seen_at=now,
+                    )
+            except IntegrityError:
+                # Another worker just added a speaker for this user: refresh names and retry.
+                known = {s.pk for s in self._speakers}
+                self._speakers += list(
+                    KnownSpeaker.objects.filter(user=self.user).exclude(pk__in=known)
+                )
+                continue
+            self._speakers.append(speaker)
+            return speaker
+        raise IntegrityError("Could not allocate a unique speaker name.")
+
+    def _prune(self) -> None:
+        """Drop the least recently seen auto-named speakers beyond MAX_KNOWN_SPEAKERS."""
+        if MAX_KNOWN_SPEAKERS <= 0 or len(self._speakers) <= MAX_KNOWN_SPEAKERS:
+            return
+        auto = [s for s in self._speakers if _AUTO_NAME_RE.match(s.name)]
+        by_age = sorted(auto, key=lambda s: s.last_seen_at)
+        doomed = by_age[: len(self._speakers) - MAX_KNOWN_SPEAKERS]
+        if not doomed:
+            return
+        KnownSpeaker.objects.filter(pk__in=[s.pk for s in doomed]).delete()
+        doomed_ids = {s.pk for s in doomed}
+        self._speakers = [s for s in self._speakers if s.pk not in doomed_ids]
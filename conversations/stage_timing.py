@@ -0,0 +1,107 @@
+"""
+Per-stage wall time and memory for the WhisperX pipeline.
+
+transcribe_audio_file wraps each stage (decode, asr, align, diarize,
+assign_speakers, …) in `timer.stage(name)`; the result is logged as one JSON line
+and stored on TranscriptionJob.stage_timings so `manage.py transcribe_stats`
+can report p50/p95 per stage, model and device.
+
+Memory per stage is the process's current RSS when the stage ends (`rss_mb`)
+and its change across the stage (`rss_delta_mb`), read from /proc/self/statm
+(Linux only; None elsewhere), plus the CUDA allocator peak within the stage
+(`cuda_peak_mb`). Other threads of the process allocate meanwhile too, so deltas
+are approximate when stages run concurrently.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import math
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+_STATM = "/proc/self/statm"
+try:
+    _PAGE_MB = os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+except (AttributeError, ValueError, OSError):  # Windows
+    _PAGE_MB = None
+
+
+def _current_rss_mb() -> float | None:
+    """Resident set size right now (second field of /proc/self/statm, in pages)."""
+    if _PAGE_MB is None:
+        return None
+    try:
+        with open(_STATM) as fh:
+            resident_pages = int(fh.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return round(resident_pages * _PAGE_MB, 1)
+
+
+def _cuda_module():
+    torch = sys.modules.get("torch")
+    if torch is not None and torch.cuda.is_available():
+        return torch.cuda
+    return None
+
+
+class StageTimer:
+    """Collects {stage: {"seconds", "rss_mb", "rss_delta_mb", "cuda_peak_mb"}} plus run metadata."""
+
+    def __init__(self):
+        self.stages: dict[str, dict] = {}
+        self.meta: dict = {}
+        self._started = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str):
+        cuda = _cuda_module()
+        if cuda is not None:
+            cuda.reset_peak_memory_stats()
+        rss_before = _current_rss_mb()
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            entry = self.stages.setdefault(name, {"seconds": 0.0})
+            entry["seconds"] = round(entry["seconds"] + time.perf_counter() - t0, 4)
+            rss_after = _current_rss_mb()
+            if rss_after is not None:
+                entry["rss_mb"] = rss_after
+                if rss_before is not None:
+                    # A stage entered more than once keeps its largest growth.
+                    delta = round(rss_after - rss_before, 1)
+                    entry["rss_delta_mb"] = max(entry.get("rss_delta_mb", delta), delta)
+            if cuda is not None:
+                entry["cuda_peak_mb"] = round(cuda.max_memory_allocated() / (1024 * 1024), 1)
+
+    def merge(self, stages: dict[str, dict]) -> None:
+        """Add stage seconds measured elsewhere (e.g. long-audio worker processes)."""
+        for name, data in stages.items():
+            entry = self.stages.setdefault(name, {"seconds": 0.0})
+            entry["seconds"] = round(entry["seconds"] + data.get("seconds", 0.0), 4)
+            for key in ("rss_mb", "rss_delta_mb", "cuda_peak_mb"):
+                if data.get(key) is not None:
+                    entry[key] = max(entry.get(key) or 0.0, data[key])
+
+    def as_dict(self) -> dict:
+        return {
+            "total_seconds": round(time.perf_counter() - self._started, 4),
+            "stages": self.stages,
+            "meta": self.meta,
+        }
+
+    def log(self, event: str = "transcribe.stages") -> None:
+        logger.info("%s %s", event, json.dumps(self.as_dict(), sort_keys=True))
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile (pct in 0..100) of a non-empty list."""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
@@ -0,0 +1,311 @@
+"""
+Live transcription over a WebSocket (ASGI, no extra dependencies).
+
+The wearable connects to /ws/transcribe/?title=… with its normal session cookie
+and streams raw 16 kHz mono signed 16-bit little-endian PCM as binary frames.
+Every STEP_SEC of new audio we re-run WhisperX ASR over the not-yet-final tail
+of the stream (at most WINDOW_SEC long) and push back:
+
+    {"type": "partial", "text": "..."}                       – may still change
+    {"type": "final", "segment_order": 3, "text": "...",
+     "start": 12.4, "end": 15.1}                             – persisted as a TranscriptSegment
+
+Segments that end more than STABILITY_SEC before the end of the buffered audio
+are considered stable; their audio is dropped from the buffer so each ASR call
+stays short. Send the text frame {"type": "stop"} (or just close) to flush the
+remainder. Speaker labels are left empty: diarization needs the whole recording.
+If one utterance fills the whole window it is finalized as it stands, so no
+audio is dropped unsaved. Handshakes from a foreign Origin are refused (4403),
+an ASR failure closes the socket with 1011 (1013 when no inference slot freed
+up within INFERENCE_REQUEST_MAX_WAIT_SEC), and a session that produced no
+segments leaves no conversation behind.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+from types import SimpleNamespace
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+
+from . import jobs, transcribe
+from .inference_slots import INFERENCE_REQUEST_MAX_WAIT_SEC, InferenceBusyError
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = transcribe.SAMPLE_RATE
+STEP_SEC = float(os.environ.get("STREAM_STEP_SEC", "2.0"))
+STABILITY_SEC = float(os.environ.get("STREAM_STABILITY_SEC", "1.5"))
+WINDOW_SEC = float(os.environ.get("STREAM_WINDOW_SEC", "30"))
+WEBSOCKET_PATH = "/ws/transcribe/"
+
+
+def _asr_window(audio: np.ndarray, language: str | None) -> tuple[list[dict], str | None]:
+    """Fast-tier ASR on one rolling window; returns (segments, detected language)."""
+    model, device = transcribe._get_asr_model()
+    result = transcribe._asr_transcribe(
+        model,
+        audio,
+        batch_size=transcribe._env_int("WHISPERX_BATCH_SIZE") or (8 if device == "cuda" else 4),
+        language=language or os.environ.get("WHISPER_LANGUAGE") or None,
+        kind="stream_asr",
+        max_wait=INFERENCE_REQUEST_MAX_WAIT_SEC,
+    )
+    return result.get("segments") or [], result.get("language")
+
+
+class StreamingTranscriber:
+    """
+    Incremental ASR over a rolling window. Feed PCM bytes, get partial/final events.
+    `asr` is injectable for tests: asr(audio, language) -> (segments, language).
+    """
+
+    def __init__(self, asr=_asr_window, language: str | None = None):
+        self._asr = asr
+        self._buffer = np.zeros(0, dtype=np.float32)
+        self._pending = b""
+        self._offset = 0.0  # stream time (s) of self._buffer[0]
+        self._since_decode = 0
+        self._language = language
+        self._last_partial = ""
+
+    @property
+    def duration(self) -> float:
+        return self._offset + len(self._buffer) / SAMPLE_RATE
+
+    def feed(self, pcm: bytes) -> list[dict]:
+        data = self._pending + pcm
+        usable = len(data) - len(data) % 2
+        self._pending = data[usable:]
+        samples = np.frombuffer(data[:usable], dtype=np.int16).astype(np.float32) / 32768.0
+        self._buffer = np.concatenate([self._buffer, samples])
+        self._since_decode += len(samples)
+        if self._since_decode < STEP_SEC * SAMPLE_RATE:
+            return []
+        self._since_decode = 0
+        return self._decode(final=False)
+
+    def flush(self) -> list[dict]:
+        """Finalize everything still buffered (end of stream)."""
+        if not len(self._buffer):
+            return []
+        return self._decode(final=True)
+
+    def _final_event(self, seg: dict) -> list[dict]:
+        text = (seg.get("text") or "").strip()
+        if not text:
+            return []
+        return [
+            {
+                "type": "final",
+                "text": text,
+                "start": round(self._offset + float(seg.get("start") or 0.0), 2),
+                "end": round(self._offset + float(seg.get("end") or 0.0), 2),
+            }
+        ]
+
+    def _decode(self, final: bool) -> list[dict]:
+        segments, language = self._asr(self._buffer, self._language)
+        self._language = self._language or language
+        buffered = len(self._buffer) / SAMPLE_RATE
+        # Force progress when the window is full even if nothing looks stable yet.
+        force = buffered >= WINDOW_SEC
+        events: list[dict] = []
+        cut = 0.0
+        tail: list[dict] = []
+        for i, seg in enumerate(segments):
+            end = float(seg.get("end") or 0.0)
+            is_last = i == len(segments) - 1
+            stable = final or end <= buffered - STABILITY_SEC or (force and not is_last)
+            if stable and not tail:
+                events.extend(self._final_event(seg))
+                cut = end
+            else:
+                tail.append(seg)
+        if final:
+            cut = buffered
+        elif force and cut == 0.0:
+            # One utterance fills the whole window: finalize it as it stands rather
+            # than drop its audio unsaved. Without usable timings, keep a little context.
+            for seg in tail:
+                events.extend(self._final_event(seg))
+                cut = max(cut, float(seg.get("end") or 0.0))
+            cut = min(cut, buffered) or buffered - STABILITY_SEC
+            tail = []
+        if cut > 0:
+            drop = min(len(self._buffer), int(cut * SAMPLE_RATE))
+            self._buffer = self._buffer[drop:]
+            self._offset += drop / SAMPLE_RATE
+        partial = " ".join((s.get("text") or "").strip() for s in tail).strip()
+        if not final and partial != self._last_partial:
+            events.append({"type": "partial", "text": partial})
+            self._last_partial = partial
+        return events
+
+
+def _headers(scope) -> dict[bytes, bytes]:
+    return dict(scope.get("headers") or [])
+
+
+def _origin_allowed(scope) -> bool:
+    """
+    Reject cross-site handshakes (the session cookie is sent with them too).
+    Browsers always send Origin on WebSockets; clients without one are not
+    browsers and are let through. Mirrors CsrfViewMiddleware: the origin must be
+    in CSRF_TRUSTED_ORIGINS or its host in ALLOWED_HOSTS.
+    """
+    from django.http.request import split_domain_port, validate_host
+    from django.utils.http import is_same_domain
+
+    origin = _headers(scope).get(b"origin", b"").decode("latin-1").strip()
+    if not origin:
+        return True
+    parsed = urlsplit(origin)
+    if not parsed.scheme or not parsed.netloc:
+        return False
+    trusted = getattr(settings, "CSRF_TRUSTED_ORIGINS", [])
+    if origin in trusted:
+        return True
+    for entry in trusted:
+        if "*" in entry and entry.startswith(parsed.scheme + "://"):
+            if is_same_domain(parsed.netloc, urlsplit(entry).netloc):
+                return True
+    allowed_hosts = settings.ALLOWED_HOSTS
+    if settings.DEBUG and not allowed_hosts:
+        allowed_hosts = [".localhost", "127.0.0.1", "[::1]"]
+    domain, _ = split_domain_port(parsed.netloc)
+    return bool(domain) and validate_host(domain, allowed_hosts)
+
+
+def _user_for_scope(scope):
+    """Resolve the logged-in user from the Django session cookie in the handshake."""
+    from importlib import import_module
+
+    from django.contrib.auth import get_user
+
+    cookies = {}
+    for part in _headers(scope).get(b"cookie", b"").decode("latin-1").split(";"):
+        if "=" in part:
+            k, v = part.strip().split("=", 1)
+            cookies[k] = v
+    session_key = cookies.get(settings.SESSION_COOKIE_NAME)
+    if not session_key:
+        return None
+    store = import_module(settings.SESSION_ENGINE).SessionStore(session_key)
+    user = get_user(SimpleNamespace(session=store))
+    return user if user.is_authenticated else None
+
+
+def _create_conversation(user, title: str):
+    from .models import Conversation
+
+    return Conversation.objects.create(
+        user=user,
+        title=title[:200] or f"Live session {timezone.now():%b %d, %H:%M}",
+        recorded_at=timezone.now(),
+    )
+
+
+def _save_final(conversation, order: int, event: dict) -> None:
+    from .models import TranscriptSegment
+
+    TranscriptSegment.objects.create(
+        conversation=conversation,
+        text=event["text"],
+        segment_order=order,
+        start_sec=event.get("start"),
+        end_sec=event.get("end"),
+    )
+
+
+def _finish_conversation(conversation, duration: float, segments: int) -> None:
+    if not segments:
+        # Nothing was said (or ASR failed before the first final): no empty conversation.
+        conversation.delete()
+        return
+    conversation.duration_seconds = max(1, int(round(duration))) if duration else None
+    conversation.save(update_fields=["duration_seconds"])
+
+
+async def websocket_transcribe(scope, receive, send):
+    """ASGI WebSocket handler mounted at WEBSOCKET_PATH by echolabs_project/asgi.py."""
+    event = await receive()
+    if event["type"] != "websocket.connect":
+        return
+    if not _origin_allowed(scope):
+        await send({"type": "websocket.close", "code": 4403})
+        return
+    user = await sync_to_async(_user_for_scope)(scope)
+    if user is None:
+        await send({"type": "websocket.close", "code": 4401})
+        return
+    await send({"type": "websocket.accept"})
+
+    query = parse_qs(scope.get("query_string", b"").decode())
+    title = (query.get("title") or [""])[0].strip()
+    conversation = await sync_to_async(_create_conversation)(user, title)
+    language = await sync_to_async(jobs.preferred_language)(user)
+    await send({"type": "websocket.send", "text": json.dumps(
+        {"type": "started", "conversation_id": conversation.pk,
+         "conversation_url": conversation.get_absolute_url()}
+    )})
+
+    transcriber = StreamingTranscriber(asr=_asr_window, language=language)
+    order = 0
+    closed_by_client = failed = busy = False
+
+    async def _emit(events):
+        nonlocal order
+        for ev in events:
+            if ev["type"] == "final":
+                order += 1
+                ev["segment_order"] = order
+                await sync_to_async(_save_final)(conversation, order, ev)
+            if not closed_by_client:
+                await send({"type": "websocket.send", "text": json.dumps(ev)})
+
+    try:
+        try:
+            while True:
+                event = await receive()
+                if event["type"] == "websocket.disconnect":
+                    closed_by_client = True
+                    break
+                if event.get("bytes"):
+                    # ASR is blocking CPU work; keep it off the event loop.
+                    events = await sync_to_async(transcriber.feed, thread_sensitive=False)(event["bytes"])
+                    await _emit(events)
+                elif event.get("text"):
+                    try:
+                        msg = json.loads(event["text"])
+                    except ValueError:
+                        msg = {}
+                    if msg.get("type") == "stop":
+                        break
+            # Socket gone or not, persist what was said.
+            await _emit(await sync_to_async(transcriber.flush, thread_sensitive=False)())
+        except InferenceBusyError:
+            busy = True
+            logger.warning(
+                "Live session %s: no inference slot free, closing after %d segments", conversation.pk, order
+            )
+        except Exception:
+            failed = True
+            logger.exception("Live session %s failed after %d segments", conversation.pk, order)
+    finally:
+        await sync_to_async(_finish_conversation)(conversation, transcriber.duration, order)
+        logger.info(
+            "Live session %s ended: %.1fs audio, %d segments", conversation.pk, transcriber.duration, order
+        )
+    if closed_by_client:
+        return
+    if failed or busy:
+        await send({"type": "websocket.close", "code": 1013 if busy else 1011})
+        return
+    await send({"type": "websocket.send", "text": json.dumps({"type": "done"})})
+    await send({"type": "websocket.close", "code": 1000})
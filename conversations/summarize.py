@@ -1,38 +1,157 @@
 """
 Local LLM summarization using Hugging Face transformers.
 Uses philschmid/bart-large-cnn-samsum (chosen in ai_prototype.ipynb).
-Model weights are loaded on first use and cached.
+Model weights are loaded on first use and cached (conversations/model_registry.py).
 
 The model was benchmarked in ai_prototype.ipynb with raw transcript (zero-shot), not an
 instruction prefix; adding "Summarize..." can make the model echo the instruction or
 regurgitate input on short or placeholder text.
+
+Transcripts longer than one model input (MAX_INPUT_LENGTH tokens) are summarized
+map-reduce style when SUMMARIZE_LONG is on: utterances are packed into
+token-budgeted chunks without splitting a segment, all chunks are summarized in
+one batched generate, and the joined partial summaries are summarized again
+(repeating while they still do not fit). SUMMARIZE_MAX_CHUNKS caps the work;
+web requests pass the much lower SUMMARIZE_REQUEST_MAX_CHUNKS so generation
+fits in the worker timeout (summarize_all covers the rest of long transcripts).
 """
+import logging
+import os
 import re
+from pathlib import Path
+
+from .inference_slots import INFERENCE_REQUEST_MAX_WAIT_SEC, inference_slot
+from .model_registry import registry
+from .summarize_batcher import COALESCE_ENABLED, Batcher
+
+logger = logging.getLogger(__name__)
 
-# Lazy-loaded model and tokenizer (loaded on first summarize_transcript call)
-_tokenizer = None
-_model = None
 MODEL_NAME = "philschmid/bart-large-cnn-samsum"
+# "eager" = fp32 PyTorch, "int8" = dynamic int8 quantization of the Linear layers,
+# "onnx" = exported ONNX Runtime graph (optimum; cached in SUMMARIZER_ONNX_DIR).
+# Compare speed and ROUGE with `manage.py benchmark_summarize --backends eager,int8,onnx`.
+BACKENDS = ("eager", "int8", "onnx")
+SUMMARIZER_BACKEND = os.environ.get("SUMMARIZER_BACKEND", "eager").strip().lower() or "eager"
+ONNX_DIR = Path(
+    os.environ.get("SUMMARIZER_ONNX_DIR") or Path.home() / ".cache" / "echolabs" / "onnx"
+)
+# Approximate resident size per backend (MB) for the model registry's budget:
+# estimate_size_mb sees neither ONNX Runtime sessions nor the packed int8 Linear
+# weights (not parameters or buffers). The ONNX export's files are used when present.
+_SIZE_MB = {"eager": 1650, "int8": 700, "onnx": 2500}
 MAX_INPUT_LENGTH = 512
 MAX_NEW_TOKENS = 80
+NUM_BEAMS = 4
+NO_REPEAT_NGRAM_SIZE = 3
 # Avoid summarizing seed placeholders or a single short line (model will hallucinate).
 MIN_WORDS_TO_SUMMARIZE = 12
+# Short mode cuts the text here (roughly under 512 tokens for most inputs).
+MAX_INPUT_CHARS = 2000
+LONG_MODE = os.environ.get("SUMMARIZE_LONG", "1").lower() not in ("0", "false", "no")
+# Map step: at most this many chunks per transcript (evenly sampled beyond that),
+# generated in batches of SUMMARIZE_BATCH_SIZE, each partial up to MAP_NEW_TOKENS.
+MAX_CHUNKS = int(os.environ.get("SUMMARIZE_MAX_CHUNKS", "16"))
+# Cap for summaries generated inside a web request (one map + one reduce call).
+REQUEST_MAX_CHUNKS = int(os.environ.get("SUMMARIZE_REQUEST_MAX_CHUNKS", "4"))
+BATCH_SIZE = max(1, int(os.environ.get("SUMMARIZE_BATCH_SIZE", "16")))
+MAP_NEW_TOKENS = 60
+# Token budget per chunk, leaving room for BOS/EOS.
+CHUNK_TOKENS = MAX_INPUT_LENGTH - 2
+MAX_REDUCE_ROUNDS = 3
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
 _ECHO_PREFIXES = (
     "summarize what this person said in 1-2 sentences",
     "summarize what the person said",
 )
+# Returned instead of a model summary; see is_placeholder().
+NO_TEXT_MESSAGE = "No transcript text to summarize."
+TOO_SHORT_MESSAGE = (
+    "This transcript is too short to summarize reliably. "
+    "Add more transcript segments or real spoken content, then try again."
+)
+FAILED_MESSAGE = "Could not generate summary."
+PLACEHOLDERS = frozenset({NO_TEXT_MESSAGE, TOO_SHORT_MESSAGE, FAILED_MESSAGE})
+
+
+def _backend(backend: str | None) -> str:
+    backend = (backend or SUMMARIZER_BACKEND).strip().lower()
+    if backend not in BACKENDS:
+        raise ValueError(
+            f"Unknown SUMMARIZER_BACKEND {backend!r}; choose one of {', '.join(BACKENDS)}."
+        )
+    return backend
+
 
+def _onnx_export_dir() -> Path:
+    return ONNX_DIR / MODEL_NAME.replace("/", "--")
 
-def _get_model():
-    """Load and cache tokenizer and model (lazy load)."""
-    global _tokenizer, _model
-    if _model is None:
-        from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
+
+def _size_mb(backend: str) -> float:
+    """Registry size hint for backend (on-disk size of an existing ONNX export)."""
+    if backend == "onnx":
+        files = list(_onnx_export_dir().glob("*.onnx*"))
+        if files:
+            return sum(f.stat().st_size for f in files) / (1024 * 1024)
+    return _SIZE_MB[backend]
+
+
+def _load_onnx_model():
+    """ONNX Runtime graph, exported once into ONNX_DIR and reloaded from there."""
+    try:
+        from optimum.onnxruntime import ORTModelForSeq2SeqLM
+    except ImportError as e:
+        raise ValueError(
+            "SUMMARIZER_BACKEND=onnx needs optimum with ONNX Runtime "
+            "(pip install 'optimum[onnxruntime]')."
+        ) from e
+    export_dir = _onnx_export_dir()
+    if (export_dir / "config.json").is_file():
+        return ORTModelForSeq2SeqLM.from_pretrained(export_dir)
+    model = ORTModelForSeq2SeqLM.from_pretrained(MODEL_NAME, export=True)
+    model.save_pretrained(export_dir)
+    logger.info("Exported %s to ONNX in %s", MODEL_NAME, export_dir)
+    return model
+
+
+def _load_model(backend: str | None = None):
+    from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
+
+    backend = _backend(backend)
+    tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
+    if backend == "onnx":
+        return tokenizer, _load_onnx_model()
+    model = AutoModelForSeq2SeqLM.from_pretrained(MODEL_NAME)
+    model.eval()
+    if backend == "int8":
         import torch
-        _tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
-        _model = AutoModelForSeq2SeqLM.from_pretrained(MODEL_NAME)
-        _model.eval()
-    return _tokenizer, _model
+
+        # Dynamic int8: Linear weights quantized once, activations per batch (CPU only).
+        model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return tokenizer, model
+
+
+def _get_model(backend: str | None = None):
+    """Tokenizer and model, loaded on first use and kept in the model registry."""
+    backend = _backend(backend)
+    return registry.get(
+        ("summarizer", MODEL_NAME, backend), lambda: _load_model(backend), size_mb=_size_mb(backend)
+    )
+
+
+def model_config() -> dict:
+    """Everything that changes the summary for identical transcript text."""
+    return {
+        "model": MODEL_NAME,
+        "backend": SUMMARIZER_BACKEND,
+        "max_input_length": MAX_INPUT_LENGTH,
+        "max_new_tokens": MAX_NEW_TOKENS,
+        "num_beams": NUM_BEAMS,
+        "no_repeat_ngram_size": NO_REPEAT_NGRAM_SIZE,
+        "min_words": MIN_WORDS_TO_SUMMARIZE,
+        "long_mode": LONG_MODE,
+        "max_chunks": MAX_CHUNKS,
+        "map_new_tokens": MAP_NEW_TOKENS,
+    }
 
 
 def _preprocess(text: str) -> str:
@@ -42,8 +161,8 @@ def _preprocess(text: str) -> str:
     # Normalize whitespace
     text = re.sub(r"\s+", " ", text).strip()
     # Truncate by character count (roughly under 512 tokens for most inputs)
-    if len(text) > 2000:
-        text = text[:2000] + "..."
+    if len(text) > MAX_INPUT_CHARS:
+        text = text[:MAX_INPUT_CHARS] + "..."
     return text
 
 
@@ -63,36 +182,194 @@ def _strip_echoed_instruction(summary: str) -> str:
     return s.strip()
 
 
-def summarize_transcript(text: str) -> str:
+def _generate(
+    texts: list[str],
+    max_new_tokens: int = MAX_NEW_TOKENS,
+    backend: str | None = None,
+    max_wait: float | None = None,
+) -> list[str]:
     """
-    Summarize transcript text using the local BART model.
-    Returns summary string or raises on error.
+    Summaries for texts, BATCH_SIZE inputs (padded together) per generate call.
+    Inputs are batched in length order so each batch pads to similar lengths.
+    backend overrides SUMMARIZER_BACKEND (benchmarks); max_wait bounds the wait
+    for an inference slot (InferenceBusyError after that).
     """
+    tokenizer, model = _get_model(backend)
+    import torch
+
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+    ordered = [texts[i] for i in order]
+    out: list[str] = []
+    for i in range(0, len(ordered), BATCH_SIZE):
+        inputs = tokenizer(
+            ordered[i : i + BATCH_SIZE],
+            return_tensors="pt",
+            max_length=MAX_INPUT_LENGTH,
+            truncation=True,
+            padding=True,
+        )
+        with inference_slot("summarize", max_wait=max_wait), torch.no_grad():
+            outputs = model.generate(
+                **inputs,
+                max_new_tokens=max_new_tokens,
+                num_beams=NUM_BEAMS,
+                no_repeat_ngram_size=NO_REPEAT_NGRAM_SIZE,
+            )
+        out.extend(
+            _strip_echoed_instruction(s)
+            for s in tokenizer.batch_decode(outputs, skip_special_tokens=True)
+        )
+    summaries = [""] * len(texts)
+    for i, summary in zip(order, out):
+        summaries[i] = summary
+    return summaries
+
+
+# Concurrent single-transcript requests in this process share one generate call;
+# its callers are web requests, so a batch waits only the request-path slot time.
+_batcher = Batcher(lambda texts: _generate(texts, max_wait=INFERENCE_REQUEST_MAX_WAIT_SEC))
+
+
+def _summarize_one(text: str, max_wait: float | None = None) -> str:
+    if COALESCE_ENABLED:
+        return _batcher(text)
+    return _generate([text], max_wait=max_wait)[0]
+
+
+def _token_counts(tokenizer, parts: list[str]) -> list[int]:
+    if not parts:
+        return []
+    return [len(ids) for ids in tokenizer(parts, add_special_tokens=False)["input_ids"]]
+
+
+def chunk_parts(parts: list[str], counts: list[int], budget: int = CHUNK_TOKENS) -> list[str]:
+    """
+    Greedily pack consecutive parts into chunks of at most budget tokens. A part
+    is never split; one longer than the budget becomes its own (truncated) chunk.
+    """
+    chunks: list[str] = []
+    current: list[str] = []
+    used = 0
+    for part, n in zip(parts, counts):
+        if current and used + n > budget:
+            chunks.append(" ".join(current))
+            current, used = [], 0
+        current.append(part)
+        used += n
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+def _cap_chunks(chunks: list[str], max_chunks: int | None = None) -> list[str]:
+    """Evenly spaced subset of at most max_chunks (MAX_CHUNKS) chunks, so work stays bounded."""
+    max_chunks = MAX_CHUNKS if max_chunks is None else max_chunks
+    if max_chunks <= 0 or len(chunks) <= max_chunks:
+        return chunks
+    logger.info("Summarizing %d of %d transcript chunks", max_chunks, len(chunks))
+    step = len(chunks) / max_chunks
+    return [chunks[int(i * step)] for i in range(max_chunks)]
+
+
+def _summarize_long(
+    parts: list[str], max_wait: float | None = None, max_chunks: int | None = None
+) -> str:
+    """Map (one batched generate over chunks) then reduce until one input fits."""
+    tokenizer, _ = _get_model()
+    for _ in range(MAX_REDUCE_ROUNDS):
+        counts = _token_counts(tokenizer, parts)
+        if sum(counts) <= CHUNK_TOKENS:
+            break
+        chunks = _cap_chunks(chunk_parts(parts, counts, CHUNK_TOKENS), max_chunks)
+        parts = [p for p in _generate(chunks, MAP_NEW_TOKENS, max_wait=max_wait) if p.strip()]
+        if len(chunks) == 1:
+            break
+    return _generate([" ".join(parts)], max_wait=max_wait)[0]
+
+
+def _split_parts(text: str) -> list[str]:
+    return [p for p in _SENTENCE_RE.split(text) if p.strip()]
+
+
+def _plan(text: str, parts: list[str] | None) -> tuple[str, object]:
+    """
+    How to summarize one transcript: ("done", message) without the model,
+    ("long", parts) for map-reduce, or ("single", model input text).
+    """
+    full_text = re.sub(r"\s+", " ", text or "").strip()
     text = _preprocess(text)
     if not text:
-        return "No transcript text to summarize."
+        return "done", NO_TEXT_MESSAGE
     if _word_count(text) < MIN_WORDS_TO_SUMMARIZE:
-        return (
-            "This transcript is too short to summarize reliably. "
-            "Add more transcript segments or real spoken content, then try again."
-        )
-    tokenizer, model = _get_model()
-    import torch
-    inputs = tokenizer(
-        text,
-        return_tensors="pt",
-        max_length=MAX_INPUT_LENGTH,
-        truncation=True,
-    )
-    with torch.no_grad():
-        outputs = model.generate(
-            **inputs,
-            max_new_tokens=MAX_NEW_TOKENS,
-            num_beams=4,
-            no_repeat_ngram_size=3,
-        )
-    summary = tokenizer.decode(outputs[0], skip_special_tokens=True)
-    summary = _strip_echoed_instruction(summary)
-    if not summary:
-        return "Could not generate summary."
-    return summary.strip()
+        return "done", TOO_SHORT_MESSAGE
+    if LONG_MODE and len(full_text) > MAX_INPUT_CHARS:
+        # Past the character cut of _preprocess: decide by real token count.
+        parts = [re.sub(r"\s+", " ", p).strip() for p in (parts or _split_parts(full_text))]
+        parts = [p for p in parts if p]
+        tokenizer, _ = _get_model()
+        if sum(_token_counts(tokenizer, parts)) > CHUNK_TOKENS:
+            return "long", parts
+        text = full_text
+    return "single", text
+
+
+def _finish(summary: str) -> str:
+    return summary.strip() or FAILED_MESSAGE
+
+
+def is_placeholder(summary: str) -> bool:
+    """True for the fixed messages returned instead of a model summary (never cached)."""
+    return summary in PLACEHOLDERS
+
+
+def chunk_count(text: str, parts: list[str] | None = None) -> int:
+    """Chunks the map step would summarize for this transcript; 0 if it fits one input."""
+    kind, payload = _plan(text, parts)
+    if kind != "long":
+        return 0
+    tokenizer, _ = _get_model()
+    return len(chunk_parts(payload, _token_counts(tokenizer, payload), CHUNK_TOKENS))
+
+
+def summarize_transcript(
+    text: str,
+    parts: list[str] | None = None,
+    max_wait: float | None = None,
+    max_chunks: int | None = None,
+) -> str:
+    """
+    Summarize transcript text using the local BART model.
+    parts are the transcript's utterances (e.g. "Speaker A: …" per segment) used as
+    chunk boundaries for long transcripts; without them text is split on sentences.
+    max_wait bounds each wait for an inference slot and max_chunks the map step
+    (request-path callers pass INFERENCE_REQUEST_MAX_WAIT_SEC and
+    REQUEST_MAX_CHUNKS). Returns summary string or raises on error.
+    """
+    kind, payload = _plan(text, parts)
+    if kind == "done":
+        return payload
+    if kind == "long":
+        return _finish(_summarize_long(payload, max_wait, max_chunks))
+    return _finish(_summarize_one(payload, max_wait))
+
+
+def summarize_many(items: list[tuple[str, list[str] | None]]) -> list[str]:
+    """
+    Summaries for many (text, parts) transcripts, as summarize_transcript would
+    return them. Transcripts that fit one model input share padded generate calls
+    (BATCH_SIZE at a time, similar lengths together); long ones run map-reduce.
+    """
+    results: list[str | None] = [None] * len(items)
+    single: list[tuple[int, str]] = []
+    for i, (text, parts) in enumerate(items):
+        kind, payload = _plan(text, parts)
+        if kind == "done":
+            results[i] = payload
+        elif kind == "long":
+            results[i] = _finish(_summarize_long(payload))
+        else:
+            single.append((i, payload))
+    if single:
+        for (i, _), summary in zip(single, _generate([t for _, t in single])):
+            results[i] = _finish(summary)
+    return results
@@ -0,0 +1,98 @@
+"""
+Request coalescer for the summarizer: concurrent summarize calls in one process
+share a single padded `generate` instead of running one after another at batch
+size 1.
+
+Callers submit() a text and block on the returned Future. One dispatcher thread
+takes the first waiting text, collects whatever else is already waiting (and,
+with SUMMARIZE_BATCH_WINDOW_MS > 0, keeps collecting that long) up to
+SUMMARIZE_MAX_BATCH texts, runs them as one batch and hands each caller its own
+result; an exception fails every caller in that batch. Requests that arrive
+while a batch is generating are picked up together as the next batch, so even
+with the default window of 0 concurrent callers share batches without any
+request waiting for a timer.
+
+Opt-in (SUMMARIZE_COALESCE=1): only processes that run summarize requests in
+parallel threads (gunicorn --threads, runserver, summarize_all) have callers to
+coalesce. The deployed ASGI worker runs sync views one at a time per process,
+where the batcher would only add a thread hop.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+COALESCE_ENABLED = os.environ.get("SUMMARIZE_COALESCE", "0").lower() in ("1", "true", "yes")
+BATCH_WINDOW_SEC = float(os.environ.get("SUMMARIZE_BATCH_WINDOW_MS", "0")) / 1000
+MAX_BATCH = max(1, int(os.environ.get("SUMMARIZE_MAX_BATCH", "8")))
+
+
+class Batcher:
+    """Coalesce run_batch(list[str]) -> list[str] calls from many threads."""
+
+    def __init__(
+        self,
+        run_batch: Callable[[list[str]], list[str]],
+        window: float = BATCH_WINDOW_SEC,
+        max_batch: int = MAX_BATCH,
+    ):
+        self.run_batch = run_batch
+        self.window = window
+        self.max_batch = max_batch
+        self.batch_sizes: list[int] = []  # recent batch sizes, for diagnostics
+        self._queue: queue.Queue[tuple[str, Future]] = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    def submit(self, text: str) -> Future:
+        future: Future = Future()
+        self._queue.put((text, future))
+        self._ensure_thread()
+        return future
+
+    def __call__(self, text: str) -> str:
+        return self.submit(text).result()
+
+    def _ensure_thread(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._loop, name="summarize-batcher", daemon=True
+                )
+                self._thread.start()
+
+    def _collect(self) -> list[tuple[str, Future]]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch:
+            timeout = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _loop(self) -> None:
+        while True:
+            batch = self._collect()
+            texts = [text for text, _ in batch]
+            try:
+                results = self.run_batch(texts)
+            except BaseException as exc:  # noqa: BLE001 - handed to every caller
+                for _, future in batch:
+                    future.set_exception(exc)
+                continue
+            if len(self.batch_sizes) >= 1000:
+                del self.batch_sizes[:500]
+            self.batch_sizes.append(len(batch))
+            if len(batch) > 1:
+                logger.debug("Summarized %d coalesced requests in one batch", len(batch))
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
@@ -0,0 +1,107 @@
+"""
+Persisted conversation summaries (ConversationSummary rows).
+
+A stored summary is reused while the summarizer configuration is unchanged
+(summarize.model_config(), hashed into config_key) and the conversation's
+segments are unchanged: conversations/signals.py bumps
+Conversation.segments_version and deletes the summary as soon as a segment is
+added, edited or removed. Each summary records the segments_version read before
+its transcript was built, so a summary whose generation raced with an edit is
+written with an outdated version and never served. A hit needs no transcript
+rebuild: the view loads the conversation with its summary in one query.
+transcript_sha256 records the exact text that was summarized, for callers that
+already hold the transcript (see is_current). Placeholder messages ("too short
+to summarize") are not stored. SUMMARY_CACHE=0 disables reads and writes.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+
+from django.db.models import F
+
+from . import summarize
+from .models import Conversation, ConversationSummary
+
+ENABLED = os.environ.get("SUMMARY_CACHE", "1").lower() not in ("0", "false", "no")
+
+
+def transcript_sha256(transcript: str) -> str:
+    return hashlib.sha256(transcript.encode("utf-8")).hexdigest()
+
+
+def config_key(config: dict | None = None) -> str:
+    payload = json.dumps(config or summarize.model_config(), sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def is_current(
+    entry: ConversationSummary | None,
+    transcript: str | None = None,
+    segments_version: int | None = None,
+) -> bool:
+    """
+    True if entry matches the current config (and the transcript text and
+    conversation segments_version, when given).
+    """
+    if not ENABLED or entry is None or entry.config_key != config_key():
+        return False
+    if segments_version is not None and entry.segments_version != segments_version:
+        return False
+    return transcript is None or entry.transcript_sha256 == transcript_sha256(transcript)
+
+
+def cached_summary(conversation: Conversation) -> str | None:
+    """
+    The stored summary if it is still current, else None. Pass a conversation
+    loaded with select_related("summary") to avoid a second query.
+    """
+    try:
+        entry = conversation.summary
+    except ConversationSummary.DoesNotExist:
+        return None
+    return entry.summary if is_current(entry, segments_version=conversation.segments_version) else None
+
+
+def store(
+    conversation: Conversation,
+    transcript: str,
+    summary: str,
+    seconds: float = 0.0,
+    segments_version: int | None = None,
+) -> ConversationSummary | None:
+    """
+    Save summary for conversation. segments_version is the conversation's
+    version read before transcript was built (defaults to conversation's loaded
+    one); nothing is written if the segments have changed since.
+    """
+    if not ENABLED or summarize.is_placeholder(summary):
+        return None
+    if segments_version is None:
+        segments_version = conversation.segments_version
+    if not Conversation.objects.filter(pk=conversation.pk, segments_version=segments_version).exists():
+        return None
+    config = summarize.model_config()
+    entry, _ = ConversationSummary.objects.update_or_create(
+        conversation=conversation,
+        defaults={
+            "summary": summary,
+            "transcript_sha256": transcript_sha256(transcript),
+            "config_key": config_key(config),
+            "model_config": config,
+            "segments_version": segments_version,
+            "generation_seconds": round(seconds, 3),
+        },
+    )
+    return entry
+
+
+def invalidate(conversation_id: int) -> int:
+    """
+    Mark the conversation's segments as changed and drop its stored summary;
+    returns rows deleted.
+    """
+    Conversation.objects.filter(pk=conversation_id).update(segments_version=F("segments_version") + 1)
+    deleted, _ = ConversationSummary.objects.filter(conversation_id=conversation_id).delete()
+    return deleted
@@ -1,13 +1,20 @@
+import hashlib
 import os
-from io import BytesIO
+import sys
+import tempfile
+from io import BytesIO, StringIO
+from pathlib import Path
 from unittest.mock import MagicMock, patch
 
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import Client, TestCase
+from django.core.management import CommandError, call_command
+from django.test import Client, SimpleTestCase, TestCase, override_settings
 from django.utils import timezone
 
-from conversations.models import Conversation, TranscriptSegment
+from conversations import jobs
+from conversations.models import Conversation, TranscriptionJob, TranscriptSegment
 
 User = get_user_model()
 
@@ -37,6 +44,23 @@ class InsightsCoachSearchTests(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, "No passages matched strongly enough")
 
+    def test_search_bounds_every_slot_wait_on_cold_index(self):
+        import numpy as np
+
+        from conversations import coach_search
+
+        model = MagicMock()
+        model.encode.side_effect = lambda texts, **kw: np.ones((len(texts), 4), dtype=np.float32)
+        with patch.object(coach_search, "_chunk_texts", None), patch.object(
+            coach_search, "_chunk_embeddings", None
+        ), patch.object(coach_search, "_get_model", return_value=model), patch.object(
+            coach_search, "_load_chunk_texts", return_value=["a", "b"]
+        ), patch.object(coach_search, "inference_slot", wraps=coach_search.inference_slot) as slot:
+            coach_search.search("filler words")
+        self.assertEqual([c.args[0] for c in slot.call_args_list], ["embed_kb", "embed_query"])
+        for c in slot.call_args_list:
+            self.assertEqual(c.kwargs["max_wait"], coach_search.INFERENCE_REQUEST_MAX_WAIT_SEC)
+
     def test_post_empty_query_shows_form_error(self):
         response = self.client.post("/insights/", {"query": "   "})
         self.assertEqual(response.status_code, 200)
@@ -125,53 +149,268 @@ class ApiActionItemsErrorTests(TestCase):
         self.assertIn("HF_TOKEN", response.json().get("error", ""))
 
 
+@override_settings(TRANSCRIBE_SPOOL_DIR=tempfile.mkdtemp(prefix="echolabs-spool-"))
 class TranscribeUploadTests(TestCase):
     def setUp(self):
+        cache.clear()  # admission-control token buckets
         self.user = User.objects.create_user("carol", "carol@example.com", "testpass123")
         self.client = Client()
         self.client.force_login(self.user)
 
+    def _upload(self, title="Practice session", name="clip.mp3", quality="full"):
+        audio = SimpleUploadedFile(name, b"not-real-mp3", content_type="audio/mpeg")
+        return self.client.post(
+            "/conversations/transcribe/",
+            {"title": title, "audio": audio, "quality": quality},
+        )
+
     def test_get_shows_form(self):
         response = self.client.get("/conversations/transcribe/")
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, "Transcribe")
+        self.assertContains(response, "5 minutes")
+        with patch("conversations.views.transcribe.MAX_FILE_BYTES", 50 * 1024 * 1024):
+            self.assertContains(self.client.get("/conversations/transcribe/"), "50&nbsp;MB")
 
-    @patch("conversations.views.transcribe.transcribe_audio_file")
-    def test_post_creates_conversation_and_redirects(self, mock_tr):
+    @patch("conversations.jobs.transcribe.transcribe_audio_file")
+    def test_post_queues_job_without_transcribing(self, mock_tr):
+        response = self._upload()
+        job = TranscriptionJob.objects.get(user=self.user)
+        self.assertRedirects(response, f"/conversations/transcribe/jobs/{job.pk}/")
+        self.assertEqual(job.status, TranscriptionJob.Status.PENDING)
+        self.assertTrue(os.path.isfile(job.audio_path))
+        self.assertEqual(job.audio_sha256, hashlib.sha256(b"not-real-mp3").hexdigest())
+        mock_tr.assert_not_called()
+        self.assertFalse(Conversation.objects.filter(user=self.user).exists())
+
+    def test_upload_streams_into_spool_without_copy(self):
+        from conversations import upload_handlers
+
+        self._upload()
+        job = TranscriptionJob.objects.get(user=self.user)
+        spool = Path(job.audio_path).parent
+        self.assertEqual([p.name for p in spool.iterdir() if p.suffix == ".upload"], [])
+        with open(job.audio_path, "rb") as fh:
+            self.assertEqual(fh.read(), b"not-real-mp3")
+
+        with patch.object(upload_handlers, "MAX_FILE_BYTES", 4), patch(
+            "conversations.forms.MAX_FILE_BYTES", 4
+        ):
+            response = self._upload(title="Too big")
+        self.assertContains(response, "File too large")
+        self.assertEqual(TranscriptionJob.objects.filter(user=self.user).count(), 1)
+        self.assertFalse(any(p.suffix == ".upload" for p in spool.iterdir()))
+
+    @patch("conversations.jobs.transcribe.transcribe_audio_file")
+    def test_worker_creates_conversation(self, mock_tr):
         mock_tr.return_value = (
             [("Speaker A", "Hello world."), ("Speaker B", "Second line.")],
             42.7,
         )
-        audio = SimpleUploadedFile(
-            "clip.mp3",
-            b"not-real-mp3",
-            content_type="audio/mpeg",
-        )
-        response = self.client.post(
-            "/conversations/transcribe/",
-            {"title": "Practice session", "audio": audio},
-        )
-        self.assertEqual(response.status_code, 302)
-        conv = Conversation.objects.get(user=self.user, title="Practice session")
-        self.assertEqual(conv.segments.count(), 2)
+        self._upload()
+        job = jobs.claim_next_job()
+        self.assertEqual(job.status, TranscriptionJob.Status.RUNNING)
+        self.assertIsNone(jobs.claim_next_job())
+        jobs.process_job(job)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, TranscriptionJob.Status.DONE)
+        self.assertFalse(os.path.exists(job.audio_path))
+        conv = job.conversation
+        self.assertEqual(conv.title, "Practice session")
         segs = list(conv.segments.order_by("segment_order"))
         self.assertEqual(segs[0].text, "Hello world.")
         self.assertEqual(segs[0].speaker_label, "Speaker A")
         self.assertEqual(segs[1].text, "Second line.")
         self.assertEqual(segs[1].speaker_label, "Speaker B")
         self.assertEqual(conv.duration_seconds, 43)
+        self.assertIn("stages", job.stage_timings)
 
-    @patch("conversations.views.transcribe.transcribe_audio_file")
-    def test_post_value_error_shows_message(self, mock_tr):
-        mock_tr.side_effect = ValueError("No speech detected in the audio.")
-        audio = SimpleUploadedFile("x.wav", BytesIO(b"x").read(), content_type="audio/wav")
-        response = self.client.post(
-            "/conversations/transcribe/",
-            {"title": "Empty", "audio": audio},
+        data = self.client.get(f"/api/transcribe/jobs/{job.pk}/").json()
+        self.assertEqual(data["status"], "done")
+        self.assertEqual(data["conversation_url"], conv.get_absolute_url())
+        response = self.client.get(f"/conversations/transcribe/jobs/{job.pk}/")
+        self.assertRedirects(response, conv.get_absolute_url())
+
+    @patch("conversations.jobs.transcribe.transcribe_audio_file")
+    def test_worker_stores_segment_and_word_timings(self, mock_tr):
+        from conversations import transcribe
+
+        segments = transcribe._compact_segments(
+            [
+                {
+                    "speaker": "SPEAKER_00",
+                    "text": " Um, hello there.",
+                    "start": 61.25,
+                    "end": 62.75,
+                    "words": [
+                        {"word": "Um,", "start": 61.25, "end": 61.5},
+                        {"word": "hello", "start": 61.9, "end": 62.2},
+                        {"word": "there.", "start": 62.3, "end": 62.75},
+                    ],
+                },
+                {
+                    "speaker": None,
+                    "text": "Room 101",
+                    "start": 63.0,
+                    "end": 64.0,
+                    "words": [{"word": "Room", "start": 63.0, "end": 63.4}, {"word": "101"}],
+                },
+            ]
         )
-        self.assertEqual(response.status_code, 200)
+        rows, _ = transcribe._rows_from_segments(segments)
+        mock_tr.return_value = (rows, 64.0)
+        self._upload()
+        jobs.process_job(jobs.claim_next_job())
+
+        first, second = Conversation.objects.get(user=self.user).segments.order_by("segment_order")
+        self.assertEqual((first.start_sec, first.end_sec), (61.25, 62.75))
+        self.assertEqual(len(first.word_timings), 3 * 8)
+        self.assertEqual(
+            first.timed_words(),
+            [("Um,", 61.25, 61.5), ("hello", 61.9, 62.2), ("there.", 62.3, 62.75)],
+        )
+        self.assertEqual(first.words_per_minute, 120.0)
+        self.assertEqual(first.start_clock, "1:01")
+        self.assertEqual(second.timed_words(), [("Room", 63.0, 63.4), ("101", None, None)])
+        response = self.client.get(first.conversation.get_absolute_url())
+        self.assertContains(response, 'data-start="61.250"')
+
+    def test_only_jobs_with_expired_lease_are_requeued(self):
+        self._upload()
+        self._upload()
+        live, dead = jobs.claim_next_job(), jobs.claim_next_job()
+        long_ago = timezone.now() - jobs.JOB_LEASE * 10
+        # Both started long ago; only the live one's worker is still renewing.
+        TranscriptionJob.objects.filter(pk__in=[live.pk, dead.pk]).update(
+            started_at=long_ago, heartbeat_at=long_ago
+        )
+        self.assertTrue(jobs.renew_lease(live.pk))
+        self.assertEqual(jobs.requeue_stale_jobs(), 1)
+        live.refresh_from_db()
+        dead.refresh_from_db()
+        self.assertEqual(live.status, TranscriptionJob.Status.RUNNING)
+        self.assertEqual(dead.status, TranscriptionJob.Status.PENDING)
+        self.assertEqual(jobs.claim_next_job().pk, dead.pk)
+        self.assertFalse(jobs.renew_lease(TranscriptionJob.objects.create(user=self.user, title="x").pk))
+
+    @patch("conversations.jobs.transcribe.transcribe_audio_file")
+    def test_worker_passes_selected_quality(self, mock_tr):
+        mock_tr.return_value = ([("", "Just the words.")], 3.0)
+        self._upload(quality="fast")
+        job = jobs.claim_next_job()
+        self.assertEqual(job.quality, TranscriptionJob.Quality.FAST)
+        jobs.process_job(job)
+        self.assertEqual(mock_tr.call_args.kwargs["quality"], "fast")
+
+    @patch("conversations.jobs.transcribe.transcribe_audio_file")
+    def test_worker_learns_and_reuses_language(self, mock_tr):
+        def fake(path, **kwargs):
+            kwargs["timer"].meta.update(
+                {"language": kwargs["language"] or "de", "language_detected": kwargs["language"] is None}
+            )
+            return [("", "Hallo.")], 2.0
+
+        mock_tr.side_effect = fake
+        for _ in range(3):
+            self._upload()
+            jobs.process_job(jobs.claim_next_job())
+        languages = [c.kwargs["language"] for c in mock_tr.call_args_list]
+        self.assertEqual(languages, [None, None, "de"])
+        self.assertEqual(self.user.profile.preferred_language, "de")
+
+    @patch("conversations.jobs.LANGUAGE_RECHECK_EVERY", 3)
+    @patch("conversations.jobs.transcribe.transcribe_audio_file")
+    def test_sampled_redetection_revises_wrong_language(self, mock_tr):
+        from conversations.models import UserProfile
+
+        UserProfile.objects.create(user=self.user, preferred_language="de")
+
+        def fake(path, **kwargs):
+            kwargs["timer"].meta.update(
+                {"language": kwargs["language"] or "en", "language_detected": kwargs["language"] is None}
+            )
+            return [("", "Hello.")], 2.0
+
+        mock_tr.side_effect = fake
+        for _ in range(5):
+            TranscriptionJob.objects.create(user=self.user, title="t", audio_path="/nonexistent.wav")
+            jobs.process_job(jobs.claim_next_job())
+        # Upload 3 is a re-check; its disagreement is confirmed by upload 4.
+        languages = [c.kwargs["language"] for c in mock_tr.call_args_list]
+        self.assertEqual(languages, ["de", "de", None, None, "en"])
+        self.assertEqual(UserProfile.objects.get(user=self.user).preferred_language, "en")
+
+    @patch("conversations.jobs.transcribe.transcribe_audio_file")
+    def test_progressive_mode_saves_draft_then_replaces_it(self, mock_tr):
+        seen = {}
+
+        def fake(path, **kwargs):
+            if kwargs.get("model_name") == "tiny":
+                self.assertEqual(kwargs["quality"], "fast")
+                kwargs["timer"].meta.update({"language": "en", "language_detected": True})
+                return [("", "draft words")], 5.0
+            job = TranscriptionJob.objects.get(user=self.user)
+            seen["draft"] = list(job.conversation.segments.values_list("text", flat=True))
+            seen["version"] = job.conversation.transcript_version
+            seen["page"] = self.client.get(job.conversation.get_absolute_url())
+            seen["language"] = kwargs["language"]
+            return [("Speaker A", "Final words."), ("Speaker B", "More.")], 5.0
+
+        mock_tr.side_effect = fake
+        self._upload()
+        with patch.object(jobs, "DRAFT_MODEL", "tiny"):
+            jobs.process_job(jobs.claim_next_job())
+
+        self.assertEqual(seen["draft"], ["draft words"])
+        self.assertEqual(seen["version"], "draft")
+        self.assertContains(seen["page"], "Draft — refining")
+        self.assertEqual(seen["language"], "en")
+        job = TranscriptionJob.objects.get(user=self.user)
+        self.assertEqual(job.status, TranscriptionJob.Status.DONE)
+        self.assertIn("draft", job.stage_timings)
+        conv = job.conversation
+        self.assertEqual(conv.transcript_version, "final")
+        self.assertEqual(Conversation.objects.filter(user=self.user).count(), 1)
+        self.assertEqual(list(conv.segments.values_list("text", flat=True)), ["Final words.", "More."])
+        self.assertNotContains(self.client.get(conv.get_absolute_url()), "Draft — refining")
+
+    @patch("conversations.jobs.transcribe.transcribe_audio_file")
+    def test_worker_value_error_marks_job_failed(self, mock_tr):
+        mock_tr.side_effect = ValueError("No speech detected in the audio.")
+        self._upload(title="Empty", name="x.wav")
+        job = jobs.claim_next_job()
+        jobs.process_job(job)
+        job.refresh_from_db()
+        self.assertEqual(job.status, TranscriptionJob.Status.FAILED)
+        response = self.client.get(f"/conversations/transcribe/jobs/{job.pk}/")
         self.assertContains(response, "No speech detected")
 
+    @patch("conversations.jobs.transcribe.transcribe_audio_file")
+    def test_busy_host_requeues_job_then_fails_with_busy_message(self, mock_tr):
+        from conversations.inference_slots import InferenceBusyError
+
+        mock_tr.side_effect = InferenceBusyError(300)
+        self._upload(title="Busy", name="x.wav")
+        for _ in range(jobs.MAX_ATTEMPTS - 1):
+            jobs.process_job(jobs.claim_next_job())
+            job = TranscriptionJob.objects.get(user=self.user)
+            self.assertEqual(job.status, TranscriptionJob.Status.PENDING)
+            self.assertTrue(os.path.exists(job.audio_path))
+        jobs.process_job(jobs.claim_next_job())
+        job.refresh_from_db()
+        self.assertEqual(job.status, TranscriptionJob.Status.FAILED)
+        self.assertIn("server is busy", job.error)
+        self.assertNotIn("HF_TOKEN", job.error)
+
+    def test_job_status_is_private(self):
+        self._upload()
+        job = TranscriptionJob.objects.get(user=self.user)
+        other = User.objects.create_user("dave", "dave@example.com", "testpass123")
+        self.client.force_login(other)
+        response = self.client.get(f"/api/transcribe/jobs/{job.pk}/")
+        self.assertEqual(response.status_code, 403)
+
     def test_wrong_extension_rejected(self):
         audio = SimpleUploadedFile("x.txt", b"x", content_type="text/plain")
         response = self.client.post(
@@ -180,3 +419,1454 @@ class TranscribeUploadTests(TestCase):
         )
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, "Unsupported format")
+
+
+class LongAudioTests(SimpleTestCase):
+    def test_plan_windows_cuts_at_quiet_frames(self):
+        import numpy as np
+
+        from conversations.long_audio import plan_windows
+
+        energy = np.ones(3000, dtype=np.float32)  # 300s at 0.1s frames
+        energy[1230] = 0.0  # quiet point near the 120s boundary
+        energy[2410] = 0.0  # and near 240s
+        windows = plan_windows(energy, frame_sec=0.1, window_sec=120, search_sec=10)
+        self.assertEqual(windows, [(0.0, 123.0), (123.0, 241.0), (241.0, 300.0)])
+
+    def test_short_audio_is_one_window(self):
+        import numpy as np
+
+        from conversations.long_audio import plan_windows
+
+        windows = plan_windows(np.ones(600, dtype=np.float32), frame_sec=0.1, window_sec=120)
+        self.assertEqual(windows, [(0.0, 60.0)])
+
+    def test_reconcile_and_stitch_keep_speakers_across_windows(self):
+        import numpy as np
+
+        from conversations.long_audio import reconcile_speakers, stitch_windows
+
+        alice = np.array([1.0, 0.0, 0.1])
+        bob = np.array([0.0, 1.0, 0.1])
+        results = [
+            {
+                "segments": [
+                    {"text": "Hi", "start": 0.0, "end": 1.0, "speaker": "SPEAKER_00"},
+                    {"text": "Hey", "start": 1.0, "end": 2.0, "speaker": "SPEAKER_01"},
+                ],
+                "embeddings": {"SPEAKER_00": alice, "SPEAKER_01": bob},
+            },
+            {
+                # pyannote numbered the speakers the other way round in window two
+                "segments": [
+                    {"text": "Bye", "start": 125.0, "end": 126.0, "speaker": "SPEAKER_00"},
+                    {"text": "See you", "start": 126.0, "end": 127.0, "speaker": "SPEAKER_01"},
+                ],
+                "embeddings": {"SPEAKER_00": bob * 0.9, "SPEAKER_01": alice * 1.1},
+            },
+        ]
+        mappings = reconcile_speakers([r["embeddings"] for r in results])
+        self.assertEqual(mappings, [{"SPEAKER_00": 0, "SPEAKER_01": 1}, {"SPEAKER_00": 1, "SPEAKER_01": 0}])
+        speakers = [s["speaker"] for s in stitch_windows(results, mappings)]
+        self.assertEqual(speakers, ["SPEAKER_00", "SPEAKER_01", "SPEAKER_01", "SPEAKER_00"])
+
+    def test_speakers_without_embeddings_stay_apart_across_windows(self):
+        from conversations.long_audio import reconcile_speakers, stitch_windows
+
+        import numpy as np
+
+        results = [
+            {
+                "segments": [
+                    {"text": "Hi", "start": 0.0, "end": 1.0, "speaker": "SPEAKER_00"},
+                    {"text": "Yes", "start": 1.0, "end": 2.0, "speaker": "SPEAKER_01"},
+                ],
+                "embeddings": {"SPEAKER_00": np.array([1.0, 0.0])},
+            },
+            {
+                "segments": [
+                    {"text": "Bye", "start": 125.0, "end": 126.0, "speaker": "SPEAKER_00"},
+                    {"text": "No", "start": 126.0, "end": 127.0, "speaker": "SPEAKER_01"},
+                ],
+                "embeddings": {},
+            },
+        ]
+        mappings = reconcile_speakers([r["embeddings"] for r in results])
+        speakers = [s["speaker"] for s in stitch_windows(results, mappings)]
+        self.assertEqual(speakers, ["SPEAKER_00", "SPEAKER_01", "SPEAKER_02", "SPEAKER_03"])
+
+    def test_worker_count_is_capped_at_inference_slots(self):
+        from conversations import long_audio
+
+        with patch.object(long_audio, "INFERENCE_SLOTS", 2), patch.dict(os.environ, {"WHISPER_LONG_WORKERS": "8"}):
+            self.assertEqual(long_audio._worker_count(), 2)
+
+
+class AlignModelCacheTests(SimpleTestCase):
+    def setUp(self):
+        from conversations import transcribe
+        from conversations.model_registry import ModelRegistry
+
+        self.transcribe = transcribe
+        self.registry = ModelRegistry(budget_mb=0)
+        patcher = patch.object(transcribe, "registry", self.registry)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.fake_whisperx = MagicMock()
+        self.fake_whisperx.load_align_model.side_effect = lambda language_code, device: (
+            f"model-{language_code}",
+            {"language": language_code},
+        )
+
+    def test_reuses_model_and_evicts_least_recently_used(self):
+        with patch.dict(sys.modules, {"whisperx": self.fake_whisperx}), patch.object(
+            self.transcribe, "ALIGN_CACHE_SIZE", 2
+        ):
+            self.transcribe._get_align_model("en", "cpu")
+            self.transcribe._get_align_model("de", "cpu")
+            model, _, cached = self.transcribe._get_align_model("en", "cpu")
+            self.assertEqual((model, cached), ("model-en", True))
+            self.assertEqual(self.fake_whisperx.load_align_model.call_count, 2)
+            self.transcribe._get_align_model("fr", "cpu")  # evicts "de"
+            self.assertEqual(
+                self.registry.keys("whisperx_align"),
+                [("whisperx_align", "en", "cpu"), ("whisperx_align", "fr", "cpu")],
+            )
+
+    def test_size_zero_disables_cache(self):
+        with patch.dict(sys.modules, {"whisperx": self.fake_whisperx}), patch.object(
+            self.transcribe, "ALIGN_CACHE_SIZE", 0
+        ):
+            _, _, cached = self.transcribe._get_align_model("en", "cpu")
+            self.transcribe._get_align_model("en", "cpu")
+        self.assertFalse(cached)
+        self.assertEqual(self.fake_whisperx.load_align_model.call_count, 2)
+        self.assertEqual(self.registry.keys(), [])
+
+
+class ModelRegistryTests(TestCase):
+    def test_instance_lock_serializes_calls_into_one_model(self):
+        import threading
+        import time as time_module
+
+        from conversations.model_registry import instance_lock
+
+        class Pipeline:
+            active = peak = 0
+
+            def transcribe(self):
+                Pipeline.active += 1
+                Pipeline.peak = max(Pipeline.peak, Pipeline.active)
+                time_module.sleep(0.01)
+                Pipeline.active -= 1
+
+        model = Pipeline()
+        self.assertIs(instance_lock(model), instance_lock(model))
+        self.assertIsNot(instance_lock(model), instance_lock(Pipeline()))
+
+        def call():
+            with instance_lock(model):
+                model.transcribe()
+
+        threads = [threading.Thread(target=call) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(Pipeline.peak, 1)
+
+    def test_evicts_least_recently_used_over_budget(self):
+        from conversations.model_registry import ModelRegistry
+
+        reg = ModelRegistry(budget_mb=1000)
+        reg.get(("asr",), lambda: "asr-model", size_mb=400)
+        reg.get(("summarizer",), lambda: "bart", size_mb=400)
+        self.assertEqual(reg.get(("asr",), lambda: "reloaded"), "asr-model")  # asr now most recent
+        reg.get(("embedder",), lambda: "mpnet", size_mb=400)
+        self.assertEqual(reg.keys(), [("asr",), ("embedder",)])
+        self.assertEqual(reg.residency()["resident_mb"], 800)
+
+    @staticmethod
+    def _hammer(fn, n=16):
+        import threading
+
+        barrier = threading.Barrier(n)
+        results, errors = [], []
+
+        def worker():
+            barrier.wait()
+            try:
+                results.append(fn())
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker) for _ in range(n)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(10)
+        return results, errors
+
+    def test_concurrent_first_loads_run_loader_once(self):
+        import time
+
+        from conversations.model_registry import ModelRegistry
+
+        reg = ModelRegistry(budget_mb=0)
+        loads = []
+
+        def slow_loader():
+            loads.append(1)
+            time.sleep(0.2)
+            return object()
+
+        results, errors = self._hammer(lambda: reg.get(("summarizer",), slow_loader, size_mb=1))
+        self.assertEqual(errors, [])
+        self.assertEqual(len(loads), 1)
+        self.assertEqual(len(results), 16)
+        self.assertTrue(all(r is results[0] for r in results))
+
+    def test_failed_load_is_shared_then_retried(self):
+        import time
+
+        from conversations.model_registry import ModelRegistry
+
+        reg = ModelRegistry(budget_mb=0)
+        calls = []
+
+        def failing_loader():
+            calls.append(1)
+            time.sleep(0.2)
+            raise OSError("weights missing")
+
+        results, errors = self._hammer(lambda: reg.get(("asr",), failing_loader), n=8)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(errors), 8)
+        self.assertEqual(reg.get(("asr",), lambda: "ok", size_mb=1), "ok")
+
+    def test_coach_index_builds_once_under_concurrency(self):
+        import time
+
+        import numpy as np
+
+        from conversations import coach_search
+
+        model = MagicMock()
+
+        def slow_encode(texts, **kwargs):
+            time.sleep(0.2)
+            return np.ones((len(texts), 4), dtype=np.float32)
+
+        model.encode.side_effect = slow_encode
+        with patch.object(coach_search, "_chunk_texts", None), patch.object(
+            coach_search, "_chunk_embeddings", None
+        ), patch.object(coach_search, "_get_model", return_value=model), patch.object(
+            coach_search, "_load_chunk_texts", return_value=["a", "b", "c"]
+        ):
+            _, errors = self._hammer(coach_search._ensure_index)
+            self.assertEqual(coach_search._chunk_embeddings.shape, (3, 4))
+        self.assertEqual(errors, [])
+        self.assertEqual(model.encode.call_count, 1)
+
+    def test_estimates_numpy_size(self):
+        import numpy as np
+
+        from conversations.model_registry import estimate_size_mb
+
+        self.assertAlmostEqual(estimate_size_mb((np.zeros(262144, dtype=np.float32), {})), 1.0)
+
+    def test_residency_endpoint_is_staff_only(self):
+        user = User.objects.create_user("frank", "frank@example.com", "testpass123")
+        client = Client()
+        client.force_login(user)
+        self.assertEqual(client.get("/api/models/").status_code, 403)
+        user.is_staff = True
+        user.save()
+        data = client.get("/api/models/").json()
+        self.assertIn("budget_mb", data)
+        self.assertIn("models", data)
+
+
+class TranscriptCacheTests(TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".wav")
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(b"fake-audio-bytes")
+        self.addCleanup(os.unlink, self.path)
+
+    def test_hit_skips_pipeline(self):
+        from conversations import transcribe, transcript_cache
+
+        sha = transcript_cache.file_sha256(self.path)
+        transcript_cache.store(
+            sha,
+            [
+                {"speaker": "SPEAKER_00", "text": "Hello again.", "start": 0.0, "end": 1.5},
+                {"speaker": "SPEAKER_01", "text": "Welcome back.", "start": 1.5, "end": 3.0},
+            ],
+            3.0,
+        )
+        with patch.dict(sys.modules, {"whisperx": MagicMock()}), patch.object(
+            transcribe, "_run_pipeline"
+        ) as run:
+            rows, duration = transcribe.transcribe_audio_file(self.path)
+        run.assert_not_called()
+        self.assertEqual(
+            rows,
+            [
+                transcribe.TranscriptRow("Speaker A", "Hello again.", 0.0, 1.5),
+                transcribe.TranscriptRow("Speaker B", "Welcome back.", 1.5, 3.0),
+            ],
+        )
+        self.assertEqual(duration, 3.0)
+
+    def test_model_change_misses(self):
+        from conversations import transcript_cache
+
+        transcript_cache.store("abc", [{"speaker": None, "text": "Hi", "start": 0, "end": 1}], 1.0)
+        self.assertIsNotNone(transcript_cache.lookup("abc"))
+        with patch.dict(os.environ, {"WHISPER_MODEL": "large-v3"}):
+            self.assertIsNone(transcript_cache.lookup("abc"))
+
+    def test_prune_by_age_then_size(self):
+        from conversations import transcript_cache
+        from conversations.models import TranscriptCacheEntry
+
+        for name in ("old", "lru", "fresh"):
+            transcript_cache.store(name, [{"speaker": None, "text": "x" * 400_000}], 1.0)
+        now = timezone.now()
+        TranscriptCacheEntry.objects.filter(audio_sha256="old").update(
+            last_used_at=now - timezone.timedelta(days=90)
+        )
+        TranscriptCacheEntry.objects.filter(audio_sha256="lru").update(
+            last_used_at=now - timezone.timedelta(days=1)
+        )
+        deleted = transcript_cache.prune(max_age_days=30, max_mb=0)
+        self.assertEqual(deleted, 3)
+        for name in ("old", "lru", "fresh"):
+            transcript_cache.store(name, [{"speaker": None, "text": "x" * 400_000}], 1.0)
+        TranscriptCacheEntry.objects.filter(audio_sha256="lru").update(
+            last_used_at=now - timezone.timedelta(days=1)
+        )
+        self.assertEqual(transcript_cache.prune(max_age_days=30, max_mb=1), 1)
+        self.assertFalse(TranscriptCacheEntry.objects.filter(audio_sha256="lru").exists())
+
+
+class _FakeFfmpeg:
+    """Stands in for the ffmpeg Popen used by transcribe.decode_audio."""
+
+    def __init__(self, header: bytes, pcm: bytes):
+        self.stdout = BytesIO(pcm)
+        self.stderr = BytesIO(header)
+        self.returncode = None
+        self.killed = False
+
+    def kill(self):
+        self.killed = True
+
+    def wait(self):
+        self.returncode = -9 if self.killed else 0
+        return self.returncode
+
+
+class DecodeAudioTests(SimpleTestCase):
+    def _decode(self, header, seconds, max_sec):
+        import numpy as np
+
+        from conversations import transcribe
+
+        pcm = (np.full(int(seconds * transcribe.SAMPLE_RATE), 16384, dtype=np.int16)).tobytes()
+        fake = _FakeFfmpeg(header, pcm)
+        with patch("conversations.transcribe.subprocess.Popen", return_value=fake) as popen:
+            try:
+                return transcribe.decode_audio("clip.m4a", max_sec), fake
+            finally:
+                self.assertEqual(popen.call_count, 1)
+
+    def test_decodes_once_to_float_buffer(self):
+        audio, fake = self._decode(b"  Duration: 00:00:02.00, start: 0.000000\n", 2, 300)
+        self.assertEqual(len(audio), 32000)
+        self.assertAlmostEqual(float(audio[0]), 0.5)
+        self.assertFalse(fake.killed)
+
+    def test_decodes_into_memory_mapped_buffer(self):
+        import numpy as np
+
+        from conversations import transcribe
+
+        with patch.object(transcribe, "DECODE_TO_DISK", True):
+            audio, _ = self._decode(b"", 3, 300)
+        self.assertIsInstance(audio, np.memmap)
+        self.assertEqual(len(audio), 48000)
+        self.assertAlmostEqual(float(audio[-1]), 0.5)
+        with patch.object(transcribe, "DECODE_TO_DISK", False):
+            audio, _ = self._decode(b"", 3, 300)
+        self.assertNotIsInstance(audio, np.memmap)
+        self.assertEqual(len(audio), 48000)
+
+    def test_header_duration_rejects_before_decoding(self):
+        from conversations.transcribe import AudioTooLongError
+
+        with self.assertRaises(AudioTooLongError) as ctx:
+            self._decode(b"  Duration: 00:10:00.00, start: 0.000000\n", 1, 300)
+        self.assertEqual(ctx.exception.duration, 600)
+
+    def test_missing_header_duration_capped_by_samples(self):
+        from conversations.transcribe import AudioTooLongError
+
+        with self.assertRaises(AudioTooLongError):
+            self._decode(b"  Duration: N/A, start: 0.000000\n", 5, 2)
+
+
+class StageTimingTests(TestCase):
+    def test_timer_records_stages_and_merges(self):
+        from conversations.stage_timing import StageTimer, percentile
+
+        timer = StageTimer()
+        with timer.stage("asr"):
+            pass
+        timer.merge({"asr": {"seconds": 1.5}, "diarize": {"seconds": 2.0, "rss_mb": 900.0}})
+        data = timer.as_dict()
+        self.assertGreaterEqual(data["stages"]["asr"]["seconds"], 1.5)
+        self.assertEqual(data["stages"]["diarize"]["rss_mb"], 900.0)
+        self.assertEqual(percentile([5, 1, 3, 2, 4], 50), 3)
+        self.assertEqual(percentile([5, 1, 3, 2, 4], 95), 5)
+
+    def test_memory_is_current_rss_per_stage_not_process_peak(self):
+        from conversations import stage_timing
+
+        readings = iter([1000.0, 1800.0, 600.0, 650.0])
+        timer = stage_timing.StageTimer()
+        with patch.object(stage_timing, "_current_rss_mb", side_effect=lambda: next(readings)):
+            with timer.stage("diarize"):
+                pass
+            with timer.stage("assign_speakers"):
+                pass
+        self.assertEqual(timer.stages["diarize"]["rss_mb"], 1800.0)
+        self.assertEqual(timer.stages["diarize"]["rss_delta_mb"], 800.0)
+        # Memory freed after diarization shows up in the next stage.
+        self.assertEqual(timer.stages["assign_speakers"]["rss_mb"], 650.0)
+        self.assertEqual(timer.stages["assign_speakers"]["rss_delta_mb"], 50.0)
+        if sys.platform.startswith("linux"):
+            self.assertGreater(stage_timing._current_rss_mb(), 0)
+
+    def test_stats_command_reports_per_model_percentiles(self):
+        user = User.objects.create_user("erin", "erin@example.com", "testpass123")
+        for seconds in (1.0, 2.0, 9.0):
+            TranscriptionJob.objects.create(
+                user=user,
+                title="t",
+                audio_path="/tmp/x.wav",
+                status=TranscriptionJob.Status.DONE,
+                finished_at=timezone.now(),
+                stage_timings={
+                    "total_seconds": seconds * 2,
+                    "stages": {"asr": {"seconds": seconds}},
+                    "meta": {"model": "base", "device": "cpu", "audio_seconds": 60.0},
+                },
+            )
+        out = StringIO()
+        call_command("transcribe_stats", stdout=out)
+        text = out.getvalue()
+        self.assertIn("base on cpu (3 runs)", text)
+        self.assertRegex(text, r"asr\s+3\s+2\.00\s+9\.00")
+
+
+class QualityTierTests(SimpleTestCase):
+    def _run(self, quality):
+        from conversations import transcribe
+
+        model = MagicMock()
+        model.transcribe.return_value = {
+            "segments": [{"text": " Hi there.", "start": 0.0, "end": 1.0}],
+            "language": "en",
+        }
+        fake_whisperx = MagicMock()
+        fake_whisperx.align.return_value = {"segments": [{"text": "Hi there.", "start": 0.1, "end": 0.9}]}
+        with patch.dict(sys.modules, {"whisperx": fake_whisperx}), patch.object(
+            transcribe, "_get_asr_model", return_value=(model, "cpu")
+        ), patch.object(
+            transcribe, "_get_align_model", return_value=("align", {}, True)
+        ) as get_align, patch.object(transcribe, "_get_diarize_pipeline") as get_diarize:
+            segments, _ = transcribe._run_pipeline([0.0] * 16000, None, quality=quality)
+        return segments, get_align, get_diarize
+
+    def test_language_is_passed_per_call(self):
+        from conversations import transcribe
+        from conversations.stage_timing import StageTimer
+
+        model = MagicMock()
+        model.transcribe.return_value = {"segments": [{"text": "Hola.", "start": 0.0, "end": 1.0}]}
+        timer = StageTimer()
+        with patch.dict(sys.modules, {"whisperx": MagicMock()}), patch.object(
+            transcribe, "_get_asr_model", return_value=(model, "cpu")
+        ):
+            transcribe._run_pipeline([0.0] * 16000, None, quality="fast", timer=timer, language="es")
+        self.assertEqual(model.transcribe.call_args.kwargs["language"], "es")
+        self.assertEqual(timer.meta["language"], "es")
+        self.assertFalse(timer.meta["language_detected"])
+
+    def test_call_without_language_detects_despite_previous_language(self):
+        from types import SimpleNamespace
+
+        from conversations import transcribe
+        from conversations.stage_timing import StageTimer
+
+        class StickyPipeline:
+            """Like FasterWhisperPipeline: detection only runs while no tokenizer is set."""
+
+            tokenizer = None
+
+            def transcribe(self, audio, batch_size, language=None):
+                if self.tokenizer is None:
+                    language = language or "en"  # detected
+                else:
+                    language = language or self.tokenizer.language_code
+                self.tokenizer = SimpleNamespace(language_code=language)
+                return {"segments": [{"text": "Hi.", "start": 0.0, "end": 1.0}], "language": language}
+
+        model = StickyPipeline()
+        timers = [StageTimer(), StageTimer()]
+        with patch.dict(sys.modules, {"whisperx": MagicMock()}), patch.object(
+            transcribe, "_get_asr_model", return_value=(model, "cpu")
+        ), patch.object(transcribe, "TRIM_SILENCE", False):
+            # User A has German learned; user B has no preference.
+            transcribe._run_pipeline([0.0] * 16000, None, quality="fast", timer=timers[0], language="de")
+            transcribe._run_pipeline([0.0] * 16000, None, quality="fast", timer=timers[1])
+        self.assertEqual(timers[1].meta["language"], "en")
+        self.assertTrue(timers[1].meta["language_detected"])
+
+    def test_fast_runs_asr_only(self):
+        segments, get_align, get_diarize = self._run("fast")
+        self.assertEqual(segments[0]["text"], " Hi there.")
+        get_align.assert_not_called()
+        get_diarize.assert_not_called()
+
+    def test_aligned_skips_diarization(self):
+        segments, get_align, get_diarize = self._run("aligned")
+        self.assertEqual(segments[0]["start"], 0.1)
+        get_align.assert_called_once()
+        get_diarize.assert_not_called()
+
+
+class StreamingTranscriberTests(SimpleTestCase):
+    @staticmethod
+    def _pcm(seconds):
+        return b"\x00\x00" * int(seconds * 16000)
+
+    def test_stable_segments_finalize_and_tail_stays_partial(self):
+        from conversations.streaming import StreamingTranscriber
+
+        calls = []
+
+        def fake_asr(audio, language):
+            calls.append((len(audio), language))
+            return [
+                {"text": " Hello there.", "start": 0.0, "end": 0.4},
+                {"text": " How are", "start": 1.5, "end": 2.0},
+            ], "en"
+
+        st = StreamingTranscriber(asr=fake_asr)
+        self.assertEqual(st.feed(self._pcm(1)), [])
+        events = st.feed(self._pcm(1))
+        self.assertEqual(
+            events,
+            [
+                {"type": "final", "text": "Hello there.", "start": 0.0, "end": 0.4},
+                {"type": "partial", "text": "How are"},
+            ],
+        )
+        # Finalized audio is dropped; the detected language is reused.
+        events = st.feed(self._pcm(2))
+        self.assertEqual(calls[-1], (int(3.6 * 16000), "en"))
+        self.assertEqual(events[0], {"type": "final", "text": "Hello there.", "start": 0.4, "end": 0.8})
+        self.assertEqual(events[1]["type"], "final")
+        final = st.flush()
+        self.assertEqual([e["type"] for e in final], ["final", "final"])
+        self.assertEqual(st.duration, 4.0)
+
+    def test_full_window_of_one_utterance_is_finalized_not_dropped(self):
+        from conversations import streaming
+
+        def one_long_utterance(audio, language):
+            return [{"text": f" words up to {len(audio) // 16000}", "start": 0.0, "end": len(audio) / 16000}], "en"
+
+        st = streaming.StreamingTranscriber(asr=one_long_utterance)
+        finals = []
+        with patch.object(streaming, "WINDOW_SEC", 30.0):
+            for _ in range(20):
+                finals += [e for e in st.feed(self._pcm(2)) if e["type"] == "final"]
+            finals += st.flush()
+        self.assertEqual(
+            [(e["start"], e["end"]) for e in finals], [(0.0, 30.0), (30.0, 40.0)]
+        )
+        self.assertEqual(finals[0]["text"], "words up to 30")
+
+
+class LiveTranscribeSocketTests(TestCase):
+    def _communicate(self, headers, frames, asr=None):
+        from asgiref.sync import async_to_sync
+        from asgiref.testing import ApplicationCommunicator
+
+        from conversations import streaming
+
+        async def run():
+            comm = ApplicationCommunicator(
+                streaming.websocket_transcribe,
+                {"type": "websocket", "path": "/ws/transcribe/", "query_string": b"title=Standup", "headers": headers},
+            )
+            await comm.send_input({"type": "websocket.connect"})
+            for frame in frames:
+                await comm.send_input(frame)
+            await comm.wait(timeout=5)
+            out = []
+            while not comm.output_queue.empty():
+                out.append(comm.output_queue.get_nowait())
+            return out
+
+        def fake_asr(audio, language):
+            return [{"text": " Morning all.", "start": 0.0, "end": 0.5}], "en"
+
+        with patch.object(streaming, "_asr_window", asr or fake_asr):
+            return async_to_sync(run)()
+
+    def _cookie(self, username="live"):
+        user = get_user_model().objects.create_user(username=username, password="pw")
+        client = Client()
+        client.force_login(user)
+        return user, (b"cookie", f"sessionid={client.cookies['sessionid'].value}".encode())
+
+    def test_rejects_anonymous(self):
+        out = self._communicate([], [])
+        self.assertEqual(out, [{"type": "websocket.close", "code": 4401}])
+
+    def test_rejects_cross_site_origin(self):
+        _, cookie = self._cookie()
+        out = self._communicate([cookie, (b"origin", b"https://evil.example")], [])
+        self.assertEqual(out, [{"type": "websocket.close", "code": 4403}])
+        out = self._communicate(
+            [cookie, (b"origin", b"http://localhost:8000")], [{"type": "websocket.receive", "text": '{"type": "stop"}'}]
+        )
+        self.assertEqual(out[0], {"type": "websocket.accept"})
+
+    def test_client_disconnect_saves_without_sending(self):
+        user, cookie = self._cookie()
+        out = self._communicate(
+            [cookie],
+            [
+                {"type": "websocket.receive", "bytes": b"\x00\x00" * 16000},
+                {"type": "websocket.disconnect", "code": 1001},
+            ],
+        )
+        self.assertEqual(out[-1]["type"], "websocket.send")
+        self.assertIn('"started"', out[-1]["text"])
+        conv = Conversation.objects.get(user=user)
+        self.assertEqual(list(conv.segments.values_list("text", flat=True)), ["Morning all."])
+
+    def test_asr_failure_closes_1011_and_leaves_no_empty_conversation(self):
+        user, cookie = self._cookie()
+
+        def broken_asr(audio, language):
+            raise RuntimeError("CUDA out of memory")
+
+        with self.assertLogs("conversations.streaming", "ERROR"):
+            out = self._communicate(
+                [cookie], [{"type": "websocket.receive", "bytes": b"\x00\x00" * 32000}], asr=broken_asr
+            )
+        self.assertEqual(out[-1], {"type": "websocket.close", "code": 1011})
+        self.assertFalse(Conversation.objects.filter(user=user).exists())
+
+    def test_no_free_inference_slot_closes_1013(self):
+        from conversations.inference_slots import InferenceBusyError
+
+        user, cookie = self._cookie()
+
+        def busy_asr(audio, language):
+            raise InferenceBusyError(20)
+
+        with self.assertLogs("conversations.streaming", "WARNING"):
+            out = self._communicate(
+                [cookie], [{"type": "websocket.receive", "bytes": b"\x00\x00" * 32000}], asr=busy_asr
+            )
+        self.assertEqual(out[-1], {"type": "websocket.close", "code": 1013})
+        self.assertFalse(Conversation.objects.filter(user=user).exists())
+
+    def test_persists_final_segments(self):
+        user, cookie = self._cookie()
+        out = self._communicate(
+            [cookie],
+            [
+                {"type": "websocket.receive", "bytes": b"\x00\x00" * 32000},
+                {"type": "websocket.receive", "text": '{"type": "stop"}'},
+            ],
+        )
+        self.assertEqual(out[0], {"type": "websocket.accept"})
+        conv = Conversation.objects.get(user=user)
+        self.assertEqual(conv.title, "Standup")
+        self.assertEqual(list(conv.segments.values_list("text", flat=True)), ["Morning all.", "Morning all."])
+        self.assertEqual(conv.duration_seconds, 2)
+        self.assertEqual(out[-1], {"type": "websocket.close", "code": 1000})
+
+
+class WarmupTests(SimpleTestCase):
+    def test_parse_targets(self):
+        from conversations import warmup
+
+        self.assertEqual(warmup.parse_targets(""), [])
+        self.assertEqual(warmup.parse_targets("1"), ["coach", "summarizer"])
+        self.assertEqual(warmup.parse_targets("all"), list(warmup.ALL_TARGETS))
+        self.assertEqual(warmup.parse_targets(" asr, align "), ["asr", "align"])
+        with self.assertRaises(ValueError):
+            warmup.parse_targets("asr,gpu")
+
+    def test_failures_are_reported_not_raised(self):
+        from conversations import warmup
+
+        with patch.dict(
+            warmup._WARMERS,
+            {"coach": MagicMock(), "summarizer": MagicMock(side_effect=ImportError("no transformers"))},
+        ), patch.dict(os.environ, {"ECHOLABS_WARMUP": "coach,summarizer,asr"}), patch("gc.freeze"):
+            report = warmup.warm_up_from_env(only=warmup.WEB_TARGETS)
+        self.assertEqual(set(report), {"coach", "summarizer"})
+        self.assertEqual(report["coach"]["status"], "ok")
+        self.assertEqual(report["summarizer"]["status"], "error")
+        self.assertIn("no transformers", report["summarizer"]["error"])
+
+
+    def test_coach_warmup_loads_weights_and_embeds_only_after_fork(self):
+        import threading
+
+        from conversations import coach_search, warmup
+
+        with patch.object(coach_search, "_get_model") as get_model, patch.object(
+            coach_search, "_ensure_index"
+        ) as ensure_index, patch.object(warmup, "_index_after_fork_registered", False), patch.object(
+            warmup.os, "register_at_fork"
+        ) as register_at_fork:
+            warmup._warm_coach()
+            get_model.assert_called_once()
+            ensure_index.assert_not_called()
+            child_hook = register_at_fork.call_args.kwargs["after_in_child"]
+            child_hook()
+            for t in threading.enumerate():
+                if t.name == "coach-index":
+                    t.join(5)
+            ensure_index.assert_called_once()
+
+
+class TranscribeBatchCommandTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username="batch", password="pw")
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        for name in ("a.wav", "b.m4a", "notes.txt", "bad.mp3"):
+            with open(os.path.join(self.tmp.name, name), "wb") as fh:
+                fh.write(b"x")
+
+    def _run(self, fake):
+        out = StringIO()
+        with patch("conversations.transcribe.transcribe_audio_file", side_effect=fake), patch(
+            "conversations.warmup.warm_up"
+        ):
+            call_command(
+                "transcribe_batch", self.tmp.name, user="batch", quality="fast",
+                workers=2, commit_every=1, stdout=out, stderr=StringIO(),
+            )
+        return out.getvalue()
+
+    def test_transcribes_directory_and_resumes_from_checkpoint(self):
+        def fake(path, quality, **kwargs):
+            if path.endswith("bad.mp3"):
+                raise ValueError("No speech detected in the audio.")
+            return [("", "Hello."), ("", "Bye.")], 30.0
+
+        out = self._run(fake)
+        self.assertIn("Transcribed 2 file(s), 1 failed", out)
+        self.assertEqual(
+            sorted(Conversation.objects.filter(user=self.user).values_list("title", flat=True)), ["a", "b"]
+        )
+        self.assertEqual(TranscriptSegment.objects.filter(conversation__user=self.user).count(), 4)
+
+        second = MagicMock()
+        out = self._run(second)
+        self.assertIn("3 already handled, 0 to transcribe", out)
+        second.assert_not_called()
+        self.assertEqual(Conversation.objects.filter(user=self.user).count(), 2)
+
+    def test_resume_without_checkpoint_does_not_duplicate(self):
+        def fake(path, quality, **kwargs):
+            if path.endswith("bad.mp3"):
+                raise ValueError("No speech detected in the audio.")
+            return [("", "Hello.")], 10.0
+
+        self._run(fake)
+        os.unlink(os.path.join(self.tmp.name, ".transcribe_batch.json"))  # crash before checkpoint
+        second = MagicMock(return_value=([("", "Hello.")], 10.0))
+        out = self._run(second)
+        self.assertIn("2 already handled, 1 to transcribe", out)
+        self.assertEqual(second.call_args.args[0], os.path.realpath(os.path.join(self.tmp.name, "bad.mp3")))
+        self.assertEqual(
+            sorted(Conversation.objects.filter(user=self.user).values_list("title", flat=True)), ["a", "b", "bad"]
+        )
+
+
+class SilenceTrimTests(SimpleTestCase):
+    @staticmethod
+    def _clip():
+        import numpy as np
+
+        sr = 16000
+        rng = np.random.default_rng(0)
+        speech = lambda sec: (0.2 * np.sin(np.arange(int(sec * sr)) * 0.3)).astype(np.float32)
+        silence = lambda sec: (1e-4 * rng.standard_normal(int(sec * sr))).astype(np.float32)
+        # speech 0-2s, silence 2-12s, speech 12-13s, silence 13-15s
+        return np.concatenate([speech(2), silence(10), speech(1), silence(2)])
+
+    def test_regions_and_offset_map(self):
+        from conversations import vad
+
+        audio = self._clip()
+        regions = vad.speech_regions(audio)
+        self.assertEqual(len(regions), 2)
+        self.assertAlmostEqual(regions[1][0] / 16000, 12 - vad.PAD_SEC, delta=0.05)
+        compacted, offsets = vad.compact(audio, regions)
+        self.assertLess(len(compacted), len(audio) * 0.4)
+        second = offsets.pieces[1][0]  # where region 2 starts in the compacted audio
+        segs = [{"start": second + 0.25, "end": second + 0.75, "words": [{"start": second + 0.3}]}]
+        offsets.remap_segments(segs)
+        self.assertAlmostEqual(segs[0]["start"], 12.0, delta=0.05)
+        self.assertAlmostEqual(segs[0]["end"], 12.5, delta=0.05)
+        self.assertAlmostEqual(segs[0]["words"][0]["start"], 12.05, delta=0.05)
+
+    def test_pipeline_runs_on_speech_only_and_maps_back(self):
+        from conversations import transcribe
+        from conversations.stage_timing import StageTimer
+
+        audio = self._clip()
+        seen = {}
+
+        def fake_stages(trimmed, hf_token, **kwargs):
+            seen["len"] = len(trimmed)
+            end = len(trimmed) / 16000
+            return [{"text": "Later words.", "start": end - 0.5, "end": end}], {}
+
+        timer = StageTimer()
+        with patch.object(transcribe, "_run_stages", side_effect=fake_stages), patch.object(
+            transcribe, "TRIM_SILENCE", True
+        ):
+            segments, _ = transcribe._run_pipeline(audio, None, quality="fast", timer=timer)
+        self.assertLess(seen["len"], len(audio) * 0.4)
+        self.assertGreater(timer.meta["vad_skipped_fraction"], 0.6)
+        self.assertAlmostEqual(segments[0]["end"], 13.25, delta=0.05)
+
+
+class InferenceSlotTests(SimpleTestCase):
+    def setUp(self):
+        from conversations import inference_slots
+
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        for name, value in (("INFERENCE_LOCK_DIR", Path(tmp.name)), ("INFERENCE_SLOTS", 1)):
+            patcher = patch.object(inference_slots, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.slots = inference_slots
+
+    def test_second_caller_waits_then_times_out(self):
+        import threading
+
+        from conversations.stage_timing import StageTimer
+
+        held, release = threading.Event(), threading.Event()
+
+        def holder():
+            with self.slots.inference_slot("asr"):
+                held.set()
+                release.wait(5)
+
+        t = threading.Thread(target=holder)
+        t.start()
+        held.wait(5)
+        self.assertEqual(self.slots.slot_status()["busy"], 1)
+        with self.assertRaises(self.slots.InferenceBusyError):
+            with self.slots.inference_slot("summarize", max_wait=0.2):
+                pass
+        threading.Timer(0.2, release.set).start()
+        timer = StageTimer()
+        with self.slots.inference_slot("summarize", timer=timer, max_wait=5):
+            # Nested use in the same thread does not deadlock on the single slot.
+            with self.slots.inference_slot("embed_query", max_wait=0.1):
+                pass
+        t.join()
+        self.assertGreater(timer.stages["slot_wait"]["seconds"], 0.1)
+        self.assertEqual(self.slots.slot_status()["busy"], 0)
+
+
+    def test_thread_queued_behind_shared_model_holds_no_slot(self):
+        import threading
+        import time
+
+        from conversations import transcribe
+
+        running, release = threading.Event(), threading.Event()
+
+        def slow_transcribe(audio, batch_size, language):
+            running.set()
+            release.wait(5)
+            return {"segments": []}
+
+        model = MagicMock()
+        model.transcribe.side_effect = slow_transcribe
+        call = lambda: transcribe._asr_transcribe(model, [0.0], batch_size=1, language="en")
+        with patch.object(self.slots, "INFERENCE_SLOTS", 2):
+            threads = [threading.Thread(target=call) for _ in range(2)]
+            for t in threads:
+                t.start()
+            running.wait(5)
+            time.sleep(0.1)
+            self.assertEqual(self.slots.slot_status()["busy"], 1)
+            with self.slots.inference_slot("summarize", max_wait=0.1):
+                pass
+            release.set()
+            for t in threads:
+                t.join()
+        self.assertEqual(model.transcribe.call_count, 2)
+
+
+class SpeakerBankTests(TestCase):
+    def test_same_voice_keeps_name_across_conversations(self):
+        import numpy as np
+
+        from conversations import transcribe
+        from conversations.models import KnownSpeaker
+        from conversations.speaker_bank import SpeakerBank
+
+        user = get_user_model().objects.create_user(username="spk", password="pw")
+        rng = np.random.default_rng(1)
+        alice, bob = rng.standard_normal(192), rng.standard_normal(192)
+
+        first = SpeakerBank(user).identify({"SPEAKER_00": alice, "SPEAKER_01": bob})
+        self.assertEqual(first, {"SPEAKER_00": "Speaker 1", "SPEAKER_01": "Speaker 2"})
+        KnownSpeaker.objects.filter(user=user, name="Speaker 2").update(name="Bob")
+
+        # Next recording: ids swapped, slightly different embeddings, plus a stranger.
+        # SPEAKER_03 spoke too briefly to get an embedding.
+        noisy = lambda v: v + 0.1 * rng.standard_normal(192)
+        second = SpeakerBank(user).identify(
+            {"SPEAKER_00": noisy(bob), "SPEAKER_01": noisy(alice), "SPEAKER_02": rng.standard_normal(192)},
+            other_ids={"SPEAKER_00", "SPEAKER_03"},
+        )
+        self.assertEqual(
+            second,
+            {"SPEAKER_00": "Bob", "SPEAKER_01": "Speaker 1", "SPEAKER_02": "Speaker 3", "SPEAKER_03": "Speaker 4"},
+        )
+        self.assertEqual(KnownSpeaker.objects.get(user=user, name="Bob").observations, 2)
+        self.assertEqual(KnownSpeaker.objects.get(user=user, name="Speaker 4").dim, 0)
+
+        rows, _ = transcribe._rows_from_segments(
+            [{"speaker": "SPEAKER_00", "text": "Hi"}, {"speaker": "SPEAKER_03", "text": "Yo"}],
+            second,
+        )
+        self.assertEqual([(r.speaker_label, r.text) for r in rows], [("Bob", "Hi"), ("Speaker 4", "Yo")])
+
+    def test_prune_never_deletes_renamed_speakers(self):
+        import numpy as np
+
+        from conversations import speaker_bank
+        from conversations.models import KnownSpeaker
+
+        user = get_user_model().objects.create_user(username="spk2", password="pw")
+        rng = np.random.default_rng(2)
+        with patch.object(speaker_bank, "MAX_KNOWN_SPEAKERS", 2):
+            speaker_bank.SpeakerBank(user).identify({"SPEAKER_00": rng.standard_normal(16)})
+            KnownSpeaker.objects.filter(user=user).update(name="Mum")
+            for _ in range(3):
+                speaker_bank.SpeakerBank(user).identify({"SPEAKER_00": rng.standard_normal(16)})
+        names = set(KnownSpeaker.objects.filter(user=user).values_list("name", flat=True))
+        self.assertIn("Mum", names)
+        self.assertEqual(len(names), 2)
+
+
+@override_settings(TRANSCRIBE_SPOOL_DIR=tempfile.mkdtemp(prefix="echolabs-spool-"))
+@patch("conversations.summary_cache.ENABLED", False)
+class AdmissionControlTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("erin", "erin@example.com", "testpass123")
+        self.conv = Conversation.objects.create(user=self.user, title="T", recorded_at=timezone.now())
+        TranscriptSegment.objects.create(conversation=self.conv, text="Hello.", segment_order=1)
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_concurrent_requests_never_spend_the_same_token(self):
+        import threading
+        import time as time_module
+
+        from conversations import admission
+
+        class SlowCache:
+            """Widens the window between reading and writing a bucket."""
+
+            def get(self, key):
+                value = cache.get(key)
+                time_module.sleep(0.01)
+                return value
+
+            def set(self, key, value, timeout=None):
+                cache.set(key, value, timeout=timeout)
+
+        results = []
+        with patch.object(admission, "cache", SlowCache()), patch.dict(
+            admission.RATES, {"summarize": (1, 5)}
+        ), tempfile.TemporaryDirectory() as lock_dir, patch.object(admission, "ADMISSION_LOCK_DIR", Path(lock_dir)):
+            threads = [
+                threading.Thread(target=lambda: results.append(admission.take_token("summarize", 42)))
+                for _ in range(8)
+            ]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        self.assertEqual(results.count(0.0), 5)
+
+    @patch("conversations.views.summarize_transcript", return_value="Short.")
+    def test_token_bucket_returns_429_with_retry_after(self, _summarize):
+        from conversations import admission
+
+        url = f"/api/summarize/{self.conv.pk}/"
+        with patch.dict(admission.RATES, {"summarize": (6, 2)}):
+            codes = [self.client.post(url).status_code for _ in range(3)]
+            self.assertEqual(codes, [200, 200, 429])
+            response = self.client.post(url)
+            self.assertEqual(int(response["Retry-After"]), 10)
+            later = admission.time.time() + 10
+            with patch.object(admission, "time") as clock:
+                clock.time.return_value = later
+                self.assertEqual(self.client.post(url).status_code, 200)
+        # Uploads have their own bucket and render the form instead of JSON.
+        with patch.dict(admission.RATES, {"transcribe": (1, 1)}):
+            audio = lambda: SimpleUploadedFile("a.mp3", b"x", content_type="audio/mpeg")
+            for title in ("One", "Two"):
+                response = self.client.post(
+                    "/conversations/transcribe/", {"title": title, "audio": audio(), "quality": "fast"}
+                )
+        self.assertContains(response, "Too many requests", status_code=429)
+        self.assertEqual(TranscriptionJob.objects.filter(user=self.user).count(), 1)
+
+        status = admission.admission_status()["scopes"]
+        self.assertEqual(status["summarize"]["admitted"], 3)
+        self.assertEqual(status["summarize"]["rate_limited"], 2)
+        self.assertEqual(status["transcribe"]["rate_limited"], 1)
+
+    def test_summarize_waits_request_slot_time_then_503(self):
+        from conversations import inference_slots
+
+        url = f"/api/summarize/{self.conv.pk}/"
+        with patch(
+            "conversations.views.summarize_transcript", side_effect=inference_slots.InferenceBusyError(20)
+        ) as summarize:
+            response = self.client.post(url)
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response["Retry-After"], "30")
+        self.assertEqual(summarize.call_args.kwargs["max_wait"], inference_slots.INFERENCE_REQUEST_MAX_WAIT_SEC)
+        self.assertLess(inference_slots.INFERENCE_REQUEST_MAX_WAIT_SEC, 60)
+
+    @patch("conversations.views.summarize_transcript", return_value="Short.")
+    def test_saturated_host_returns_503_without_spending_tokens(self, _summarize):
+        from conversations import admission
+
+        url = f"/api/summarize/{self.conv.pk}/"
+        with patch.object(admission, "ADMISSION_MAX_CONCURRENT", 1), patch.object(
+            admission, "ADMISSION_LOCK_DIR", Path(tempfile.mkdtemp())
+        ), patch.dict(admission.RATES, {"summarize": (6, 1)}):
+            with admission.concurrency_slot():
+                response = self.client.post(url)
+                self.assertEqual(response.status_code, 503)
+                self.assertEqual(response["Retry-After"], str(admission.BUSY_RETRY_AFTER_SEC))
+                # Fast pages are not gated.
+                self.assertEqual(self.client.get("/conversations/").status_code, 200)
+                # Uploads only spool the file: no host slot, so they are never "busy".
+                audio = SimpleUploadedFile("a.mp3", b"x", content_type="audio/mpeg")
+                response = self.client.post(
+                    "/conversations/transcribe/", {"title": "Slow", "audio": audio, "quality": "fast"}
+                )
+                self.assertEqual(response.status_code, 302)
+            self.assertEqual(self.client.post(url).status_code, 200)
+        self.assertEqual(admission.admission_status()["scopes"]["summarize"]["busy"], 1)
+
+
+class SummaryCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("frank", "frank@example.com", "testpass123")
+        self.conv = Conversation.objects.create(user=self.user, title="T", recorded_at=timezone.now())
+        self.seg = TranscriptSegment.objects.create(
+            conversation=self.conv, text="We agreed to ship on Friday.", segment_order=1
+        )
+        self.url = f"/api/summarize/{self.conv.pk}/"
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    @patch("conversations.views.summarize_transcript", side_effect=["First.", "Second.", "Third."])
+    def test_repeat_is_served_from_db_until_segments_or_config_change(self, summarize):
+        from conversations import summarize as summarize_module
+        from conversations.models import ConversationSummary
+
+        self.assertEqual(self.client.get(self.url).json(), {"summary": "First.", "cached": False})
+        with self.assertNumQueries(3):  # session, user, conversation + summary
+            data = self.client.get(self.url).json()
+        self.assertEqual(data, {"summary": "First.", "cached": True})
+        self.assertEqual(summarize.call_count, 1)
+        self.assertContains(self.client.get(self.conv.get_absolute_url()), "First.")
+
+        self.seg.text = "We agreed to ship on Monday."
+        self.seg.save()
+        self.assertFalse(ConversationSummary.objects.filter(conversation=self.conv).exists())
+        self.assertEqual(self.client.get(self.url).json()["summary"], "Second.")
+
+        with patch.object(summarize_module, "NUM_BEAMS", 2):
+            self.assertEqual(self.client.get(self.url).json()["summary"], "Third.")
+        entry = ConversationSummary.objects.get(conversation=self.conv)
+        self.assertEqual(entry.model_config["num_beams"], 2)
+
+        TranscriptSegment.objects.create(conversation=self.conv, text="And demo it.", segment_order=2)
+        self.assertFalse(ConversationSummary.objects.filter(conversation=self.conv).exists())
+
+    def test_summary_of_transcript_edited_during_generation_is_not_served(self):
+        from conversations import summary_cache
+        from conversations.models import ConversationSummary
+
+        def edit_while_generating(transcript, parts=None, max_wait=None, max_chunks=None):
+            TranscriptSegment.objects.filter(pk=self.seg.pk).get().save()
+            return f"Summary of: {transcript}"
+
+        with patch("conversations.views.summarize_transcript", side_effect=edit_while_generating):
+            self.assertEqual(self.client.get(self.url).json()["cached"], False)
+        self.assertFalse(ConversationSummary.objects.filter(conversation=self.conv).exists())
+        # A write racing past that check carries the old version and is never served.
+        self.assertIsNone(summary_cache.store(self.conv, "old text", "Old summary.", segments_version=0))
+        ConversationSummary.objects.create(
+            conversation=self.conv,
+            summary="Old summary.",
+            config_key=summary_cache.config_key(),
+            transcript_sha256="",
+            segments_version=0,
+        )
+        self.assertIsNone(summary_cache.cached_summary(Conversation.objects.get(pk=self.conv.pk)))
+
+    def test_placeholder_messages_are_not_stored(self):
+        from conversations.models import ConversationSummary
+
+        data = self.client.get(self.url).json()
+        self.assertIn("too short", data["summary"])
+        self.assertFalse(ConversationSummary.objects.filter(conversation=self.conv).exists())
+
+
+    def test_long_transcript_on_request_path_is_capped_and_not_stored(self):
+        from conversations import summarize
+        from conversations.models import ConversationSummary
+
+        with patch.object(summarize, "chunk_count", return_value=summarize.REQUEST_MAX_CHUNKS + 1), patch(
+            "conversations.views.summarize_transcript", return_value="Sampled."
+        ) as summarize_transcript:
+            data = self.client.get(self.url).json()
+        self.assertEqual(data, {"summary": "Sampled.", "cached": False, "partial": True})
+        self.assertEqual(summarize_transcript.call_args.kwargs["max_chunks"], summarize.REQUEST_MAX_CHUNKS)
+        self.assertFalse(ConversationSummary.objects.filter(conversation=self.conv).exists())
+
+
+class LongSummaryTests(SimpleTestCase):
+    class _WordTokenizer:
+        def __call__(self, texts, add_special_tokens=False):
+            return {"input_ids": [t.split() for t in texts]}
+
+    def _summarize(self, parts):
+        from conversations import summarize
+
+        calls = []
+
+        def fake_generate(texts, max_new_tokens=summarize.MAX_NEW_TOKENS, max_wait=None):
+            calls.append((list(texts), max_new_tokens))
+            return [f"partial {i} covers this chunk." for i in range(len(texts))]
+
+        with patch.object(summarize, "_get_model", return_value=(self._WordTokenizer(), None)), patch.object(
+            summarize, "_generate", side_effect=fake_generate
+        ):
+            summary = summarize.summarize_transcript(" ".join(parts), parts=parts)
+        return summary, calls
+
+    def test_long_transcript_maps_chunks_in_one_batch_then_reduces(self):
+        from conversations import summarize
+
+        parts = [f"Speaker {'AB'[i % 2]}: " + " ".join([f"w{i}"] * 99) for i in range(30)]
+        summary, calls = self._summarize(parts)
+
+        self.assertEqual(len(calls), 2)
+        chunks, map_tokens = calls[0]
+        self.assertEqual(map_tokens, summarize.MAP_NEW_TOKENS)
+        self.assertEqual(len(chunks), 6)  # 5 utterances of 100 words per 510-token chunk
+        self.assertEqual(" ".join(chunks), " ".join(parts))  # no utterance split or dropped
+        self.assertTrue(all(len(c.split()) <= summarize.CHUNK_TOKENS for c in chunks))
+        reduce_inputs, reduce_tokens = calls[1]
+        self.assertEqual(len(reduce_inputs), 1)
+        self.assertTrue(reduce_inputs[0].startswith("partial 0 covers this chunk. partial 1"))
+        self.assertEqual(reduce_tokens, summarize.MAX_NEW_TOKENS)
+        self.assertEqual(summary, "partial 0 covers this chunk.")
+
+        with patch.object(summarize, "MAX_CHUNKS", 4):
+            _, calls = self._summarize(parts)
+        self.assertEqual(len(calls[0][0]), 4)
+
+    def test_short_transcript_is_a_single_generate(self):
+        from conversations import summarize
+
+        parts = ["Speaker A: we agreed to ship the release on Friday after the final review meeting."]
+        _, calls = self._summarize(parts)
+        self.assertEqual(calls, [([parts[0]], summarize.MAX_NEW_TOKENS)])
+
+
+class SummarizeBatcherTests(SimpleTestCase):
+    def test_concurrent_requests_share_one_batch(self):
+        import threading
+
+        from conversations.summarize_batcher import Batcher
+
+        seen = []
+        release = threading.Event()
+
+        def run_batch(texts):
+            seen.append(list(texts))
+            release.wait(5)
+            return [t.upper() for t in texts]
+
+        batcher = Batcher(run_batch, window=0.05, max_batch=4)
+        futures = [batcher.submit(f"t{i}") for i in range(6)]
+        release.set()
+        self.assertEqual([f.result(5) for f in futures], [f"T{i}" for i in range(6)])
+        self.assertEqual([len(b) for b in seen], [4, 2])
+        self.assertEqual(batcher.batch_sizes, [4, 2])
+
+    def test_zero_window_batches_requests_that_queue_behind_a_running_batch(self):
+        import threading
+
+        from conversations import summarize_batcher
+
+        started, release = threading.Event(), threading.Event()
+
+        def run_batch(texts):
+            started.set()
+            release.wait(5)
+            return list(texts)
+
+        batcher = summarize_batcher.Batcher(run_batch, window=0.0, max_batch=8)
+        first = batcher.submit("a")
+        self.assertTrue(started.wait(5))
+        rest = [batcher.submit(t) for t in "bcd"]
+        release.set()
+        self.assertEqual([f.result(5) for f in [first, *rest]], list("abcd"))
+        self.assertEqual(batcher.batch_sizes, [1, 3])
+
+    def test_error_fails_every_caller_in_the_batch(self):
+        from conversations.summarize_batcher import Batcher
+
+        batcher = Batcher(lambda texts: 1 / 0, window=0.05)
+        futures = [batcher.submit("a"), batcher.submit("b")]
+        for f in futures:
+            with self.assertRaises(ZeroDivisionError):
+                f.result(5)
+
+    def test_benchmark_command_reports_each_level(self):
+        import time as time_module
+
+        from conversations import summarize
+
+        def fake_generate(texts, max_new_tokens=summarize.MAX_NEW_TOKENS, max_wait=None):
+            time_module.sleep(0.01)
+            return ["A short summary."] * len(texts)
+
+        out = StringIO()
+        with patch.object(summarize, "_generate", side_effect=fake_generate):
+            call_command(
+                "benchmark_summarize",
+                "--samples",
+                "--clients=1,4",
+                "--requests=8",
+                "--compare",
+                stdout=out,
+            )
+        lines = out.getvalue().splitlines()
+        self.assertIn("summaries/s", lines[0])
+        self.assertEqual(
+            [line.split()[:2] for line in lines[1:]],
+            [["1", "off"], ["1", "on"], ["4", "off"], ["4", "on"]],
+        )
+
+
+class SummarizeAllCommandTests(TestCase):
+    def _conversation(self, user, title, texts, days_ago=0):
+        conv = Conversation.objects.create(
+            user=user, title=title, recorded_at=timezone.now() - timezone.timedelta(days=days_ago)
+        )
+        TranscriptSegment.objects.bulk_create(
+            [
+                TranscriptSegment(conversation=conv, text=t, speaker_label="Speaker A", segment_order=i)
+                for i, t in enumerate(texts, start=1)
+            ]
+        )
+        return conv
+
+    def test_summarizes_missing_and_stale_then_resumes_with_nothing(self):
+        from conversations import summarize, summary_cache
+        from conversations.models import ConversationSummary
+
+        alice = User.objects.create_user("alice2", "a2@example.com", "pw")
+        bob = User.objects.create_user("bob2", "b2@example.com", "pw")
+        words = "we planned the launch and assigned owners for every open task this week"
+        missing = self._conversation(alice, "Missing", [words, "then we wrapped up"])
+        stale = self._conversation(alice, "Stale", [words])
+        current = self._conversation(alice, "Current", [words])
+        old = self._conversation(alice, "Old", [words], days_ago=30)
+        self._conversation(bob, "Other user", [words])
+        summary_cache.store(current, words, "Already done.")
+        summary_cache.store(stale, words, "Old config.")
+        ConversationSummary.objects.filter(conversation=stale).update(config_key="outdated")
+
+        batches = []
+
+        def fake_generate(texts, max_new_tokens=summarize.MAX_NEW_TOKENS, max_wait=None):
+            batches.append(list(texts))
+            return [f"Summary {len(t)}" for t in texts]
+
+        out = StringIO()
+        since = (timezone.now() - timezone.timedelta(days=7)).strftime("%Y-%m-%d")
+        with patch.object(summarize, "_generate", side_effect=fake_generate):
+            call_command("summarize_all", "--user=alice2", f"--since={since}", stdout=out)
+            self.assertIn("2 conversation(s) need a summary", out.getvalue())
+            self.assertIn("Summarized 2 conversation(s)", out.getvalue())
+            # Both short transcripts went through one padded batch, shortest first.
+            self.assertEqual(len(batches), 1)
+            self.assertEqual(
+                batches[0], [f"Speaker A: {words}", f"Speaker A: {words} Speaker A: then we wrapped up"]
+            )
+            entry = ConversationSummary.objects.get(conversation=missing)
+            self.assertEqual(entry.config_key, summary_cache.config_key())
+            self.assertEqual(summary_cache.cached_summary(missing), entry.summary)
+            self.assertEqual(ConversationSummary.objects.get(conversation=current).summary, "Already done.")
+            self.assertFalse(ConversationSummary.objects.filter(conversation=old).exists())
+
+            out = StringIO()
+            call_command("summarize_all", "--user=alice2", f"--since={since}", stdout=out)
+        self.assertIn("0 conversation(s) need a summary", out.getvalue())
+        self.assertEqual(len(batches), 1)
+
+    def test_skips_empty_short_and_concurrently_edited_conversations(self):
+        from conversations import summarize
+        from conversations.models import ConversationSummary
+
+        user = User.objects.create_user("carol2", "c2@example.com", "pw")
+        words = "we planned the launch and assigned owners for every open task this week"
+        self._conversation(user, "Silent", [""])
+        self._conversation(user, "Short", ["ok thanks"])
+        edited = self._conversation(user, "Edited", [words])
+
+        def fake_generate(texts, max_new_tokens=summarize.MAX_NEW_TOKENS, max_wait=None):
+            edited.segments.get().save()  # segment edited mid-batch
+            return ["Summary." for _ in texts]
+
+        out = StringIO()
+        with patch.object(summarize, "_generate", side_effect=fake_generate):
+            call_command("summarize_all", "--user=carol2", stdout=out)
+        self.assertIn("2 conversation(s) need a summary", out.getvalue())
+        self.assertIn("Skipped 1 conversation(s) too short", out.getvalue())
+        self.assertIn("Skipped 1 conversation(s) edited during the run", out.getvalue())
+        self.assertFalse(ConversationSummary.objects.exists())
+
+
+class SummarizerBackendTests(SimpleTestCase):
+    def test_rouge_scores(self):
+        from conversations.management.commands.benchmark_summarize import rouge
+
+        self.assertEqual(rouge("the cat sat", "The cat sat"), {"rouge1": 1.0, "rouge2": 1.0, "rougeL": 1.0})
+        scores = rouge("the cat sat down", "the cat lay down")
+        self.assertAlmostEqual(scores["rouge1"], 0.75)
+        self.assertAlmostEqual(scores["rouge2"], 1 / 3)
+        self.assertAlmostEqual(scores["rougeL"], 0.75)
+        self.assertEqual(rouge("", "anything")["rouge1"], 0.0)
+
+    def test_backend_selects_registry_entry_and_rejects_unknown(self):
+        from conversations import summarize
+        from conversations.model_registry import registry
+
+        loaded = []
+
+        def fake_load(backend=None):
+            loaded.append(backend)
+            return object(), object()
+
+        with patch.object(summarize, "_load_model", side_effect=fake_load):
+            try:
+                eager = summarize._get_model("eager")
+                int8 = summarize._get_model("int8")
+                self.assertIs(summarize._get_model("eager"), eager)
+                self.assertIsNot(int8, eager)
+                # Opaque backends still count against the memory budget.
+                sizes = {
+                    m["key"][2]: m["size_mb"]
+                    for m in registry.residency()["models"]
+                    if m["key"][0] == "summarizer"
+                }
+                self.assertEqual(sizes, {"eager": summarize._SIZE_MB["eager"], "int8": summarize._SIZE_MB["int8"]})
+            finally:
+                for backend in ("eager", "int8"):
+                    registry.evict(("summarizer", summarize.MODEL_NAME, backend))
+        self.assertEqual(loaded, ["eager", "int8"])
+        with self.assertRaises(ValueError):
+            summarize._get_model("tensorrt")
+
+    def test_onnx_size_hint_uses_exported_files(self):
+        from conversations import summarize
+
+        with tempfile.TemporaryDirectory() as tmp, patch.object(summarize, "ONNX_DIR", Path(tmp)):
+            self.assertEqual(summarize._size_mb("onnx"), summarize._SIZE_MB["onnx"])
+            export_dir = summarize._onnx_export_dir()
+            export_dir.mkdir(parents=True)
+            (export_dir / "encoder_model.onnx").write_bytes(b"\0" * 1024 * 1024)
+            (export_dir / "decoder_model.onnx").write_bytes(b"\0" * 2 * 1024 * 1024)
+            self.assertEqual(summarize._size_mb("onnx"), 3)
+
+    def test_benchmark_reports_each_backend_against_eager(self):
+        from conversations import summarize
+
+        calls = []
+
+        def fake_generate(texts, max_new_tokens=summarize.MAX_NEW_TOKENS, backend=None, max_wait=None):
+            calls.append(backend)
+            if backend == "int8":
+                return ["we met about the launch" for _ in texts]
+            return ["we talked about the launch" for _ in texts]
+
+        with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as fh:
+            fh.write("Speaker A: first call about the launch.\n\nSpeaker B: second call.\n")
+        self.addCleanup(os.unlink, fh.name)
+        out = StringIO()
+        with patch.object(summarize, "_get_model", return_value=(object(), object())), patch.object(
+            summarize, "_generate", side_effect=fake_generate
+        ) as generate:
+            call_command(
+                "benchmark_summarize", "--backends=int8", "--repeat=1", f"--transcripts={fh.name}", stdout=out
+            )
+        self.assertEqual(
+            generate.call_args_list[-1].args[0],
+            ["Speaker A: first call about the launch.", "Speaker B: second call."],
+        )
+        self.assertIn("Compared 2 transcripts", out.getvalue())
+        lines = out.getvalue().splitlines()
+        eager = next(l for l in lines if l.split()[0] == "eager")
+        int8 = next(l for l in lines if l.split()[0] == "int8")
+        self.assertEqual(eager.split()[-3:], ["1.000", "1.000", "1.000"])
+        self.assertEqual(int8.split()[-3:], ["0.800", "0.500", "0.800"])
+        self.assertEqual(calls[0], "eager")
+        self.assertEqual(set(calls), {"eager", "int8"})
+
+        with self.assertRaises(CommandError):
+            call_command("benchmark_summarize", "--backends=tensorrt", "--samples", stdout=StringIO())
@@ -5,46 +5,192 @@ Requires HF_TOKEN (read) in the environment and accepting pyannote model terms o
 from __future__ import annotations
 
 import gc
+import logging
 import os
 import re
 import shutil
 import subprocess
+import tempfile
+import threading
+from collections import deque
 from pathlib import Path
+from typing import NamedTuple
+
+from . import vad, word_timings
+from .inference_slots import INFERENCE_THREADS_PER_SLOT, inference_slot
+from .model_registry import instance_lock, registry
+from .stage_timing import StageTimer
+
+logger = logging.getLogger(__name__)
 
 # Sync upload policy: keep CPU/GPU time and HTTP request bounded for local dev.
 MAX_AUDIO_DURATION_SEC = int(os.environ.get("WHISPER_MAX_DURATION_SEC", "300"))  # 5 min
-MAX_FILE_BYTES = int(os.environ.get("WHISPER_MAX_FILE_BYTES", str(25 * 1024 * 1024)))
+MAX_FILE_BYTES = int(os.environ.get("WHISPER_MAX_FILE_BYTES", str(200 * 1024 * 1024)))
+SAMPLE_RATE = 16000
+_DECODE_CHUNK_BYTES = 1024 * 1024
+# Decode into a sparse, unlinked temp file mapped with np.memmap instead of RAM, so
+# resident memory per upload does not grow with recording length (pages are
+# file-backed and the kernel can drop them). WHISPER_DECODE_DIR picks the disk.
+DECODE_TO_DISK = os.environ.get("WHISPER_DECODE_MMAP", "1").lower() not in ("0", "false", "no")
+DECODE_DIR = os.environ.get("WHISPER_DECODE_DIR") or None
+_DURATION_RE = re.compile(r"Duration:\s*(?:(\d+):(\d+):(\d+(?:\.\d+)?)|N/A)")
+# Quality tiers: "fast" = ASR only (no word timings, no speakers, no HF_TOKEN),
+# "aligned" = + wav2vec2 word alignment, "full" = + pyannote speaker diarization.
+QUALITY_FAST = "fast"
+QUALITY_ALIGNED = "aligned"
+QUALITY_FULL = "full"
+QUALITY_TIERS = (QUALITY_FAST, QUALITY_ALIGNED, QUALITY_FULL)
+DEFAULT_QUALITY = os.environ.get("WHISPER_DEFAULT_QUALITY", QUALITY_FULL)
+# Opt-in: recordings over MAX_AUDIO_DURATION_SEC are split into windows and
+# transcribed in a process pool instead of being rejected (see long_audio.py).
+LONG_AUDIO_ENABLED = os.environ.get("WHISPER_LONG_AUDIO", "").lower() in ("1", "true", "yes")
+# Cut silences longer than WHISPER_VAD_MIN_SILENCE_SEC before ASR/alignment/diarization
+# (conversations/vad.py); only applied when it removes at least VAD_MIN_SKIP of the audio.
+TRIM_SILENCE = os.environ.get("WHISPER_TRIM_SILENCE", "1").lower() not in ("0", "false", "no")
+VAD_MIN_SKIP = 0.1
+
+# wav2vec2 alignment models stay resident per (language, device), at most this many
+# (LRU inside the model registry). 0 disables caching: load + free per request,
+# for memory-constrained hosts.
+ALIGN_CACHE_SIZE = int(os.environ.get("WHISPERX_ALIGN_CACHE_SIZE", "2"))
+# Approximate fp32 resident size of CTranslate2 Whisper models (MB); the registry
+# cannot measure these, so it uses the hint for its memory budget.
+_ASR_SIZE_MB = {"tiny": 150, "base": 290, "small": 970, "medium": 3000}
+_COMPUTE_TYPE_SCALE = {"float16": 0.5, "int8_float16": 0.3, "int8": 0.25}
+_DIARIZE_SIZE_MB = 400
+
+
+class TranscriptRow(NamedTuple):
+    """One transcript segment as returned by transcribe_audio_file (see TranscriptSegment)."""
+
+    speaker_label: str
+    text: str
+    start: float | None = None
+    end: float | None = None
+    word_timings: bytes | None = None  # word_timings.pack() payload; None without alignment
+
+
+class AudioTooLongError(ValueError):
+    """Raised by decode_audio once the header or decoded samples exceed the cap."""
+
+    def __init__(self, duration: float, limit: float):
+        self.duration = duration
+        self.limit = limit
+        super().__init__(
+            f"Audio is too long ({int(duration)}s). "
+            f"Maximum is {int(limit)} seconds (~{int(limit) // 60} minutes)."
+        )
 
-_asr_model = None
-_asr_cache_key: tuple[str, str, str] | None = None
-_diarize_pipeline = None
-_diarize_cache_key: tuple[str, str] | None = None
 
+def _ffmpeg_pcm_cmd(path: str, start: float | None = None, duration: float | None = None) -> list[str]:
+    """ffmpeg invocation writing 16 kHz mono s16le PCM to stdout (same as whisperx.load_audio)."""
+    cmd = ["ffmpeg", "-nostdin", "-threads", "0"]
+    if start is not None:
+        cmd += ["-ss", f"{start:.3f}"]
+    if duration is not None:
+        cmd += ["-t", f"{duration:.3f}"]
+    cmd += ["-i", path, "-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le", "-ar", str(SAMPLE_RATE), "-"]
+    return cmd
 
-def _probe_duration_seconds(path: str) -> float | None:
-    """Best-effort duration via ffprobe; returns None if unavailable."""
-    try:
-        r = subprocess.run(
-            [
-                "ffprobe",
-                "-v",
-                "error",
-                "-show_entries",
-                "format=duration",
-                "-of",
-                "default=noprint_wrappers=1:nokey=1",
-                path,
-            ],
-            capture_output=True,
-            text=True,
-            timeout=60,
-            check=False,
-        )
-        if r.returncode != 0 or not (r.stdout or "").strip():
-            return None
-        return float((r.stdout or "").strip())
-    except (FileNotFoundError, ValueError, subprocess.TimeoutExpired):
+
+def _parse_header_duration(line: str) -> float | None:
+    m = _DURATION_RE.search(line)
+    if not m or m.group(1) is None:
         return None
+    return int(m.group(1)) * 3600 + int(m.group(2)) * 60 + float(m.group(3))
+
+
+def _pcm_buffer(capacity: int):
+    """float32 buffer for decoded samples: a memory-mapped temp file, or RAM."""
+    import numpy as np
+
+    capacity = max(1, capacity)
+    if not DECODE_TO_DISK:
+        return np.empty(capacity, dtype=np.float32)
+    # The file is unlinked on creation and only sized (sparse), so untouched pages
+    # cost nothing and the space is freed when the last view of the map goes away.
+    with tempfile.TemporaryFile(prefix="echolabs-pcm-", dir=DECODE_DIR) as fh:
+        fh.truncate(capacity * 4)
+        return np.memmap(fh, dtype=np.float32, mode="r+", shape=(capacity,))
+
+
+def decode_audio(path: str, max_duration_sec: float):
+    """
+    Decode a file to a 16 kHz mono float32 waveform with a single ffmpeg process.
+
+    ffmpeg prints the container header (including Duration) on stderr before it
+    writes any PCM, so we can reject over-long files before decoding them; files
+    without a header duration are capped by decoded sample count instead. PCM is
+    converted _DECODE_CHUNK_BYTES at a time into one buffer (memory-mapped when
+    DECODE_TO_DISK) that ASR, alignment and diarization all read from.
+    """
+    import numpy as np
+
+    proc = subprocess.Popen(
+        _ffmpeg_pcm_cmd(path),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    header: dict = {}
+    header_done = threading.Event()
+    stderr_tail: deque[str] = deque(maxlen=20)
+
+    def _read_stderr():
+        for raw in iter(proc.stderr.readline, b""):
+            line = raw.decode("utf-8", "replace")
+            stderr_tail.append(line.strip())
+            if not header_done.is_set() and ("Duration:" in line or "Stream mapping" in line):
+                header["duration"] = _parse_header_duration(line)
+                header_done.set()
+        header_done.set()
+
+    reader = threading.Thread(target=_read_stderr, daemon=True)
+    reader.start()
+
+    def _abort(duration: float):
+        proc.kill()
+        raise AudioTooLongError(duration, max_duration_sec)
+
+    try:
+        header_done.wait(timeout=10)
+        probed = header.get("duration")
+        if probed is not None and probed > max_duration_sec:
+            _abort(probed)
+
+        # +1s slack: container durations are rounded and encoders pad the tail.
+        limit = int((max_duration_sec + 1) * SAMPLE_RATE)
+        # A sparse mapping can be sized for the cap up front; RAM grows on demand.
+        capacity = limit if DECODE_TO_DISK else min(limit, int(((probed or 60.0) + 1) * SAMPLE_RATE))
+        buf = _pcm_buffer(capacity)
+        n = 0
+        pending = b""
+        while True:
+            chunk = proc.stdout.read(_DECODE_CHUNK_BYTES)
+            if not chunk:
+                break
+            pending += chunk
+            usable = len(pending) - len(pending) % 2
+            samples = np.frombuffer(pending[:usable], dtype=np.int16)
+            pending = pending[usable:]
+            k = len(samples)
+            if n + k > limit:
+                _abort((n + k) / SAMPLE_RATE)
+            if n + k > len(buf):
+                grown = np.empty(min(limit, max(2 * len(buf), n + k)), dtype=np.float32)
+                grown[:n] = buf[:n]
+                buf = grown
+            np.multiply(samples, 1.0 / 32768.0, out=buf[n : n + k], casting="unsafe")
+            n += k
+    finally:
+        proc.stdout.close()
+        proc.wait()
+        reader.join(timeout=1)
+        proc.stderr.close()
+
+    if proc.returncode != 0 and n == 0:
+        detail = stderr_tail[-1] if stderr_tail else "ffmpeg failed"
+        raise ValueError(f"Could not decode the audio file. Try a different format. ({detail})")
+    return buf[:n]
 
 
 def _pick_device() -> str:
@@ -60,8 +206,12 @@ def _pick_device() -> str:
     return "cpu"
 
 
+def _optional_hf_token() -> str | None:
+    return (os.environ.get("HF_TOKEN") or os.environ.get("HUGGINGFACE_TOKEN") or "").strip() or None
+
+
 def _get_hf_token() -> str:
-    token = (os.environ.get("HF_TOKEN") or os.environ.get("HUGGINGFACE_TOKEN") or "").strip()
+    token = _optional_hf_token()
     if not token:
         raise ValueError(
             "HF_TOKEN (or HUGGINGFACE_TOKEN) is required for speaker diarization. "
@@ -72,44 +222,113 @@ def _get_hf_token() -> str:
     return token
 
 
-def _get_asr_model():
-    """Cache WhisperX ASR model per (name, device, compute_type, preset language)."""
-    global _asr_model, _asr_cache_key
-    import whisperx
-
+def _asr_config(model_name: str | None = None) -> tuple[str, str, str, str | None]:
+    """
+    (model name, device, compute_type, preset language) from the environment.
+    model_name overrides WHISPER_MODEL (e.g. the progressive-mode draft model).
+    """
     device = _pick_device()
     compute_type = os.environ.get("WHISPER_COMPUTE_TYPE") or (
         "float16" if device == "cuda" else "float32"
     )
-    name = os.environ.get("WHISPER_MODEL", "base")
+    name = model_name or os.environ.get("WHISPER_MODEL", "base")
     preset_lang = (os.environ.get("WHISPER_LANGUAGE") or "").strip() or None
-    hf_token = _get_hf_token()
-    key = (name, device, compute_type, preset_lang or "")
-    if _asr_model is None or _asr_cache_key != key:
-        _asr_model = whisperx.load_model(
+    return name, device, compute_type, preset_lang
+
+
+def _get_asr_model(model_name: str | None = None):
+    """
+    WhisperX ASR model per (name, device, compute_type), via the registry.
+    Loaded without a language so one instance serves every user; the language is
+    passed per call to model.transcribe (see _run_pipeline).
+    """
+    import whisperx
+
+    name, device, compute_type, _ = _asr_config(model_name)
+    hf_token = _optional_hf_token()
+    size_mb = _ASR_SIZE_MB.get(name, 6200) * _COMPUTE_TYPE_SCALE.get(compute_type, 1.0)
+    model = registry.get(
+        ("whisperx_asr", name, device, compute_type),
+        lambda: whisperx.load_model(
             name,
             device,
             compute_type=compute_type,
-            language=preset_lang,
             use_auth_token=hf_token,
-        )
-        _asr_cache_key = key
-    return _asr_model, device
+            threads=INFERENCE_THREADS_PER_SLOT,
+        ),
+        size_mb=size_mb,
+    )
+    return model, device
+
+
+def _asr_transcribe(
+    model,
+    audio,
+    *,
+    batch_size: int,
+    language: str | None,
+    kind: str = "asr",
+    timer: StageTimer | None = None,
+    max_wait: float | None = None,
+) -> dict:
+    """
+    model.transcribe under the model's instance lock, then an inference slot (a
+    thread queued behind the shared model does not hold a slot meanwhile).
+    FasterWhisperPipeline keeps the tokenizer of its previous call and, given
+    language=None, reuses that call's language instead of detecting; dropping it
+    makes every such call detect the language of its own audio.
+    """
+    with instance_lock(model), inference_slot(kind, timer, max_wait=max_wait):
+        if language is None:
+            model.tokenizer = None
+        return model.transcribe(audio, batch_size=batch_size, language=language)
 
 
 def _get_diarize_pipeline(hf_token: str, device: str):
-    global _diarize_pipeline, _diarize_cache_key
     from whisperx.diarize import DiarizationPipeline
 
-    key = (device, hf_token)
-    if _diarize_pipeline is None or _diarize_cache_key != key:
-        model_name = os.environ.get("WHISPERX_DIARIZE_MODEL")
+    model_name = os.environ.get("WHISPERX_DIARIZE_MODEL")
+
+    def _load():
         kwargs = {"token": hf_token, "device": device}
         if model_name:
             kwargs["model_name"] = model_name
-        _diarize_pipeline = DiarizationPipeline(**kwargs)
-        _diarize_cache_key = key
-    return _diarize_pipeline
+        return DiarizationPipeline(**kwargs)
+
+    return registry.get(
+        ("pyannote_diarize", device, model_name or "default"),
+        _load,
+        size_mb=_DIARIZE_SIZE_MB,
+    )
+
+
+def _free_device_memory(device: str) -> None:
+    gc.collect()
+    if device == "cuda":
+        import torch
+
+        torch.cuda.empty_cache()
+
+
+def _get_align_model(language: str, device: str):
+    """
+    Return (align_model, metadata, cached) for a language, reusing loaded models.
+    The registry keeps at most ALIGN_CACHE_SIZE languages (LRU) within its memory budget.
+    """
+    import whisperx
+
+    def _load():
+        return whisperx.load_align_model(language_code=language, device=device)
+
+    if ALIGN_CACHE_SIZE <= 0:
+        model, metadata = _load()
+        return model, metadata, False
+    model, metadata = registry.get(
+        ("whisperx_align", language, device),
+        _load,
+        group_limit=ALIGN_CACHE_SIZE,
+    )
+    return model, metadata, True
 
 
 def _format_speaker_label(raw: str | None) -> str:
@@ -132,7 +351,7 @@ def _env_int(name: str) -> int | None:
 
 
 def _require_ffmpeg() -> None:
-    """WhisperX decodes most formats via a subprocess to `ffmpeg`."""
+    """decode_audio (and long_audio) decode every format via a subprocess to `ffmpeg`."""
     if shutil.which("ffmpeg") is None:
         raise ValueError(
             "FFmpeg is not installed or not on your PATH. WhisperX needs the `ffmpeg` "
@@ -141,108 +360,356 @@ def _require_ffmpeg() -> None:
         )
 
 
-def transcribe_audio_file(path: str) -> tuple[list[tuple[str, str]], float]:
-    """
-    Transcribe audio at path with WhisperX + diarization.
+def _diarize_kwargs() -> dict:
+    min_speakers = _env_int("WHISPERX_MIN_SPEAKERS")
+    max_speakers = _env_int("WHISPERX_MAX_SPEAKERS")
+    diarize_kw: dict = {}
+    if min_speakers is not None:
+        diarize_kw["min_speakers"] = min_speakers
+    if max_speakers is not None:
+        diarize_kw["max_speakers"] = max_speakers
+    return diarize_kw
 
-    Returns (list of (speaker_label, segment_text), duration_seconds).
-    speaker_label may be empty if diarization could not assign a speaker.
+
+def _trim_silence(audio, timer: StageTimer):
+    """
+    Return (speech-only waveform, OffsetMap) or (audio, None) when trimming would
+    not pay off. Records timer.meta["vad_skipped_fraction"].
+    """
+    import numpy as np
+
+    audio = np.asarray(audio, dtype=np.float32)
+    regions = vad.speech_regions(audio, SAMPLE_RATE)
+    kept = sum(e - s for s, e in regions)
+    skipped = 1 - kept / len(audio) if len(audio) else 0.0
+    timer.meta["vad_skipped_fraction"] = round(skipped, 3)
+    # No regions at all: likely very quiet speech, let WhisperX's own VAD decide.
+    if not regions or skipped < VAD_MIN_SKIP:
+        return audio, None
+    return vad.compact(audio, regions, SAMPLE_RATE)
+
+
+def _run_pipeline(
+    audio,
+    hf_token: str | None,
+    *,
+    quality: str = QUALITY_FULL,
+    return_embeddings: bool = False,
+    timer: StageTimer | None = None,
+    language: str | None = None,
+    model_name: str | None = None,
+):
+    """
+    Run _run_stages on the speech-only part of `audio` when TRIM_SILENCE is on,
+    then map segment and word timestamps back onto the original timeline.
+    Same arguments and return value as _run_stages.
+    """
+    timer = timer or StageTimer()
+    offset_map = None
+    if TRIM_SILENCE:
+        with timer.stage("vad"):
+            audio, offset_map = _trim_silence(audio, timer)
+    segments, embeddings = _run_stages(
+        audio,
+        hf_token,
+        quality=quality,
+        return_embeddings=return_embeddings,
+        timer=timer,
+        language=language,
+        model_name=model_name,
+    )
+    if offset_map is not None:
+        offset_map.remap_segments(segments)
+    return segments, embeddings
+
+
+def _run_stages(
+    audio,
+    hf_token: str | None,
+    *,
+    quality: str = QUALITY_FULL,
+    return_embeddings: bool = False,
+    timer: StageTimer | None = None,
+    language: str | None = None,
+    model_name: str | None = None,
+):
+    """
+    ASR + alignment + diarization on a decoded 16 kHz mono waveform.
+    `quality` stops after ASR ("fast") or alignment ("aligned"); hf_token is only
+    needed for "full". `language` (e.g. the user's learned preference) skips
+    WhisperX language detection; WHISPER_LANGUAGE is the fallback. The language
+    used ends up in timer.meta["language"], with meta["language_detected"] True
+    when WhisperX had to detect it. ASR, alignment and diarization each hold a
+    host-wide inference slot (inference_slots.py) only while they run; shared
+    models are locked first, so waiting for one never ties up a slot.
+
+    Returns (segments, speaker_embeddings) where segments are WhisperX segment dicts
+    (text/start/end/speaker) and speaker_embeddings maps raw pyannote ids to vectors
+    (empty unless return_embeddings=True and the installed WhisperX supports it).
     """
-    import torch
     import whisperx
 
-    p = Path(path)
-    if not p.is_file():
-        raise ValueError("Audio file is missing or invalid.")
+    timer = timer or StageTimer()
+    with timer.stage("load_asr"):
+        model, device = _get_asr_model(model_name)
+    batch_size = _env_int("WHISPERX_BATCH_SIZE") or (8 if device == "cuda" else 4)
+    language = language or _asr_config()[3]
 
-    size = p.stat().st_size
-    if size > MAX_FILE_BYTES:
-        raise ValueError(
-            f"File is too large ({size // (1024 * 1024)} MB). "
-            f"Maximum size is {MAX_FILE_BYTES // (1024 * 1024)} MB."
+    with timer.stage("asr"):
+        result = _asr_transcribe(model, audio, batch_size=batch_size, language=language, timer=timer)
+    if not result.get("segments"):
+        return [], {}
+
+    timer.meta["language_detected"] = language is None
+    language = language or result.get("language") or "en"
+    timer.meta["language"] = language
+    if quality == QUALITY_FAST:
+        return result["segments"], {}
+    with timer.stage("load_align"):
+        align_model, align_metadata, cached = _get_align_model(language, device)
+    try:
+        with timer.stage("align"), inference_slot("align", timer):
+            aligned = whisperx.align(
+                result["segments"],
+                align_model,
+                align_metadata,
+                audio,
+                device,
+                return_char_alignments=False,
+            )
+        result["segments"] = aligned["segments"]
+    finally:
+        if not cached:
+            del align_model
+            _free_device_memory(device)
+    if quality == QUALITY_ALIGNED:
+        return result["segments"], {}
+
+    with timer.stage("load_diarize"):
+        diarize_model = _get_diarize_pipeline(hf_token, device)
+    embeddings: dict = {}
+    with timer.stage("diarize"), instance_lock(diarize_model), inference_slot("diarize", timer):
+        if return_embeddings:
+            try:
+                diarize_segments, embeddings = diarize_model(
+                    audio, return_embeddings=True, **_diarize_kwargs()
+                )
+            except TypeError:
+                # Older WhisperX: no embedding output; caller falls back to per-window ids.
+                diarize_segments = diarize_model(audio, **_diarize_kwargs())
+            embeddings = dict(embeddings or {})
+        else:
+            diarize_segments = diarize_model(audio, **_diarize_kwargs())
+    with timer.stage("assign_speakers"):
+        result = whisperx.assign_word_speakers(
+            diarize_segments, result, fill_nearest=True
         )
-
-    probed = _probe_duration_seconds(str(p))
-    if probed is not None and probed > MAX_AUDIO_DURATION_SEC:
-        raise ValueError(
-            f"Audio is too long ({int(probed)}s). "
-            f"Maximum is {MAX_AUDIO_DURATION_SEC} seconds (~{MAX_AUDIO_DURATION_SEC // 60} minutes)."
+    return result.get("segments") or [], embeddings
+
+
+def _compact_segments(segments) -> list[dict]:
+    """Keep only what we store/cache: speaker id, text, timings and word [start, end] pairs."""
+    compact = []
+    for seg in segments:
+        start, end = seg.get("start"), seg.get("end")
+        compact.append(
+            {
+                "speaker": seg.get("speaker"),
+                "text": (seg.get("text") or "").strip(),
+                "start": float(start) if isinstance(start, (int, float)) else None,
+                "end": float(end) if isinstance(end, (int, float)) else None,
+                "words": word_timings.compact_words(seg.get("words")),
+            }
         )
+    return compact
 
-    hf_token = _get_hf_token()
-    _require_ffmpeg()
-    audio = whisperx.load_audio(str(p))
-    model, device = _get_asr_model()
-    batch_size = _env_int("WHISPERX_BATCH_SIZE") or (8 if device == "cuda" else 4)
 
-    result = model.transcribe(
-        audio,
-        batch_size=batch_size,
-        language=os.environ.get("WHISPER_LANGUAGE") or None,
+def _rows_from_segments(
+    segments, speaker_names: dict[str, str] | None = None
+) -> tuple[list[TranscriptRow], float]:
+    """
+    TranscriptRows plus the last segment end. speaker_names maps raw diarization
+    ids to known-speaker names (speaker_bank.py); others get Speaker A/B/….
+    """
+    speaker_names = speaker_names or {}
+    rows: list[TranscriptRow] = []
+    ends: list[float] = []
+    for seg in segments:
+        text = (seg.get("text") or "").strip()
+        if not text:
+            continue
+        raw = seg.get("speaker")
+        if raw is None:
+            label = ""
+        else:
+            label = speaker_names.get(raw) or _format_speaker_label(raw)
+        start, end = seg.get("start"), seg.get("end")
+        start = float(start) if isinstance(start, (int, float)) else None
+        end = float(end) if isinstance(end, (int, float)) else None
+        rows.append(TranscriptRow(label, text, start, end, word_timings.pack(seg.get("words"))))
+        if end is not None:
+            ends.append(end)
+    return rows, (max(ends) if ends else 0.0)
+
+
+def _identify_speakers(
+    speaker_bank, embeddings: dict, timer: StageTimer, segments=()
+) -> dict[str, str]:
+    """
+    Known-speaker names for every diarization id in segments; {} (generic
+    Speaker A/B labels for all of them) if unavailable.
+    """
+    if speaker_bank is None or not embeddings:
+        return {}
+    raw_ids = {seg.get("speaker") for seg in segments if seg.get("speaker") is not None}
+    try:
+        with timer.stage("identify_speakers"):
+            names = speaker_bank.identify(embeddings, other_ids=raw_ids)
+    except Exception:
+        logger.exception("Speaker identification failed; using generic labels")
+        return {}
+    timer.meta["identified_speakers"] = len(names)
+    return names
+
+
+def _no_speech_error() -> ValueError:
+    return ValueError(
+        "No speech detected in the audio. Try a clearer recording or a different format."
     )
-    if not result.get("segments"):
-        raise ValueError(
-            "No speech detected in the audio. Try a clearer recording or a different format."
-        )
 
-    language = result.get("language") or "en"
-    align_model, align_metadata = whisperx.load_align_model(
-        language_code=language,
-        device=device,
+
+def transcribe_audio_file(
+    path: str,
+    audio_sha256: str | None = None,
+    timer: StageTimer | None = None,
+    quality: str = DEFAULT_QUALITY,
+    use_cache: bool = True,
+    language: str | None = None,
+    model_name: str | None = None,
+    speaker_bank=None,
+) -> tuple[list[TranscriptRow], float]:
+    """
+    Transcribe audio at path with WhisperX + diarization.
+
+    Returns (list of TranscriptRow, duration_seconds). speaker_label may be empty
+    if diarization could not assign a speaker; start/end are seconds in the
+    original recording and word_timings is the packed per-word payload
+    (word_timings.py) when the tier ran alignment.
+    Recordings longer than MAX_AUDIO_DURATION_SEC go through the chunked
+    long-audio path (conversations/long_audio.py) when WHISPER_LONG_AUDIO is on.
+
+    Results are cached by audio content hash (conversations/transcript_cache.py);
+    pass audio_sha256 when the caller already hashed the file while writing it.
+    Pass a StageTimer to collect per-stage timings; every run is logged either way.
+
+    quality is one of QUALITY_TIERS: "fast" returns text only (empty speaker labels),
+    "aligned" adds word alignment, "full" (default) adds speaker diarization.
+    language (ISO code, e.g. from UserProfile.preferred_language) skips language
+    detection; the detected or given language is left in timer.meta["language"].
+    model_name overrides WHISPER_MODEL for this run (progressive-mode drafts).
+    speaker_bank (speaker_bank.SpeakerBank) turns "full" speaker ids into the
+    user's known speaker names; cached results fall back to Speaker A/B/….
+    """
+    if quality not in QUALITY_TIERS:
+        raise ValueError(f"Unknown transcription quality {quality!r}.")
+    timer = timer or StageTimer()
+    name, device, compute_type, _ = _asr_config(model_name)
+    timer.meta.update(
+        {"model": name, "device": device, "compute_type": compute_type, "quality": quality}
     )
     try:
-        aligned = whisperx.align(
-            result["segments"],
-            align_model,
-            align_metadata,
-            audio,
-            device,
-            return_char_alignments=False,
+        return _transcribe(
+            path, audio_sha256, timer, quality, use_cache, language, model_name, speaker_bank
         )
-        result["segments"] = aligned["segments"]
     finally:
-        del align_model
-        gc.collect()
-        if device == "cuda":
-            torch.cuda.empty_cache()
+        timer.log()
 
-    min_speakers = _env_int("WHISPERX_MIN_SPEAKERS")
-    max_speakers = _env_int("WHISPERX_MAX_SPEAKERS")
-    diarize_kw: dict = {}
-    if min_speakers is not None:
-        diarize_kw["min_speakers"] = min_speakers
-    if max_speakers is not None:
-        diarize_kw["max_speakers"] = max_speakers
 
-    diarize_model = _get_diarize_pipeline(hf_token, device)
-    diarize_segments = diarize_model(audio, **diarize_kw)
-    result = whisperx.assign_word_speakers(
-        diarize_segments, result, fill_nearest=True
-    )
+def _transcribe(
+    path: str,
+    audio_sha256: str | None,
+    timer: StageTimer,
+    quality: str,
+    use_cache: bool,
+    language: str | None,
+    model_name: str | None,
+    speaker_bank,
+):
+    from . import transcript_cache
 
-    rows: list[tuple[str, str]] = []
-    ends: list[float] = []
-    for seg in result.get("segments") or []:
-        text = (seg.get("text") or "").strip()
-        if not text:
-            continue
-        raw = seg.get("speaker")
-        label = _format_speaker_label(raw) if raw is not None else ""
-        rows.append((label, text))
-        end = seg.get("end")
-        if isinstance(end, (int, float)):
-            ends.append(float(end))
-
-    duration = max(ends) if ends else 0.0
-    if duration > MAX_AUDIO_DURATION_SEC:
+    p = Path(path)
+    if not p.is_file():
+        raise ValueError("Audio file is missing or invalid.")
+
+    size = p.stat().st_size
+    if size > MAX_FILE_BYTES:
         raise ValueError(
-            f"Audio is too long ({int(duration)}s). "
-            f"Maximum is {MAX_AUDIO_DURATION_SEC} seconds."
+            f"File is too large ({size // (1024 * 1024)} MB). "
+            f"Maximum size is {MAX_FILE_BYTES // (1024 * 1024)} MB."
         )
 
-    if not rows:
-        raise ValueError(
-            "No speech detected in the audio. Try a clearer recording or a different format."
+    cached = None
+    if use_cache:
+        with timer.stage("cache_lookup"):
+            audio_sha256 = audio_sha256 or transcript_cache.file_sha256(str(p))
+            cached = transcript_cache.lookup(
+                audio_sha256, quality, language=language, model_name=model_name
+            )
+    timer.meta["cache_hit"] = cached is not None
+    if cached is not None:
+        segments, duration = cached
+        timer.meta["audio_seconds"] = duration
+        logger.info("Transcript cache hit for %s…", audio_sha256[:12])
+        rows, _ = _rows_from_segments(segments)
+        return rows, duration
+
+    hf_token = _get_hf_token() if quality == QUALITY_FULL else _optional_hf_token()
+    _require_ffmpeg()
+    try:
+        with timer.stage("decode"):
+            audio = decode_audio(str(p), MAX_AUDIO_DURATION_SEC)
+    except AudioTooLongError:
+        if not LONG_AUDIO_ENABLED:
+            raise
+        from . import long_audio
+
+        timer.meta["mode"] = "long"
+        segments, duration, embeddings = long_audio.transcribe_long_audio_file(
+            str(p), timer=timer, quality=quality, language=language, model_name=model_name
         )
+        timer.meta["audio_seconds"] = duration
+        names = _identify_speakers(speaker_bank, embeddings, timer, segments)
+        rows, _ = _rows_from_segments(segments, names)
+        if not rows:
+            raise _no_speech_error()
+        if use_cache:
+            transcript_cache.store(
+                audio_sha256, segments, duration, quality, language=language, model_name=model_name
+            )
+        return rows, duration
+
+    duration = len(audio) / SAMPLE_RATE
+    timer.meta["audio_seconds"] = duration
+    segments, embeddings = _run_pipeline(
+        audio,
+        hf_token,
+        quality=quality,
+        timer=timer,
+        language=language,
+        model_name=model_name,
+        return_embeddings=speaker_bank is not None and quality == QUALITY_FULL,
+    )
+    if not segments:
+        raise _no_speech_error()
+
+    segments = _compact_segments(segments)
+    names = _identify_speakers(speaker_bank, embeddings, timer, segments)
+    rows, _ = _rows_from_segments(segments, names)
+    if not rows:
+        raise _no_speech_error()
 
+    if use_cache:
+        transcript_cache.store(
+            audio_sha256, segments, duration, quality, language=language, model_name=model_name
+        )
     return rows, duration
@@ -0,0 +1,126 @@
+"""
+Content-addressed cache of WhisperX results (TranscriptCacheEntry rows).
+
+Key = SHA-256(audio bytes) + the quality tier and model configuration that
+produced the output, so retries and re-uploads of the same recording return
+instantly while a change of tier / WHISPER_MODEL / compute type / language /
+diarization model misses cleanly.
+Prune with `python manage.py prune_transcript_cache` (age + total size limits).
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from datetime import timedelta
+
+from django.db.models import Sum
+from django.utils import timezone
+
+from . import transcribe
+from .models import TranscriptCacheEntry
+
+ENABLED = os.environ.get("TRANSCRIPT_CACHE", "1").lower() not in ("0", "false", "no")
+MAX_AGE_DAYS = int(os.environ.get("TRANSCRIPT_CACHE_MAX_AGE_DAYS", "30"))
+MAX_MB = int(os.environ.get("TRANSCRIPT_CACHE_MAX_MB", "50"))
+_HASH_CHUNK = 1024 * 1024
+
+
+def file_sha256(path: str) -> str:
+    """Streaming SHA-256 of a file (constant memory)."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(_HASH_CHUNK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def model_config(
+    quality: str = transcribe.QUALITY_FULL,
+    language: str | None = None,
+    model_name: str | None = None,
+) -> dict:
+    """Everything that changes the pipeline output for identical audio."""
+    name, device, compute_type, preset_lang = transcribe._asr_config(model_name)
+    return {
+        "quality": quality,
+        "model": name,
+        "device": device,
+        "compute_type": compute_type,
+        "language": language or preset_lang or "",
+        "diarize_model": os.environ.get("WHISPERX_DIARIZE_MODEL", ""),
+        "min_speakers": transcribe._env_int("WHISPERX_MIN_SPEAKERS"),
+        "max_speakers": transcribe._env_int("WHISPERX_MAX_SPEAKERS"),
+        "trim_silence": transcribe.TRIM_SILENCE,
+    }
+
+
+def cache_key(audio_sha256: str, config: dict) -> str:
+    payload = json.dumps({"audio": audio_sha256, "config": config}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def lookup(
+    audio_sha256: str,
+    quality: str = transcribe.QUALITY_FULL,
+    language: str | None = None,
+    model_name: str | None = None,
+) -> tuple[list[dict], float] | None:
+    """Return (segments, duration_seconds) for a cached run, or None."""
+    if not ENABLED:
+        return None
+    key = cache_key(audio_sha256, model_config(quality, language, model_name))
+    entry = TranscriptCacheEntry.objects.filter(cache_key=key).first()
+    if entry is None:
+        return None
+    TranscriptCacheEntry.objects.filter(pk=entry.pk).update(last_used_at=timezone.now())
+    return entry.segments, entry.duration_seconds
+
+
+def store(
+    audio_sha256: str,
+    segments: list[dict],
+    duration: float,
+    quality: str = transcribe.QUALITY_FULL,
+    language: str | None = None,
+    model_name: str | None = None,
+) -> None:
+    if not ENABLED:
+        return
+    config = model_config(quality, language, model_name)
+    size = len(json.dumps(segments))
+    TranscriptCacheEntry.objects.update_or_create(
+        cache_key=cache_key(audio_sha256, config),
+        defaults={
+            "audio_sha256": audio_sha256,
+            "model_config": config,
+            "segments": segments,
+            "duration_seconds": duration,
+            "size_bytes": size,
+            "last_used_at": timezone.now(),
+        },
+    )
+
+
+def prune(max_age_days: int = MAX_AGE_DAYS, max_mb: int = MAX_MB) -> int:
+    """
+    Delete entries unused for max_age_days, then least recently used entries until
+    the total stored size fits in max_mb. Returns the number of rows deleted.
+    """
+    cutoff = timezone.now() - timedelta(days=max_age_days)
+    deleted, _ = TranscriptCacheEntry.objects.filter(last_used_at__lt=cutoff).delete()
+
+    budget = max_mb * 1024 * 1024
+    total = TranscriptCacheEntry.objects.aggregate(total=Sum("size_bytes"))["total"] or 0
+    if total <= budget:
+        return deleted
+    doomed = []
+    for pk, size in TranscriptCacheEntry.objects.order_by("last_used_at").values_list(
+        "pk", "size_bytes"
+    ):
+        if total <= budget:
+            break
+        doomed.append(pk)
+        total -= size
+    n, _ = TranscriptCacheEntry.objects.filter(pk__in=doomed).delete()
+    return deleted + n
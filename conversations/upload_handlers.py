@@ -0,0 +1,64 @@
+"""
+Upload handler that streams multipart file data straight into the transcription spool.
+
+Installed as the only FILE_UPLOAD_HANDLERS entry: nothing is buffered in memory
+(Django's MemoryFileUploadHandler would hold up to FILE_UPLOAD_MAX_MEMORY_SIZE),
+the SHA-256 is computed while the chunks arrive, and the temp file already lives
+in TRANSCRIBE_SPOOL_DIR so jobs.enqueue_upload() only has to rename it.
+"""
+from __future__ import annotations
+
+import hashlib
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files.uploadedfile import TemporaryUploadedFile, UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler
+
+from .transcribe import MAX_FILE_BYTES
+
+
+class SpooledUploadedFile(TemporaryUploadedFile):
+    """TemporaryUploadedFile created in the spool directory, carrying its SHA-256."""
+
+    def __init__(self, name, content_type, size, charset, content_type_extra=None):
+        spool = Path(settings.TRANSCRIBE_SPOOL_DIR)
+        spool.mkdir(parents=True, exist_ok=True)
+        file = tempfile.NamedTemporaryFile(suffix=".upload" + Path(name).suffix, dir=spool)
+        UploadedFile.__init__(self, file, name, content_type, size, charset, content_type_extra)
+        self.sha256: str | None = None
+
+
+class SpoolUploadHandler(FileUploadHandler):
+    """
+    Write each chunk to a spool temp file and hash it. Past MAX_FILE_BYTES the data
+    is only counted, so an oversized upload costs no disk and still reports its
+    real size for the form's "File too large" error.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.file = SpooledUploadedFile(
+            self.file_name, self.content_type, 0, self.charset, self.content_type_extra
+        )
+        self.digest = hashlib.sha256()
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received <= MAX_FILE_BYTES:
+            self.digest.update(raw_data)
+            self.file.write(raw_data)
+        return None
+
+    def file_complete(self, file_size):
+        self.file.seek(0)
+        self.file.size = file_size
+        if file_size <= MAX_FILE_BYTES:
+            self.file.sha256 = self.digest.hexdigest()
+        return self.file
+
+    def upload_interrupted(self):
+        if hasattr(self, "file"):
+            self.file.close()
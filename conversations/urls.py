@@ -10,10 +10,12 @@ from .views import (
     conversations_manual_view,
     conversations_render_view,
     transcribe_upload_view,
+    transcription_job_detail_view,
 )
 
 urlpatterns = [
     path("transcribe/", transcribe_upload_view, name="transcribe_audio"),
+    path("transcribe/jobs/<int:pk>/", transcription_job_detail_view, name="transcription_job_detail"),
     path("", ConversationsListView.as_view(), name="conversations_list"),
     path("analytics/", ConversationAnalyticsView.as_view(), name="conversation_analytics"),
     path("chart/", conversation_chart_view, name="conversation_chart"),
@@ -0,0 +1,123 @@
+"""
+Energy-based speech detection used to cut long silences before ASR/diarization.
+
+`speech_regions` finds voiced stretches in a 16 kHz waveform (frame RMS against
+an adaptive noise floor); `compact` concatenates them with a short pause between
+regions and returns an OffsetMap so timestamps from the compacted waveform can
+be mapped back onto the original recording (`OffsetMap.remap_segments`).
+No model download: this runs in numpy before WhisperX sees the audio.
+"""
+from __future__ import annotations
+
+import bisect
+import os
+
+import numpy as np
+
+FRAME_SEC = 0.03
+# Silences shorter than this are kept (natural pauses inside speech).
+MIN_SILENCE_SEC = float(os.environ.get("WHISPER_VAD_MIN_SILENCE_SEC", "1.0"))
+# Speech kept on either side of each region so word onsets/tails are not clipped.
+PAD_SEC = 0.25
+# Pause inserted between regions in the compacted waveform.
+GAP_SEC = 0.3
+# Frames louder than noise floor * FLOOR_RATIO count as speech; the threshold is
+# clamped so digital silence never counts and clearly audible audio always does.
+FLOOR_RATIO = 3.0
+MIN_THRESHOLD = 10 ** (-60 / 20)  # -60 dBFS
+MAX_THRESHOLD = 10 ** (-35 / 20)  # -35 dBFS
+_RMS_BLOCK_FRAMES = 8192  # ~4 min of audio per block
+
+
+def speech_regions(
+    audio: np.ndarray,
+    sample_rate: int = 16000,
+    min_silence_sec: float = MIN_SILENCE_SEC,
+    pad_sec: float = PAD_SEC,
+) -> list[tuple[int, int]]:
+    """[(start_sample, end_sample)] of speech, padded and merged across short pauses."""
+    frame = int(sample_rate * FRAME_SEC)
+    n_frames = len(audio) // frame
+    if n_frames == 0:
+        return [(0, len(audio))] if len(audio) else []
+    frames = np.asarray(audio[: n_frames * frame], dtype=np.float32).reshape(n_frames, frame)
+    # Blockwise so a memory-mapped waveform is streamed, not squared into one big temporary.
+    rms = np.empty(n_frames, dtype=np.float32)
+    for i in range(0, n_frames, _RMS_BLOCK_FRAMES):
+        block = frames[i : i + _RMS_BLOCK_FRAMES]
+        rms[i : i + len(block)] = np.sqrt(np.einsum("ij,ij->i", block, block) / frame)
+    floor = float(np.percentile(rms, 10))
+    threshold = min(max(floor * FLOOR_RATIO, MIN_THRESHOLD), MAX_THRESHOLD)
+    voiced = np.flatnonzero(rms > threshold)
+    if not len(voiced):
+        return []
+
+    max_gap = max(1, int(min_silence_sec / FRAME_SEC))
+    pad = int(pad_sec * sample_rate)
+    regions: list[tuple[int, int]] = []
+    start = prev = int(voiced[0])
+    for f in voiced[1:]:
+        f = int(f)
+        if f - prev > max_gap:
+            regions.append((start, prev + 1))
+            start = f
+        prev = f
+    regions.append((start, prev + 1))
+
+    padded: list[tuple[int, int]] = []
+    for s, e in regions:
+        s = max(0, s * frame - pad)
+        e = min(len(audio), e * frame + pad)
+        if padded and s <= padded[-1][1]:
+            padded[-1] = (padded[-1][0], e)
+        else:
+            padded.append((s, e))
+    return padded
+
+
+class OffsetMap:
+    """Piecewise mapping from compacted-waveform seconds to original seconds."""
+
+    def __init__(self, pieces: list[tuple[float, float, float]]):
+        # (compact_start, original_start, length), sorted by compact_start
+        self.pieces = pieces
+        self._starts = [p[0] for p in pieces]
+
+    def to_original(self, t: float | None) -> float | None:
+        if t is None or not self.pieces:
+            return t
+        i = max(0, bisect.bisect_right(self._starts, t) - 1)
+        compact_start, original_start, length = self.pieces[i]
+        # Times inside an inserted pause snap to the end of the preceding region.
+        return round(original_start + min(max(t - compact_start, 0.0), length), 3)
+
+    def remap_segments(self, segments: list[dict]) -> list[dict]:
+        """Rewrite start/end (and word start/end) of WhisperX segments in place."""
+        for seg in segments:
+            for key in ("start", "end"):
+                if isinstance(seg.get(key), (int, float)):
+                    seg[key] = self.to_original(float(seg[key]))
+            for word in seg.get("words") or []:
+                for key in ("start", "end"):
+                    if isinstance(word.get(key), (int, float)):
+                        word[key] = self.to_original(float(word[key]))
+        return segments
+
+
+def compact(
+    audio: np.ndarray, regions: list[tuple[int, int]], sample_rate: int = 16000
+) -> tuple[np.ndarray, OffsetMap]:
+    """Concatenate the speech regions (GAP_SEC of silence between them)."""
+    gap = np.zeros(int(GAP_SEC * sample_rate), dtype=np.float32)
+    parts: list[np.ndarray] = []
+    pieces: list[tuple[float, float, float]] = []
+    cursor = 0
+    for i, (s, e) in enumerate(regions):
+        if i:
+            parts.append(gap)
+            cursor += len(gap)
+        parts.append(np.asarray(audio[s:e], dtype=np.float32))
+        pieces.append((cursor / sample_rate, s / sample_rate, (e - s) / sample_rate))
+        cursor += e - s
+    out = np.concatenate(parts) if parts else np.zeros(0, dtype=np.float32)
+    return out, OffsetMap(pieces)
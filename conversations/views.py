@@ -3,9 +3,8 @@ import io
 import json
 import logging
 import os
-import tempfile
+import time
 from datetime import datetime, timedelta
-from pathlib import Path
 from django.utils import timezone
 
 import requests
@@ -23,9 +22,11 @@ from django.contrib.auth.mixins import LoginRequiredMixin
 from django.views import View
 from django.views.generic import DetailView, ListView
 
-from . import coach_search, transcribe
+from . import coach_search, inference_slots, jobs, summarize, summary_cache, transcribe
+from .admission import admission_controlled, admission_status
 from .forms import AudioTranscribeForm, CoachSearchForm
-from .models import Conversation, ImprovementNote, TranscriptSegment
+from .model_registry import registry
+from .models import Conversation, ImprovementNote, TranscriptionJob, TranscriptSegment
 from .summarize import summarize_transcript
 
 
@@ -181,14 +182,21 @@ class ConversationDetailView(LoginRequiredMixin, DetailView):
     context_object_name = "conversation"
 
     def get_queryset(self):
-        return super().get_queryset().filter(user=self.request.user)
+        return super().get_queryset().filter(user=self.request.user).select_related("summary")
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         conv = context["conversation"]
+        context["summary"] = summary_cache.cached_summary(conv)
         notes = ImprovementNote.objects.filter(segment__conversation=conv).select_related("segment").order_by("segment__segment_order", "note_type")
         context["improvement_notes"] = list(notes)
         context["filler_count"] = notes.filter(note_type=ImprovementNote.NoteType.FILLER_WORD).count()
+        context["refining"] = (
+            conv.transcript_version == Conversation.TranscriptVersion.DRAFT
+            and conv.transcription_jobs.filter(
+                status__in=[TranscriptionJob.Status.PENDING, TranscriptionJob.Status.RUNNING]
+            ).exists()
+        )
         return context
 
 
@@ -362,16 +370,7 @@ def api_summary(request):
 
 def _transcript_for_conversation(conversation):
     """Build full transcript text from conversation segments."""
-    segments = conversation.segments.order_by("segment_order")
-    parts = []
-    for s in segments:
-        if not s.text:
-            continue
-        if getattr(s, "speaker_label", ""):
-            parts.append(f"{s.speaker_label}: {s.text}")
-        else:
-            parts.append(s.text)
-    return " ".join(parts)
+    return " ".join(conversation.transcript_parts())
 
 
 @login_required
@@ -379,18 +378,45 @@ def api_summarize_conversation(request, pk):
     """
     Local LLM: summarize a conversation's transcript using Hugging Face
     bart-large-cnn-samsum (transformers). GET or POST with conversation id.
+    A stored summary that is still current (summary_cache.py) is returned
+    without rebuilding the transcript or touching admission control.
     """
     if request.method not in ("GET", "POST"):
         return JsonResponse({"error": "Method not allowed"}, status=405)
-    conversation = get_object_or_404(Conversation, pk=pk)
+    conversation = get_object_or_404(Conversation.objects.select_related("summary"), pk=pk)
     if conversation.user_id != request.user.id:
         return JsonResponse({"error": "Not allowed"}, status=403)
-    transcript = _transcript_for_conversation(conversation)
+    summary = summary_cache.cached_summary(conversation)
+    if summary is not None:
+        return JsonResponse({"summary": summary, "cached": True})
+    return _generate_summary(request, conversation)
+
+
+@admission_controlled("summarize")
+def _generate_summary(request, conversation):
+    parts = conversation.transcript_parts()
+    transcript = " ".join(parts)
     if not transcript.strip():
         return JsonResponse({"error": "No transcript to summarize", "summary": ""})
     try:
-        summary = summarize_transcript(transcript)
-        return JsonResponse({"summary": summary})
+        t0 = time.perf_counter()
+        # Past REQUEST_MAX_CHUNKS the request summarizes a sample of the chunks; that
+        # partial summary is returned but not stored, so summarize_all replaces it.
+        partial = summarize.chunk_count(transcript, parts) > summarize.REQUEST_MAX_CHUNKS
+        summary = summarize_transcript(
+            transcript,
+            parts=parts,
+            max_wait=inference_slots.INFERENCE_REQUEST_MAX_WAIT_SEC,
+            max_chunks=summarize.REQUEST_MAX_CHUNKS,
+        )
+        if partial:
+            return JsonResponse({"summary": summary, "cached": False, "partial": True})
+        summary_cache.store(conversation, transcript, summary, time.perf_counter() - t0)
+        return JsonResponse({"summary": summary, "cached": False})
+    except inference_slots.InferenceBusyError as e:
+        response = JsonResponse({"error": "Server busy", "detail": str(e)}, status=503)
+        response["Retry-After"] = "30"
+        return response
     except Exception as e:
         return JsonResponse(
             {"error": "Summarization failed", "detail": str(e)},
@@ -399,6 +425,25 @@ def api_summarize_conversation(request, pk):
 
 
 @login_required
+def api_model_residency(request):
+    """
+    GET /api/models/ — staff-only diagnostics: models resident in this worker process,
+    their approximate size and the configured memory budget (see model_registry.py),
+    plus host-wide inference slot usage (inference_slots.py) and admission counters
+    (admission.py).
+    """
+    if request.method != "GET":
+        return JsonResponse({"error": "Method not allowed"}, status=405)
+    if not request.user.is_staff:
+        return JsonResponse({"error": "Not allowed"}, status=403)
+    payload = registry.residency()
+    payload["inference_slots"] = inference_slots.slot_status()
+    payload["admission"] = admission_status()
+    return JsonResponse(payload)
+
+
+@login_required
+@admission_controlled("action_items", methods=("POST",))
 def api_action_items(request):
     """
     External AI: action items via Hugging Face Inference Providers (chat completions).
@@ -784,59 +829,86 @@ def insights_view(request):
     return render(request, "conversations/insights.html", context)
 
 
+def _upload_rejected(request, exc):
+    """Admission rejection for the upload form: the page again, with the reason."""
+    form = AudioTranscribeForm(initial={"title": request.POST.get("title", "")})
+    messages.error(request, str(exc))
+    return _transcribe_page(request, form, status=exc.status)
+
+
+def _transcribe_page(request, form, status=200):
+    """Upload form page; the caps shown come from the same settings the form enforces."""
+    context = {
+        "form": form,
+        "max_file_mb": transcribe.MAX_FILE_BYTES // (1024 * 1024),
+        "max_minutes": transcribe.MAX_AUDIO_DURATION_SEC // 60,
+    }
+    return render(request, "conversations/transcribe.html", context, status=status)
+
+
 @login_required
+# Token bucket only: the upload is just spooled, and holding a host slot while
+# the body streams in would lock summarize / action items out during slow uploads.
+@admission_controlled("transcribe", methods=("POST",), reject=_upload_rejected, concurrency=False)
 def transcribe_upload_view(request):
     """
-    Upload audio → WhisperX (ASR + align + diarization) → Conversation + segments.
-    Synchronous; capped file size and duration (see conversations/transcribe.py).
+    Upload audio → queued TranscriptionJob; redirects to a status page right away.
+    WhisperX (ASR + align + diarization) runs in `manage.py transcribe_worker`
+    (capped file size and duration, see conversations/transcribe.py).
     """
     if request.method == "POST":
         form = AudioTranscribeForm(request.POST, request.FILES)
         if form.is_valid():
-            audio = form.cleaned_data["audio"]
-            title = form.cleaned_data["title"].strip()
-            suffix = Path(audio.name).suffix.lower() or ".wav"
-            tmp_path = None
-            try:
-                with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-                    for chunk in audio.chunks():
-                        tmp.write(chunk)
-                    tmp_path = tmp.name
-                segment_rows, duration_sec = transcribe.transcribe_audio_file(tmp_path)
-            except ValueError as e:
-                form.add_error(None, str(e))
-            except Exception as e:
-                form.add_error(
-                    None,
-                    "Transcription failed. Check the file format, HF_TOKEN, and pyannote "
-                    f"model access on Hugging Face. ({e})",
-                )
-            else:
-                conv = Conversation.objects.create(
-                    user=request.user,
-                    title=title[:200],
-                    recorded_at=timezone.now(),
-                    duration_seconds=max(1, int(round(duration_sec))) if duration_sec else None,
-                )
-                for i, (speaker_label, text) in enumerate(segment_rows, start=1):
-                    TranscriptSegment.objects.create(
-                        conversation=conv,
-                        text=text,
-                        speaker_label=(speaker_label or "")[:64],
-                        segment_order=i,
-                    )
-                messages.success(
-                    request,
-                    "Transcript created from your audio. You can summarize it from the conversation page.",
-                )
-                return redirect(conv.get_absolute_url())
-            finally:
-                if tmp_path:
-                    try:
-                        os.unlink(tmp_path)
-                    except OSError:
-                        pass
+            job = jobs.enqueue_upload(
+                request.user,
+                form.cleaned_data["title"].strip(),
+                form.cleaned_data["audio"],
+                quality=form.cleaned_data["quality"],
+            )
+            return redirect("transcription_job_detail", pk=job.pk)
     else:
         form = AudioTranscribeForm()
 
-    return render(request, "conversations/transcribe.html", {"form": form})
+    return _transcribe_page(request, form)
+
+
+def _job_status_payload(job):
+    return {
+        "id": job.pk,
+        "title": job.title,
+        "quality": job.quality,
+        "status": job.status,
+        "error": job.error,
+        "created_at": job.created_at.isoformat(),
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+        "conversation_url": job.conversation.get_absolute_url() if job.conversation_id else None,
+        "transcript_version": job.conversation.transcript_version if job.conversation_id else None,
+    }
+
+
+@login_required
+def transcription_job_detail_view(request, pk):
+    """Status page for a queued upload; polls the JSON endpoint until the job finishes."""
+    job = get_object_or_404(TranscriptionJob, pk=pk, user=request.user)
+    if job.status == TranscriptionJob.Status.DONE and job.conversation_id:
+        messages.success(
+            request,
+            "Transcript created from your audio. You can summarize it from the conversation page.",
+        )
+        return redirect(job.conversation.get_absolute_url())
+    if job.status == TranscriptionJob.Status.RUNNING and job.conversation_id:
+        messages.info(request, "Draft transcript ready. The full transcript replaces it when done.")
+        return redirect(job.conversation.get_absolute_url())
+    return render(request, "conversations/transcription_job.html", {"job": job})
+
+
+@login_required
+def api_transcription_job_status(request, pk):
+    """GET /api/transcribe/jobs/<id>/ — poll a queued transcription."""
+    if request.method != "GET":
+        return JsonResponse({"error": "Method not allowed"}, status=405)
+    job = get_object_or_404(TranscriptionJob, pk=pk)
+    if job.user_id != request.user.id:
+        return JsonResponse({"error": "Not allowed"}, status=403)
+    return JsonResponse(_job_status_payload(job))
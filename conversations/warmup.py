@@ -0,0 +1,161 @@
+"""
+Load ML models before the first request instead of during it.
+
+Targets (comma-separated in ECHOLABS_WARMUP, or `manage.py warmup --targets`):
+    coach       sentence-transformers embedder for /insights/ (knowledge base: see below)
+    summarizer  BART summarizer (/api/summarize/<pk>/)
+    asr         WhisperX ASR model
+    align       WhisperX alignment model for WHISPER_LANGUAGE (default en)
+    diarize     pyannote diarization pipeline (skipped without HF_TOKEN)
+
+ECHOLABS_WARMUP=1 means coach,summarizer for web processes and
+asr,align,diarize for `manage.py transcribe_worker`; "all" means every target.
+echolabs_project/wsgi.py and asgi.py call `warm_up_from_env()` at import time, so
+with `gunicorn --preload` the models load once in the master and the forked
+workers share the weights copy-on-write. Warm-up therefore only loads weights
+and never runs a model: once torch's OpenMP pool has run in the master, a forked
+worker's first parallel region can hang (libgomp is not fork-safe), and CUDA
+contexts do not survive fork either (leave GPU warm-up to the transcribe
+worker). The coach knowledge base is embedded after the fork instead, by a
+background thread in each child, or by the first search in a process that
+never forks.
+"""
+from __future__ import annotations
+
+import gc
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+WEB_TARGETS = ("coach", "summarizer")
+WORKER_TARGETS = ("asr", "align", "diarize")
+ALL_TARGETS = WEB_TARGETS + WORKER_TARGETS
+_index_after_fork_registered = False
+
+
+def _build_coach_index() -> None:
+    from . import coach_search
+
+    try:
+        coach_search._ensure_index()
+    except Exception as e:
+        logger.warning("Building the coach-search index failed: %s", e)
+
+
+def _build_coach_index_in_background() -> None:
+    threading.Thread(target=_build_coach_index, name="coach-index", daemon=True).start()
+
+
+def _warm_coach() -> None:
+    global _index_after_fork_registered
+    from . import coach_search
+
+    coach_search._get_model()
+    if hasattr(os, "register_at_fork") and not _index_after_fork_registered:
+        os.register_at_fork(after_in_child=_build_coach_index_in_background)
+        _index_after_fork_registered = True
+
+
+def _warm_summarizer() -> None:
+    from . import summarize
+
+    summarize._get_model()
+
+
+def _warm_asr() -> None:
+    from . import transcribe
+
+    transcribe._get_asr_model()
+
+
+def _warm_align() -> None:
+    from . import transcribe
+
+    _, device = transcribe._get_asr_model()
+    transcribe._get_align_model(os.environ.get("WHISPER_LANGUAGE") or "en", device)
+
+
+def _warm_diarize() -> bool:
+    from . import transcribe
+
+    token = transcribe._optional_hf_token()
+    if not token:
+        return False
+    transcribe._get_diarize_pipeline(token, transcribe._pick_device())
+    return True
+
+
+_WARMERS = {
+    "coach": _warm_coach,
+    "summarizer": _warm_summarizer,
+    "asr": _warm_asr,
+    "align": _warm_align,
+    "diarize": _warm_diarize,
+}
+
+
+def parse_targets(value: str | None, default: tuple[str, ...] = WEB_TARGETS) -> list[str]:
+    """'' / '0' -> [], '1' -> default, 'all' -> every target, else a validated comma list."""
+    value = (value or "").strip().lower()
+    if value in ("", "0", "false", "no"):
+        return []
+    if value in ("1", "true", "yes"):
+        return list(default)
+    if value == "all":
+        return list(ALL_TARGETS)
+    targets = [t.strip() for t in value.split(",") if t.strip()]
+    unknown = [t for t in targets if t not in _WARMERS]
+    if unknown:
+        raise ValueError(
+            f"Unknown warm-up target(s): {', '.join(unknown)}. Choose from {', '.join(ALL_TARGETS)}."
+        )
+    return targets
+
+
+def warm_up(targets) -> dict[str, dict]:
+    """
+    Load each target, returning {target: {"seconds": float, "status": "ok"|"skipped"|"error", ...}}.
+    Failures are logged and reported, never raised: a missing optional dependency
+    must not stop a web process from booting.
+    """
+    report: dict[str, dict] = {}
+    for name in targets:
+        t0 = time.perf_counter()
+        try:
+            loaded = _WARMERS[name]()
+        except Exception as e:
+            logger.warning("Warm-up of %s failed: %s", name, e)
+            report[name] = {"status": "error", "error": str(e)}
+        else:
+            report[name] = {"status": "skipped" if loaded is False else "ok"}
+        report[name]["seconds"] = round(time.perf_counter() - t0, 2)
+        logger.info("Warm-up %s: %s in %.2fs", name, report[name]["status"], report[name]["seconds"])
+    return report
+
+
+def warm_up_from_env(
+    default: tuple[str, ...] = WEB_TARGETS, only: tuple[str, ...] | None = None
+) -> dict[str, dict]:
+    """
+    Opt-in warm-up driven by ECHOLABS_WARMUP; no-op when unset. `only` limits an
+    explicit target list to what this kind of process uses (the transcribe
+    worker ignores coach/summarizer).
+    """
+    try:
+        targets = parse_targets(os.environ.get("ECHOLABS_WARMUP"), default)
+    except ValueError as e:
+        logger.warning("Ignoring ECHOLABS_WARMUP: %s", e)
+        return {}
+    if only is not None:
+        targets = [t for t in targets if t in only]
+    if not targets:
+        return {}
+    report = warm_up(targets)
+    # Move everything loaded so far out of the collector's reach so the cyclic GC
+    # does not touch (and un-share) the preloaded pages in forked workers.
+    gc.collect()
+    gc.freeze()
+    return report
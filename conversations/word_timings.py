@@ -0,0 +1,59 @@
+"""
+Compact per-word timing payload stored on TranscriptSegment.word_timings.
+
+WhisperX alignment yields one {"word", "start", "end"} dict per word. Instead of a
+row per word we keep a single little-endian uint32 array of (start_ms, end_ms)
+pairs per segment (8 bytes/word); the words themselves are the segment text
+split on whitespace (per character for scripts without spaces). Words alignment
+could not place (digits, symbols) are stored as MISSING and read back as None.
+"""
+from __future__ import annotations
+
+import numpy as np
+
+MISSING = 0xFFFFFFFF
+_DTYPE = np.dtype("<u4")
+
+
+def _ms(t) -> int:
+    return int(round(float(t) * 1000)) if isinstance(t, (int, float)) and t >= 0 else MISSING
+
+
+def compact_words(words) -> list[list[float | None]] | None:
+    """[[start, end], …] (seconds, ms precision) from WhisperX word dicts; None if unaligned."""
+    out = []
+    for word in words or []:
+        pair = []
+        for key in ("start", "end"):
+            t = word.get(key)
+            pair.append(round(float(t), 3) if isinstance(t, (int, float)) else None)
+        out.append(pair)
+    return out or None
+
+
+def pack(pairs) -> bytes | None:
+    """Pack [[start, end], …] seconds into the stored blob (None if there are no words)."""
+    if not pairs:
+        return None
+    return np.array([[_ms(s), _ms(e)] for s, e in pairs], dtype=_DTYPE).tobytes()
+
+
+def unpack(blob) -> list[tuple[float | None, float | None]]:
+    """Inverse of pack(): [(start, end), …] in seconds."""
+    if not blob:
+        return []
+    arr = np.frombuffer(bytes(blob), dtype=_DTYPE).reshape(-1, 2)
+    return [tuple(None if v == MISSING else v / 1000 for v in row) for row in arr.tolist()]
+
+
+def timed_words(text: str, blob) -> list[tuple[str, float | None, float | None]]:
+    """(word, start, end) for each word of a segment; [] if the payload does not fit the text."""
+    pairs = unpack(blob)
+    if not pairs:
+        return []
+    tokens = text.split()
+    if len(tokens) != len(pairs):
+        tokens = [c for c in text if not c.isspace()]
+    if len(tokens) != len(pairs):
+        return []
+    return [(tok, start, end) for tok, (start, end) in zip(tokens, pairs)]
@@ -2,6 +2,9 @@
 ASGI config for echolabs_project project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+HTTP goes to Django; WebSocket connections to /ws/transcribe/ go to the live
+transcription handler in conversations/streaming.py. Run with an ASGI server
+that speaks WebSockets, e.g. ``uvicorn echolabs_project.asgi:application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
@@ -13,4 +16,23 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "echolabs_project.settings.prod")
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Imported after Django is set up (it touches settings and models).
+from conversations.streaming import WEBSOCKET_PATH, websocket_transcribe  # noqa: E402
+from conversations.warmup import warm_up_from_env  # noqa: E402
+
+# Opt-in (ECHOLABS_WARMUP): load models now, before workers accept traffic.
+# Under `gunicorn --preload` this runs once in the master process.
+warm_up_from_env()
+
+
+async def application(scope, receive, send):
+    if scope["type"] == "websocket":
+        if scope["path"].rstrip("/") + "/" == WEBSOCKET_PATH:
+            await websocket_transcribe(scope, receive, send)
+        else:
+            await receive()  # websocket.connect
+            await send({"type": "websocket.close", "code": 4404})
+        return
+    await django_application(scope, receive, send)
@@ -130,8 +130,36 @@ STATIC_URL = "/static/"
 STATICFILES_DIRS = [BASE_DIR / "static"]
 STATIC_ROOT = BASE_DIR / "staticfiles"
 
-# Audio uploads for local Whisper transcription (conversations/transcribe.py).
-DATA_UPLOAD_MAX_MEMORY_SIZE = 30 * 1024 * 1024
-FILE_UPLOAD_MAX_MEMORY_SIZE = 30 * 1024 * 1024
+# Audio uploads for local Whisper transcription (conversations/transcribe.py) are
+# streamed to TRANSCRIBE_SPOOL_DIR while they arrive, never held in memory; the
+# size cap is WHISPER_MAX_FILE_BYTES. DATA_UPLOAD_MAX_MEMORY_SIZE stays at Django's
+# 2.5 MB default because it only counts non-file form fields.
+FILE_UPLOAD_HANDLERS = ["conversations.upload_handlers.SpoolUploadHandler"]
+
+# Uploaded audio waits here until the `transcribe_worker` command picks it up.
+# Must be on a disk shared by the web and worker processes.
+TRANSCRIBE_SPOOL_DIR = Path(
+    os.environ.get("TRANSCRIBE_SPOOL_DIR", str(BASE_DIR / "media" / "transcribe_spool"))
+)
+
+# Admission-control token buckets and counters (conversations/admission.py) live in
+# the default cache. REDIS_URL shares them across hosts, DJANGO_CACHE_DIR across
+# the processes of one host; otherwise each process keeps its own (local dev).
+if os.environ.get("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.environ["REDIS_URL"],
+        }
+    }
+elif os.environ.get("DJANGO_CACHE_DIR"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": os.environ["DJANGO_CACHE_DIR"],
+        }
+    }
+else:
+    CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
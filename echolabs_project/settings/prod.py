@@ -60,3 +60,15 @@ if database_url:
         }
     except ImportError:
         pass
+
+# The gunicorn workers must share admission-control buckets and counters; without
+# REDIS_URL / DJANGO_CACHE_DIR use a file cache in the temp dir of this host.
+if CACHES["default"]["BACKEND"].endswith("LocMemCache"):  # noqa: F405
+    import tempfile
+
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": os.path.join(tempfile.gettempdir(), "echolabs-cache"),
+        }
+    }
@@ -21,8 +21,10 @@ from django.urls import include, path
 from conversations.dashboard import a10_dashboard_view
 from conversations.views import (
     api_action_items,
+    api_model_residency,
     api_summarize_conversation,
     api_summary,
+    api_transcription_job_status,
     conversations_api_json,
     conversations_api_text,
     export_conversations_csv,
@@ -57,6 +59,12 @@ urlpatterns = [
     path("api/summary/", api_summary, name="api_summary"),
     path("api/summarize/<int:pk>/", api_summarize_conversation, name="api_summarize_conversation"),
     path("api/action-items/", api_action_items, name="api_action_items"),
+    path("api/models/", api_model_residency, name="api_model_residency"),
+    path(
+        "api/transcribe/jobs/<int:pk>/",
+        api_transcription_job_status,
+        name="api_transcription_job_status",
+    ),
     path("api/conversations/", conversations_api_json, name="conversations_api_json"),
     path(
         "api/conversations.txt",
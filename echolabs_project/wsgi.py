@@ -14,3 +14,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "echolabs_project.settings.prod")
 
 application = get_wsgi_application()
+
+# Opt-in (ECHOLABS_WARMUP): load models now, before workers accept traffic.
+# Under `gunicorn --preload` this runs once in the master process.
+from conversations.warmup import warm_up_from_env  # noqa: E402
+
+warm_up_from_env()